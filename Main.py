@@ -1,333 +1,276 @@
 import streamlit as st
+import html
+import os
 import random
-from typing import List, Dict, Tuple, Optional
-import json
-from datetime import datetime
+import re
+from typing import List, Optional
 import time
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from dice_board import COMPUTER, PLAYER, ROOM, board_state, dice_board
+from farkle import metrics
+from farkle.ai import DIFFICULTY_LEVELS, TRAINED_LEVELS, computer_turn_step
+from farkle.endgame import reach_chance
+from farkle.hints import load_response_tables, load_tables, player_hint
+from farkle.memory import SessionTracker, metered_trim, script_session_state
+from farkle.policy import PolicyTable
+from farkle.rooms import MAX_ROOM_PLAYERS, Room, RoomRegistry
+from farkle.scoring import DICE_FACES, DICE_SETS, TARGET_SCORE, calculate_score, designed_dice_sets
+from farkle.state import (
+    close_game_history,
+    encode_snapshot,
+    load_snapshot,
+    new_game_state,
+    player_bank,
+    player_farkle,
+    player_keep,
+    player_roll,
+    record_step,
+    reset_turn,
+    restore_snapshot,
+    start_new_game,
+    unpack_game_state,
+)
+from farkle.store import DecisionRecord, GameRecord, GameStore
+from farkle.trace import button_action, new_trace, trace_state, widget_action, write_trace
+from farkle.wintable import win_chances
+
+rerun_started = time.perf_counter()
+rerun_timed = False
 
 # Initialize session state
 if 'game_state' not in st.session_state:
-    st.session_state.game_state = 'setup'
-    st.session_state.player_score = 0
-    st.session_state.computer_score = 0
-    st.session_state.turn_score = 0
-    st.session_state.dice = [1, 2, 3, 4, 5, 6]
-    st.session_state.kept_dice = []
-    st.session_state.remaining_dice = 6
-    st.session_state.current_player = 'player'
-    st.session_state.turn_history = []
-    st.session_state.game_history = []
+    for key, value in new_game_state().items():
+        st.session_state[key] = value
     st.session_state.show_rules = False
-    st.session_state.dice_images = {
-        1: "⚀",
-        2: "⚁",
-        3: "⚂",
-        4: "⚃",
-        5: "⚄",
-        6: "⚅"
-    }
-    st.session_state.selected_dice_set = 'standard'
-    st.session_state.computer_dice = []
-    st.session_state.computer_turn_in_progress = False
-    st.session_state.computer_roll_history = []
-    st.session_state.computer_current_roll_score = 0
-    st.session_state.computer_total_turn_score = 0
-
-# Dice sets
-DICE_SETS = {
-    'standard': [1, 2, 3, 4, 5, 6],
-    'lucky': [1, 1, 5, 5, 3, 6],  # More 1s and 5s
-    'odd': [3, 3, 4, 4, 1, 6],  # More 3s and 4s
-    'heavenly': [1, 5, 6, 1, 5, 6],  # Only 1s, 5s, 6s
-    'loaded': [6, 6, 5, 5, 1, 2],  # High numbers favored
-}
-
-# Scoring rules
-SCORING_RULES = {
-    'single_1': 100,
-    'single_5': 50,
-    'three_1s': 1000,
-    'three_2s': 200,
-    'three_3s': 300,
-    'three_4s': 400,
-    'three_5s': 500,
-    'three_6s': 600,
-    'straight': 1000,
-    'three_pairs': 500,
-    'four_of_a_kind': 1000,
-    'five_of_a_kind': 2000,
-    'six_of_a_kind': 3000,
-}
-
-
-def roll_dice(num_dice: int, dice_set: str) -> List[int]:
-    """Roll specified number of dice from the selected dice set"""
-    if num_dice <= 0:
-        return []
-
-    dice_faces = DICE_SETS[dice_set]
-    return [random.choice(dice_faces) for _ in range(num_dice)]
-
-
-def calculate_score(dice: List[int]) -> Tuple[int, List[Dict]]:
-    """
-    Calculate score for given dice and return possible scoring combinations.
-    Returns: (score, scoring_dice_info)
-    """
-    if not dice:
-        return 0, []
-
-    dice_counts = {i: dice.count(i) for i in range(1, 7)}
-    score = 0
-    scoring_info = []
-
-    # Check for straight (1-6)
-    if all(count == 1 for count in dice_counts.values()) and len(dice) == 6:
-        score += SCORING_RULES['straight']
-        scoring_info.append({
-            'dice': dice.copy(),
-            'rule': 'straight',
-            'points': SCORING_RULES['straight']
-        })
-        return score, scoring_info
-
-    # Check for three pairs
-    pairs = [count for count in dice_counts.values() if count == 2]
-    if len(pairs) == 3 and len(dice) == 6:
-        score += SCORING_RULES['three_pairs']
-        scoring_info.append({
-            'dice': dice.copy(),
-            'rule': 'three_pairs',
-            'points': SCORING_RULES['three_pairs']
-        })
-        return score, scoring_info
-
-    # Check for six of a kind
-    for value, count in dice_counts.items():
-        if count == 6:
-            score += SCORING_RULES['six_of_a_kind']
-            scoring_info.append({
-                'dice': [value] * 6,
-                'rule': f'six_of_a_kind ({value}s)',
-                'points': SCORING_RULES['six_of_a_kind']
-            })
-            return score, scoring_info
-
-    # Check for five of a kind
-    for value, count in dice_counts.items():
-        if count == 5:
-            score += SCORING_RULES['five_of_a_kind']
-            scoring_info.append({
-                'dice': [value] * 5,
-                'rule': f'five_of_a_kind ({value}s)',
-                'points': SCORING_RULES['five_of_a_kind']
-            })
-            # Check remaining single die
-            remaining_dice = [v for v in dice if v != value]
-            if remaining_dice:
-                single_score, single_info = calculate_score(remaining_dice)
-                score += single_score
-                scoring_info.extend(single_info)
-            return score, scoring_info
-
-    # Check for four of a kind
-    for value, count in dice_counts.items():
-        if count == 4:
-            score += SCORING_RULES['four_of_a_kind']
-            scoring_info.append({
-                'dice': [value] * 4,
-                'rule': f'four_of_a_kind ({value}s)',
-                'points': SCORING_RULES['four_of_a_kind']
-            })
-            # Check remaining two dice
-            remaining_dice = [v for v in dice if v != value]
-            if remaining_dice:
-                single_score, single_info = calculate_score(remaining_dice)
-                score += single_score
-                scoring_info.extend(single_info)
-            return score, scoring_info
-
-    # Check for three of a kind
-    for value, count in dice_counts.items():
-        if count == 3:
-            if value == 1:
-                score += SCORING_RULES['three_1s']
-                scoring_info.append({
-                    'dice': [1, 1, 1],
-                    'rule': 'three_1s',
-                    'points': SCORING_RULES['three_1s']
-                })
-            else:
-                score += SCORING_RULES[f'three_{value}s']
-                scoring_info.append({
-                    'dice': [value, value, value],
-                    'rule': f'three_{value}s',
-                    'points': SCORING_RULES[f'three_{value}s']
-                })
-
-            # Check remaining dice
-            remaining_dice = [v for v in dice if v != value]
-            if remaining_dice:
-                single_score, single_info = calculate_score(remaining_dice)
-                score += single_score
-                scoring_info.extend(single_info)
-            return score, scoring_info
-
-    # Check for single 1s and 5s
-    temp_dice = dice.copy()
-    scoring_dice = []
-
-    for die in temp_dice:
-        if die == 1:
-            score += SCORING_RULES['single_1']
-            scoring_dice.append(die)
-            scoring_info.append({
-                'dice': [1],
-                'rule': 'single_1',
-                'points': SCORING_RULES['single_1']
-            })
-        elif die == 5:
-            score += SCORING_RULES['single_5']
-            scoring_dice.append(die)
-            scoring_info.append({
-                'dice': [5],
-                'rule': 'single_5',
-                'points': SCORING_RULES['single_5']
-            })
-
-    # Remove scored dice from consideration for combinations
-    for die in scoring_dice:
-        if die in temp_dice:
-            temp_dice.remove(die)
-
-    return score, scoring_info
-
-
-def can_score(dice: List[int]) -> bool:
-    """Check if any scoring combination exists in the dice"""
-    score, _ = calculate_score(dice)
-    return score > 0
-
-
-def computer_turn_step():
-    """Execute one step of the computer's turn (one roll)"""
-    if st.session_state.computer_turn_in_progress:
-        # Roll dice
-        dice = roll_dice(st.session_state.remaining_dice, st.session_state.selected_dice_set)
-        st.session_state.computer_dice = dice
-
-        # Check if any scoring dice
-        if not can_score(dice):
-            st.session_state.turn_history.append(
-                f"🤖 Computer Farkled! Lost {st.session_state.computer_total_turn_score} points."
-            )
-            st.session_state.computer_turn_in_progress = False
-            return False
-
-        # Calculate score for this roll
-        roll_score, scoring_info = calculate_score(dice)
-        st.session_state.computer_current_roll_score = roll_score
-        st.session_state.computer_total_turn_score += roll_score
-
-        # Record roll
-        dice_str = " ".join([st.session_state.dice_images[d] for d in dice])
-        roll_record = {
-            'dice': dice,
-            'score': roll_score,
-            'scoring_info': scoring_info,
-            'remaining_dice': st.session_state.remaining_dice
-        }
-        st.session_state.computer_roll_history.append(roll_record)
-
-        # Count scoring dice for hot dice
-        scoring_dice_count = 0
-        for combo in scoring_info:
-            scoring_dice_count += len(combo['dice'])
-
-        # Update remaining dice
-        st.session_state.remaining_dice -= scoring_dice_count
-        if st.session_state.remaining_dice == 0:  # Hot dice
-            st.session_state.remaining_dice = 6
-
-        # Computer decision making
-        behind_by = st.session_state.player_score - st.session_state.computer_score
-
-        # Determine if computer should continue
-        should_continue = True
-
-        if st.session_state.computer_total_turn_score >= 1000:
-            should_continue = False
-        elif st.session_state.remaining_dice <= 2 and st.session_state.computer_total_turn_score >= 750:
-            should_continue = False
-        elif behind_by > 1000 and st.session_state.computer_total_turn_score < 1500:
-            should_continue = True  # Take more risks when far behind
-        elif behind_by > 500 and st.session_state.remaining_dice >= 3:
-            should_continue = True
-        else:
-            # Random element to make computer more human-like
-            should_continue = random.random() < 0.5  # 50% chance to keep rolling
-
-        if not should_continue:
-            # Computer decides to bank
-            st.session_state.computer_score += st.session_state.computer_total_turn_score
-            st.session_state.turn_history.append(
-                f"🤖 Computer banked {st.session_state.computer_total_turn_score} points."
-            )
-            st.session_state.computer_turn_in_progress = False
-
-            # Check win condition
-            if st.session_state.computer_score >= 10000:
-                st.session_state.game_state = 'game_over'
-                st.session_state.turn_history.append("💀 COMPUTER WINS THE GAME!")
-            return False
-
-        return True  # Continue rolling
-
-
-def reset_computer_turn():
-    """Reset computer turn state"""
-    st.session_state.computer_dice = []
-    st.session_state.computer_roll_history = []
-    st.session_state.computer_current_roll_score = 0
-    st.session_state.computer_total_turn_score = 0
-    st.session_state.computer_turn_in_progress = True
-
-
-def reset_turn():
-    """Reset for a new turn"""
-    st.session_state.turn_score = 0
-    st.session_state.dice = []
-    st.session_state.kept_dice = []
-    st.session_state.remaining_dice = 6
-    st.session_state.computer_dice = []
-    st.session_state.computer_roll_history = []
-    st.session_state.computer_current_roll_score = 0
-    st.session_state.computer_total_turn_score = 0
-    st.session_state.computer_turn_in_progress = False
-
-
-def start_new_game():
-    """Initialize a new game"""
-    st.session_state.player_score = 0
-    st.session_state.computer_score = 0
-    st.session_state.game_state = 'playing'
-    st.session_state.current_player = 'player'
-    st.session_state.turn_history = []
-    st.session_state.turn_score = 0
-    st.session_state.dice = []
-    st.session_state.kept_dice = []
-    st.session_state.remaining_dice = 6
-    st.session_state.computer_dice = []
-    st.session_state.computer_roll_history = []
-    st.session_state.computer_current_roll_score = 0
-    st.session_state.computer_total_turn_score = 0
-    st.session_state.computer_turn_in_progress = False
-    st.session_state.game_history.append({
-        'start_time': datetime.now().strftime("%H:%M:%S"),
-        'player_score': 0,
-        'computer_score': 0
-    })
+    st.session_state.dice_images = DICE_FACES
+    st.session_state.choose_dice = False
+    st.session_state.show_hints = False
+    st.session_state.difficulty = 'normal'
+    st.session_state.player_name = 'Player'
+    st.session_state.room_code = None
+    # Games and the computer's choices draw from one seed per session, so a recorded session replays exactly
+    st.session_state.setdefault('session_seed', random.getrandbits(32))
+    st.session_state.session_rng = random.Random(st.session_state.session_seed)
+    st.session_state.trace = None
+    st.session_state.trace_written = None
+
+# Trained policy written by `python -m farkle.train`
+POLICY_PATH = os.environ.get(
+    'FARKLE_POLICY',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'farkle_policy.npz')
+)
+
+# Finished games, stats and leaderboards
+DB_PATH = os.environ.get(
+    'FARKLE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'farkle.db')
+)
+
+# Per-session memory budget in bytes; older history is dropped beyond it
+SESSION_BUDGET = int(os.environ.get('FARKLE_SESSION_BUDGET', 256 * 1024))
+
+# Sessions idle this many seconds lose everything but their current game
+SESSION_IDLE_SECONDS = float(os.environ.get('FARKLE_SESSION_IDLE', 1800))
+
+# Prometheus metrics: a textfile to rewrite every 15 seconds, and/or a localhost port serving /metrics
+METRICS_FILE = os.environ.get('FARKLE_METRICS_FILE')
+METRICS_PORT = os.environ.get('FARKLE_METRICS_PORT')
+
+# Directory to record each session's actions into, for replay_traces.py
+TRACE_DIR = os.environ.get('FARKLE_TRACE_DIR')
+
+# Pause between reruns while the computer is thinking; 0 turns the animation off
+REFRESH_SECONDS = float(os.environ.get('FARKLE_REFRESH_SECONDS', 0.5))
+
+# How often a room page checks whether anyone in the room has acted
+ROOM_POLL_SECONDS = float(os.environ.get('FARKLE_ROOM_POLL', 0.5))
+
+# Sidebar labels for the computer difficulty tiers
+DIFFICULTIES = dict(zip(DIFFICULTY_LEVELS, ("🐣 Easy", "🙂 Normal", "😈 Hard", "🧠 Expert", "🦊 Adaptive")))
+
+
+@st.cache_resource
+def load_policy() -> Optional[PolicyTable]:
+    """Trained policy table loaded once per process, or None if none is installed"""
+    if not os.path.exists(POLICY_PATH):
+        return None
+    return PolicyTable.load(POLICY_PATH)
+
+
+@st.cache_resource
+def load_hint_tables():
+    """Hint tables for every dice set, loaded (or solved) once per process"""
+    load_tables()
+
+
+@st.cache_resource
+def load_adaptive_tables(dice_set: str):
+    """The Adaptive computer's response tables for a dice set, loaded (or solved) once per process"""
+    load_response_tables((dice_set,))
+
+
+@st.cache_resource
+def get_store() -> GameStore:
+    """Game store shared by every session in the process"""
+    return GameStore(DB_PATH)
+
+
+@st.cache_resource
+def get_rooms() -> RoomRegistry:
+    """Multiplayer rooms shared by every session in the process"""
+    return RoomRegistry()
+
+
+def session_alive(session_id: str) -> bool:
+    """Whether a browser session is still connected; always, outside a Streamlit server"""
+    return not runtime.exists() or runtime.get_instance().is_active_session(session_id)
+
+
+@st.cache_resource
+def get_sessions() -> SessionTracker:
+    """Memory accounting for every session in the process"""
+    return SessionTracker(SESSION_IDLE_SECONDS, is_alive=session_alive, on_evict=get_rooms().leave)
+
 
+@st.cache_resource
+def start_metrics():
+    """Start the metrics exporters once per process, if configured"""
+    metrics.SESSIONS.read = lambda: len(get_sessions().sessions())
+    metrics.start_exporter(METRICS_FILE, int(METRICS_PORT) if METRICS_PORT else None)
+
+
+def markdown_text(text: str) -> str:
+    """Text a player typed, safe to show in markdown: HTML escaped and markdown syntax backslashed"""
+    return re.sub(r'([\\`*_{}\[\]()#+\-.!|~<>])', r'\\\1', html.escape(text))
+
+
+def session_id() -> str:
+    """This browser session's id, which room seats are held by"""
+    return get_script_run_ctx().session_id
+
+
+def enter_room(code: str) -> bool:
+    """Join a room by code, taking a free seat or spectating"""
+    room = get_rooms().get(code)
+    if room is None:
+        return False
+    st.session_state.trace = None  # Room games depend on other sessions, so they cannot be replayed
+    st.session_state.room_code = room.code
+    room.join(session_id(), st.session_state.player_name)
+    st.query_params.clear()
+    st.query_params['room'] = room.code
+    return True
+
+
+def time_rerun():
+    """Record this run's duration in the rerun histogram, once per run"""
+    global rerun_timed
+    if not rerun_timed:
+        rerun_timed = True
+        metrics.RERUN_SECONDS.observe(time.perf_counter() - rerun_started)
+
+
+def rerun():
+    """st.rerun, timing the run it cuts short first"""
+    time_rerun()
+    st.rerun()
+
+
+def new_game():
+    """Start a game seeded from the session"""
+    start_new_game(st.session_state, st.session_state.session_rng.getrandbits(32))
+
+
+def trace_action(action: dict):
+    """Add an action to the session's trace, if one is being recorded"""
+    if st.session_state.trace is not None:
+        st.session_state.trace['actions'].append(action)
+
+
+def button(label: str, key: Optional[str] = None, **kwargs) -> bool:
+    """st.button whose presses are traced"""
+    pressed = st.button(label, key=key, **kwargs)
+    if pressed:
+        trace_action(button_action(label, key))
+    return pressed
+
+
+def trace_widget(key: str):
+    """on_change callback tracing a keyed widget's new value"""
+    trace_action(widget_action(key, st.session_state[key]))
+
+
+def save_trace():
+    """Rewrite the session's trace file when its actions or final state have changed"""
+    trace = st.session_state.trace
+    trace['final'] = trace_state(st.session_state)
+    written = (len(trace['actions']), trace['final'])
+    if written != st.session_state.trace_written:
+        write_trace(os.path.join(TRACE_DIR, f"{trace['seed']:08x}.json"), trace)
+        st.session_state.trace_written = written
+
+
+def record_decision(keep: List[int], bank: bool):
+    """Log the player's keep and bank/roll choice on the current roll, for python -m farkle.analyze"""
+    get_store().record_decision(DecisionRecord(
+        st.session_state.player_name,
+        st.session_state.selected_dice_set,
+        st.session_state.player_score,
+        st.session_state.computer_score,
+        st.session_state.turn_score,
+        ''.join(map(str, st.session_state.dice)),
+        ''.join(map(str, sorted(keep))),
+        bank,
+        time.time()
+    ))
+
+
+def available_difficulties() -> List[str]:
+    """Difficulty tiers playable with the selected dice set"""
+    policy = load_policy()
+    if policy is None or st.session_state.selected_dice_set not in policy.tables:
+        return [level for level in DIFFICULTY_LEVELS if level not in TRAINED_LEVELS]
+    return list(DIFFICULTY_LEVELS)
+
+
+start_metrics()
+
+# Resume a shared game when a fresh session opens a link carrying one
+if 'snapshot_checked' not in st.session_state:
+    st.session_state.snapshot_checked = True
+    if TRACE_DIR:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        st.session_state.trace = new_trace(st.session_state.session_seed, st.query_params.to_dict())
+    if 'room' in st.query_params:
+        enter_room(st.query_params['room'])
+    elif 'g' in st.query_params:
+        try:
+            restore_snapshot(st.session_state, st.query_params['g'])
+            st.session_state.dice_select = st.session_state.selected_dice_set
+        except ValueError:
+            pass
+
+# Save each finished game once; the store writes it in the background
+finished_game = close_game_history(st.session_state)
+if finished_game is not None:
+    get_store().record_game(GameRecord(
+        st.session_state.player_name,
+        f"computer:{st.session_state.difficulty}",
+        finished_game['dice_set'],
+        finished_game['winner'] == 'player',
+        finished_game['player_score'],
+        finished_game['computer_score'],
+        time.time()
+    ))
+
+# Keep this session within its memory budget and let the tracker evict idle ones
+session_usage = metered_trim(st.session_state, SESSION_BUDGET)
+script_ctx = get_script_run_ctx()
+if script_ctx is not None:
+    get_sessions().touch(script_ctx.session_id, script_session_state(script_ctx.session_state),
+                         sum(session_usage.values()))
 
 # Streamlit UI
 st.set_page_config(
@@ -612,12 +555,68 @@ st.markdown('<div class="main-title">🎲 FARKLE 🎲</div>', unsafe_allow_html=
 with st.sidebar:
     st.markdown('<h2 style="color: #FFD700;">🎮 Game Controls</h2>', unsafe_allow_html=True)
 
-    if st.button("🎮 NEW GAME", use_container_width=True, type="primary"):
-        start_new_game()
+    if button("🎮 NEW GAME", use_container_width=True, type="primary"):
+        new_game()
 
-    if st.button("📜 SHOW/HIDE RULES", use_container_width=True):
+    if button("📜 SHOW/HIDE RULES", use_container_width=True):
         st.session_state.show_rules = not st.session_state.show_rules
 
+    st.session_state.player_name = st.text_input(
+        "🧑 Your name",
+        value=st.session_state.player_name,
+        max_chars=24,
+        key="player_name_input",
+        on_change=trace_widget,
+        args=("player_name_input",),
+        help="Finished games are saved under this name for the leaderboard"
+    ).strip() or 'Player'
+
+    st.divider()
+
+    st.markdown('<h2 style="color: #FFD700;">👥 Play With Friends</h2>', unsafe_allow_html=True)
+    if st.session_state.room_code:
+        st.caption(f"🔗 In room **{st.session_state.room_code}** — share this page's link to invite others.")
+        if st.button("🚪 LEAVE ROOM", use_container_width=True):
+            room = get_rooms().get(st.session_state.room_code)
+            if room is not None:
+                room.leave(session_id())
+            st.session_state.room_code = None
+            st.query_params.clear()
+            rerun()
+    else:
+        if st.button("➕ CREATE ROOM", use_container_width=True):
+            enter_room(get_rooms().create(st.session_state.selected_dice_set).code)
+            rerun()
+        join_code = st.text_input("Room code", max_chars=4, key="room_code_input")
+        if st.button("🚪 JOIN ROOM", use_container_width=True, disabled=not join_code.strip()):
+            if enter_room(join_code):
+                rerun()
+            st.error(f"No room {join_code.strip().upper()} here.")
+
+    if st.session_state.game_state != 'setup':
+        st.caption("🔗 This page's link saves your game — bookmark or share it to resume later.")
+
+    timeline = st.session_state.timeline
+    if len(timeline) > 1:
+        with st.expander(f"⏪ REPLAY ({len(timeline)} steps)"):
+            step = st.slider("Step", 1, len(timeline), value=len(timeline), key="replay_step",
+                             on_change=trace_widget, args=("replay_step",))
+            snapshot = unpack_game_state(timeline[step - 1])
+            computer_to_play = snapshot['current_player'] == 'computer'
+            shown_dice = snapshot['computer_dice'] if computer_to_play else snapshot['dice']
+            st.markdown(
+                f"**{'🤖 Computer' if computer_to_play else '🧑 Player'} to play**"
+                f"{' · game over' if snapshot['game_state'] == 'game_over' else ''}\n\n"
+                f"🧑 {snapshot['player_score']} · 🤖 {snapshot['computer_score']}\n\n"
+                f"Turn: {snapshot['computer_total_turn_score'] if computer_to_play else snapshot['turn_score']} pts · "
+                f"Dice: {''.join(st.session_state.dice_images[d] for d in shown_dice) or '—'} · "
+                f"{snapshot['remaining_dice']} to roll"
+            )
+            if step < len(timeline) and button("⏮️ RESUME FROM HERE", use_container_width=True):
+                load_snapshot(st.session_state, snapshot)
+                timeline.truncate(step)
+                rerun()
+
     st.divider()
 
     st.markdown('<h2 style="color: #FFD700;">🎲 Dice Selection</h2>', unsafe_allow_html=True)
@@ -625,9 +624,48 @@ with st.sidebar:
         "Choose your dice set:",
         options=list(DICE_SETS.keys()),
         format_func=lambda x: x.title(),
-        key="dice_select"
+        key="dice_select",
+        on_change=trace_widget,
+        args=("dice_select",)
     )
     st.session_state.selected_dice_set = dice_set_option
+    difficulties = available_difficulties()
+    if len(difficulties) > 1:
+        st.session_state.difficulty = st.selectbox(
+            "Computer difficulty:",
+            options=difficulties,
+            index=difficulties.index('normal'),
+            format_func=DIFFICULTIES.get,
+            key="difficulty_select",
+            on_change=trace_widget,
+            args=("difficulty_select",)
+        )
+    else:
+        st.session_state.difficulty = 'normal'
+    if st.session_state.difficulty == 'adaptive':
+        with st.spinner("🦊 Loading adaptive tables..."):
+            load_adaptive_tables(dice_set_option)
+        thresholds = ' · '.join(map(str, st.session_state.opponent_model.thresholds()))
+        st.caption(f"🦊 Reads your bank points with 1-6 dice left as {thresholds}, "
+                   f"from {st.session_state.opponent_model.decisions} decisions")
+
+    st.session_state.choose_dice = st.checkbox(
+        "🖐️ Choose which dice to keep",
+        key="choose_dice_select",
+        on_change=trace_widget,
+        args=("choose_dice_select",),
+        help="Tap dice to build your own keep instead of taking every scoring die"
+    )
+    st.session_state.show_hints = st.checkbox(
+        "💡 Show hints",
+        key="show_hints_select",
+        on_change=trace_widget,
+        args=("show_hints_select",),
+        help="Suggest the keep and whether to bank, from the optimal-play tables"
+    )
+    if st.session_state.show_hints:
+        with st.spinner("💡 Loading hint tables..."):
+            load_hint_tables()
 
     # Dice set descriptions with better contrast
     dice_descriptions = {
@@ -635,7 +673,8 @@ with st.sidebar:
         'lucky': "🍀 More 1s and 5s (easier scoring)",
         'odd': "🎭 More 3s and 4s (better for triples)",
         'heavenly': "👑 Only 1, 5, 6 (no 2, 3, 4)",
-        'loaded': "🎯 High numbers favored (more 5s, 6s)"
+        'loaded': "🎯 High numbers favored (more 5s, 6s)",
+        **{name: entry['description'] for name, entry in designed_dice_sets().items()},
     }
 
     st.markdown(f"""
@@ -653,6 +692,30 @@ with st.sidebar:
 
     st.divider()
 
+    st.markdown('<h2 style="color: #FFD700;">🏆 Leaderboard</h2>', unsafe_allow_html=True)
+    store = get_store()
+    leaders = store.leaderboard(dice_set_option)
+    if leaders:
+        rows = "\n".join(
+            f"| {rank} | {markdown_text(stats.player)} | {stats.wins} | {stats.games} | {stats.win_rate:.0%} | {stats.best_score} |"
+            for rank, stats in enumerate(leaders, 1)
+        )
+        st.markdown(f"| # | Player | Wins | Games | Win % | Best |\n|---|---|---|---|---|---|\n{rows}")
+    else:
+        st.caption(f"No finished {dice_set_option.title()} games yet.")
+    my_stats = store.player_stats(st.session_state.player_name)
+    if my_stats.games:
+        st.caption(f"{markdown_text(my_stats.player)}: {my_stats.wins} wins in {my_stats.games} games "
+                   f"({my_stats.win_rate:.0%}), best {my_stats.best_score}")
+
+    with st.expander(f"🧠 MEMORY ({sum(session_usage.values()) / 1024:.1f} KiB)"):
+        st.markdown("\n".join(f"- `{key}`: {nbytes:,} B" for key, nbytes in list(session_usage.items())[:8]))
+        sessions = get_sessions().sessions()
+        st.caption(f"{len(sessions)} sessions in this process, {sum(s.nbytes for s in sessions) / 1024:.1f} KiB "
+                   f"in all · budget {SESSION_BUDGET // 1024} KiB each")
+
+    st.divider()
+
     st.markdown(
         '<h2 style="color: #FFD700; background: #000000; padding: 10px; border-radius: 8px; border: 3px solid #FFD700;">📊 SCORING RULES</h2>',
         unsafe_allow_html=True)
@@ -787,6 +850,97 @@ with st.sidebar:
     st.markdown('<h3 style="color: #FFD700; text-align: center;">🎯 FIRST TO 10 000 POINTS WINS! 🏆</h3>',
                 unsafe_allow_html=True)
 
+
+
+def room_action(action, *args):
+    """Button callback for a room move; runs before the rerun so the board shows its result"""
+    try:
+        action(*args)
+    except ValueError as e:
+        st.session_state.room_error = str(e)
+
+
+def room_board():
+    """Shared room view, redrawn only when someone in the room acts"""
+    room = get_rooms().get(st.session_state.room_code)
+    if room is None:
+        st.error("🚪 This room has closed. Leave it from the sidebar to start another.")
+        return
+    view = room.view()
+    seat = room.seat(session_id())  # Asked each run: the seat goes once this session leaves or idles out
+
+    st.markdown(f'<h2 style="color: #FFD700; text-align: center;">👥 ROOM {view.code} · {view.dice_set.title()} Dice</h2>',
+                unsafe_allow_html=True)
+    if seat is None:
+        st.info("👀 You are spectating this room.")
+    if st.session_state.get('room_error'):
+        st.warning(markdown_text(st.session_state.pop('room_error')))
+
+    if view.players:
+        for col, (i, name) in zip(st.columns(len(view.players)), enumerate(view.players)):
+            with col:
+                playing = view.started and view.winner is None and i == view.current
+                st.markdown(f'<div class="score-card {"player-turn" if playing else ""}">', unsafe_allow_html=True)
+                st.markdown(f'<h3 style="color: #0000FF;">🧑 {html.escape(name)}{" (you)" if i == seat else ""}{"" if view.seated[i] else " (left)"}</h3>',
+                            unsafe_allow_html=True)
+                st.markdown(f'<h1 style="color: #0000FF; font-size: 3em;">{view.scores[i]}</h1>', unsafe_allow_html=True)
+                if playing:
+                    st.markdown(
+                        f'<h4 style="color: #00008B;">🎯 Current Turn: <span style="color: #FF0000;">{view.turn_score}</span> points</h4>',
+                        unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+
+    if not view.started or view.winner is not None:
+        if view.winner is not None:
+            st.markdown(f'<h1 style="color: #0000FF; text-align: center;">🏆 {html.escape(view.players[view.winner])} WINS! 🏆</h1>',
+                        unsafe_allow_html=True)
+        else:
+            st.markdown(f"Waiting for players ({sum(view.seated)}/{MAX_ROOM_PLAYERS} seated)...")
+        if seat is not None:
+            st.button("🚀 START GAME" if not view.started else "🔄 PLAY AGAIN", use_container_width=True,
+                      type="primary", disabled=sum(view.seated) < 2, on_click=room_action, args=(room.start,))
+    else:
+        if view.dice:
+            roll = f"{view.current}:{view.turn_score}:{view.remaining_dice}"  # Changes with every roll, not every join
+            dice_board(board_state(ROOM, view.dice, roll, view.roll_points, "ON THIS ROLL"), key='room_board')
+
+        if seat == view.current:
+            if not view.dice:
+                st.button(f"🎲 ROLL {view.remaining_dice} DICE!", use_container_width=True, type="primary",
+                          on_click=room_action, args=(room.roll, seat))
+            else:
+                col_a, col_b = st.columns(2)
+                with col_a:
+                    st.button("✅ BANK POINTS", use_container_width=True, type="secondary",
+                              on_click=room_action, args=(room.bank, seat))
+                with col_b:
+                    st.button("🎯 KEEP SCORING DICE", use_container_width=True,
+                              on_click=room_action, args=(room.keep, seat))
+        else:
+            st.markdown(f"⏳ Waiting for **{markdown_text(view.players[view.current])}**...")
+
+    if view.history:
+        history_box = '<div class="history-box">'
+        for entry in reversed(view.history[-12:]):
+            history_box += f'<div class="roll-history-item"><span style="color: #0000FF; font-weight: bold;">{html.escape(entry)}</span></div>'
+        history_box += '</div>'
+        st.markdown(history_box, unsafe_allow_html=True)
+
+    watch_room(room, view.version)
+    time_rerun()
+
+
+@st.fragment(run_every=ROOM_POLL_SECONDS)
+def watch_room(room: Room, version: int):
+    """Rerun the page once the room moves past version; only this check runs every ROOM_POLL_SECONDS"""
+    if room.version != version:
+        rerun()
+
+
+if st.session_state.room_code:
+    room_board()
+    st.stop()
+
 # Main game area
 col1, col2 = st.columns([2, 1])
 
@@ -819,12 +973,15 @@ with col1:
         </div>
         """, unsafe_allow_html=True)
 
-        if st.button("🚀 START PLAYING NOW!", use_container_width=True, type="primary"):
-            start_new_game()
+        if button("🚀 START PLAYING NOW!", use_container_width=True, type="primary"):
+            new_game()
+            rerun()
 
     elif st.session_state.game_state == 'playing':
         # Score display
         score_col1, score_col2 = st.columns(2)
+        with st.spinner("🎲 Computing win probabilities..."):
+            player_chance, computer_chance = win_chances(st.session_state)
 
         with score_col1:
             turn_class = "player-turn" if st.session_state.current_player == 'player' else ""
@@ -836,6 +993,11 @@ with col1:
                 st.markdown(
                     f'<h4 style="color: #00008B;">🎯 Current Turn: <span style="color: #FF0000;">{st.session_state.turn_score}</span> points</h4>',
                     unsafe_allow_html=True)
+                reach = reach_chance(st.session_state)
+                if reach is not None:
+                    st.markdown(f'<h4 style="color: #00008B;">🏁 Reach {TARGET_SCORE:,} This Turn: {reach:.0%}</h4>',
+                                unsafe_allow_html=True)
+            st.markdown(f'<h4 style="color: #00008B;">🏆 Win Chance: {player_chance:.0%}</h4>', unsafe_allow_html=True)
             st.markdown("</div>", unsafe_allow_html=True)
 
         with score_col2:
@@ -848,6 +1010,7 @@ with col1:
                 st.markdown(
                     f'<h4 style="color: #8B0000;">🎯 Current Turn: <span style="color: #0000FF;">{st.session_state.computer_total_turn_score}</span> points</h4>',
                     unsafe_allow_html=True)
+            st.markdown(f'<h4 style="color: #8B0000;">🏆 Win Chance: {computer_chance:.0%}</h4>', unsafe_allow_html=True)
             st.markdown("</div>", unsafe_allow_html=True)
 
         st.divider()
@@ -859,129 +1022,87 @@ with col1:
 
             if st.session_state.remaining_dice > 0 and not st.session_state.dice:
                 # First roll of turn
-                if st.button("🎲 ROLL DICE!", use_container_width=True, type="primary"):
-                    st.session_state.dice = roll_dice(
-                        st.session_state.remaining_dice,
-                        st.session_state.selected_dice_set
-                    )
-
-                    # Check for Farkle
-                    if not can_score(st.session_state.dice):
-                        st.session_state.turn_history.append(
-                            f"🎯 PLAYER FARKLED! Lost {st.session_state.turn_score} points."
-                        )
-                        st.session_state.turn_score = 0
-                        st.session_state.current_player = 'computer'
-                        reset_computer_turn()
-                        st.rerun()
+                if button("🎲 ROLL DICE!", use_container_width=True, type="primary"):
+                    player_roll(st.session_state)  # A farkle passes the turn to the computer
+                    rerun()
 
             elif st.session_state.dice:
-                # Display current dice with high contrast
-                st.markdown(f'<div class="dice-roll-label player-roll-label">🎲 YOUR DICE ROLL 🎲</div>',
-                            unsafe_allow_html=True)
-
-                # Create individual dice characters with high contrast
-                dice_html = '<div class="dice-display player-dice-display">'
-                for d in st.session_state.dice:
-                    dice_class = f"dice-{d}"
-                    dice_html += f'<span class="dice-character {dice_class}">{st.session_state.dice_images[d]}</span>'
-                dice_html += '</div>'
-                st.markdown(dice_html, unsafe_allow_html=True)
-
                 # Calculate scoring options
                 score, scoring_info = calculate_score(st.session_state.dice)
 
                 if score > 0:
-                    st.markdown(f'''
-                    <div class="roll-score-display player-score-display">
-                    🎯 AVAILABLE SCORE: <span style="color: #FF0000; font-size: 1.2em;">{score}</span> POINTS 🎯
-                    </div>
-                    ''', unsafe_allow_html=True)
-
-                    # Show scoring breakdown with high contrast
-                    st.markdown('<div class="scoring-breakdown">', unsafe_allow_html=True)
-                    st.markdown(
-                        '<h4 style="color: #000000; text-align: center; border-bottom: 3px solid #0000FF; padding-bottom: 10px;">📊 SCORING BREAKDOWN</h4>',
-                        unsafe_allow_html=True)
-
-                    for combo in scoring_info:
-                        dice_str = " ".join([st.session_state.dice_images[d] for d in combo['dice']])
-                        # Color-code based on points
-                        if combo['points'] >= 1000:
-                            border_color = "#FF0000"
-                            bg_color = "#FFF0F0"
-                        elif combo['points'] >= 500:
-                            border_color = "#FF8C00"
-                            bg_color = "#FFF8F0"
-                        else:
-                            border_color = "#0000FF"
-                            bg_color = "#F0F8FF"
-
-                        st.markdown(f'''
-                        <div class="scoring-item" style="border-left-color: {border_color}; background: {bg_color};">
-                        <div class="scoring-dice" style="color: {border_color};">{dice_str}</div>
-                        <div style="display: flex; justify-content: space-between; align-items: center;">
-                            <span style="color: #000000; font-weight: bold; font-size: 1.1em;">{combo['rule'].upper()}</span>
-                            <span style="color: {border_color}; font-weight: bold; font-size: 1.3em; background: #FFFFFF; padding: 5px 15px; border-radius: 5px; border: 2px solid {border_color};">{combo['points']} pts</span>
-                        </div>
-                        </div>
-                        ''', unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
+                    if st.session_state.choose_dice:
+                        # Validity and points of the selected keep come from the roll's index
+                        keep_points = st.session_state.keep_index[st.session_state.keep_mask]
+                        keep_dice = [d for i, d in enumerate(st.session_state.dice)
+                                     if st.session_state.keep_mask >> i & 1]
+                        keep_count = len(keep_dice)
+                        keep_label = "SELECTED SCORE" if keep_points else "SELECT SCORING DICE"
+                    else:
+                        keep_points = score
+                        keep_dice = [d for combo in scoring_info for d in combo.dice]
+                        keep_count = len(keep_dice)
+                        keep_label = "AVAILABLE SCORE"
+
+                    # Dice, score and breakdown are drawn in the browser from a compact state
+                    dice_board(board_state(
+                        PLAYER, st.session_state.dice, st.session_state.rng_position, keep_points, keep_label,
+                        scoring_info, st.session_state.keep_mask if st.session_state.choose_dice else 0
+                    ), key='player_board')
+
+                    if st.session_state.choose_dice:
+                        # Toggle dice in and out of the keep
+                        dice_cols = st.columns(len(st.session_state.dice))
+                        for i, d in enumerate(st.session_state.dice):
+                            selected = st.session_state.keep_mask >> i & 1
+                            with dice_cols[i]:
+                                if button(f"{st.session_state.dice_images[d]}{' ✔' if selected else ''}",
+                                             key=f"keep_die_{i}", use_container_width=True,
+                                             type="primary" if selected else "secondary"):
+                                    st.session_state.keep_mask ^= 1 << i
+                                    rerun()
+
+                    hint = player_hint(st.session_state) if st.session_state.show_hints else None
+                    if hint is not None:
+                        keep_faces = "".join(st.session_state.dice_images[d] for d in hint.keep)
+                        needs_choice = len(hint.keep) != keep_count and not st.session_state.choose_dice
+                        st.info(
+                            f"Keep {keep_faces} ({hint.points} pts) and "
+                            f"{'**BANK**' if hint.bank else '**ROLL ON**'}: {hint.win_chance:.0%} to win, "
+                            f"{hint.margin:+.1%} over {'rolling on' if hint.bank else 'banking'}"
+                            f"{' — tick 🖐️ Choose which dice to keep' if needs_choice else ''}",
+                            icon="💡"
+                        )
 
                     col_a, col_b, col_c = st.columns(3)
 
                     with col_a:
-                        if st.button("✅ BANK POINTS", use_container_width=True, type="secondary"):
-                            st.session_state.player_score += st.session_state.turn_score + score
-                            st.session_state.turn_history.append(
-                                f"🏦 PLAYER BANKED {st.session_state.turn_score + score} POINTS"
-                            )
-
-                            # Check win condition
-                            if st.session_state.player_score >= 10000:
-                                st.session_state.game_state = 'game_over'
-                                st.session_state.turn_history.append("🎉 🎉 PLAYER WINS THE GAME! 🎉 🎉")
-                            else:
-                                st.session_state.current_player = 'computer'
-                                reset_computer_turn()
-                            reset_turn()
-                            st.rerun()
+                        if button("✅ BANK POINTS", use_container_width=True, type="secondary",
+                                     disabled=not keep_points):
+                            record_decision(keep_dice, True)
+                            player_bank(st.session_state, keep_dice, keep_points)
+                            rerun()
 
                     with col_b:
-                        if st.button("🎯 KEEP SCORING DICE", use_container_width=True):
-                            st.session_state.kept_dice.extend(st.session_state.dice)
-                            st.session_state.turn_score += score
-
-                            # Count scoring dice for hot dice
-                            scoring_dice_count = 0
-                            for combo in scoring_info:
-                                scoring_dice_count += len(combo['dice'])
-
-                            st.session_state.remaining_dice -= scoring_dice_count
-
-                            if st.session_state.remaining_dice == 0:  # Hot dice
-                                st.session_state.remaining_dice = 6
-                                st.session_state.turn_history.append("🔥 🔥 HOT DICE! Roll all 6 again! 🔥")
-
-                            st.session_state.dice = []
-                            st.rerun()
+                        keep_button = "🎯 KEEP SELECTED DICE" if st.session_state.choose_dice else "🎯 KEEP SCORING DICE"
+                        if button(keep_button, use_container_width=True, disabled=not keep_points):
+                            record_decision(keep_dice, False)
+                            player_keep(st.session_state, keep_dice, keep_points)  # Kept dice count toward hot dice
+                            rerun()
 
                     with col_c:
-                        if st.button("🔄 RE-ROLL REMAINING", use_container_width=True):
+                        if button("🔄 RE-ROLL REMAINING", use_container_width=True):
                             st.session_state.dice = []
-                            st.rerun()
+                            rerun()
 
                 else:
+                    dice_board(board_state(PLAYER, st.session_state.dice, st.session_state.rng_position),
+                               key='player_board')
                     st.error("❌ NO SCORING DICE AVAILABLE!")
-                    if st.button("❌ END TURN (FARKLE)", use_container_width=True):
-                        st.session_state.turn_history.append(
-                            f"🎯 PLAYER FARKLED! Lost {st.session_state.turn_score} points."
-                        )
-                        st.session_state.turn_score = 0
-                        st.session_state.current_player = 'computer'
-                        reset_computer_turn()
-                        reset_turn()
-                        st.rerun()
+                    if button("❌ END TURN (FARKLE)", use_container_width=True):
+                        player_farkle(st.session_state)
+                        reset_turn(st.session_state)
+                        rerun()
 
         else:
             # Computer's turn
@@ -990,56 +1111,13 @@ with col1:
 
             # Show current computer dice if any
             if st.session_state.computer_dice:
-                st.markdown(f'<div class="dice-roll-label computer-roll-label">🤖 COMPUTER\'S DICE ROLL 🤖</div>',
-                            unsafe_allow_html=True)
-
-                # Create individual dice characters with high contrast
-                dice_html = '<div class="dice-display computer-dice-display">'
-                for d in st.session_state.computer_dice:
-                    dice_class = f"dice-{d}"
-                    dice_html += f'<span class="dice-character {dice_class}">{st.session_state.dice_images[d]}</span>'
-                dice_html += '</div>'
-                st.markdown(dice_html, unsafe_allow_html=True)
-
-                # Show score for current roll
-                if st.session_state.computer_current_roll_score > 0:
-                    score, scoring_info = calculate_score(st.session_state.computer_dice)
-                    st.markdown(f'''
-                    <div class="roll-score-display computer-score-display">
-                    🤖 COMPUTER SCORED: <span style="color: #000000; font-size: 1.2em;">{score}</span> POINTS 🤖
-                    </div>
-                    ''', unsafe_allow_html=True)
-
-                    # Show scoring combinations with high contrast
-                    if scoring_info:
-                        st.markdown('<div class="scoring-breakdown">', unsafe_allow_html=True)
-                        st.markdown(
-                            '<h4 style="color: #000000; text-align: center; border-bottom: 3px solid #FF0000; padding-bottom: 10px;">🤖 COMPUTER\'S SCORING</h4>',
-                            unsafe_allow_html=True)
-
-                        for combo in scoring_info:
-                            dice_str = " ".join([st.session_state.dice_images[d] for d in combo['dice']])
-                            # Color-code based on points
-                            if combo['points'] >= 1000:
-                                border_color = "#FF0000"
-                                bg_color = "#FFF0F0"
-                            elif combo['points'] >= 500:
-                                border_color = "#FF8C00"
-                                bg_color = "#FFF8F0"
-                            else:
-                                border_color = "#8B0000"
-                                bg_color = "#F8F0F0"
-
-                            st.markdown(f'''
-                            <div class="scoring-item" style="border-left-color: {border_color}; background: {bg_color};">
-                            <div class="scoring-dice" style="color: {border_color};">{dice_str}</div>
-                            <div style="display: flex; justify-content: space-between; align-items: center;">
-                                <span style="color: #000000; font-weight: bold; font-size: 1.1em;">{combo['rule'].upper()}</span>
-                                <span style="color: {border_color}; font-weight: bold; font-size: 1.3em; background: #FFFFFF; padding: 5px 15px; border-radius: 5px; border: 2px solid {border_color};">{combo['points']} pts</span>
-                            </div>
-                            </div>
-                            ''', unsafe_allow_html=True)
-                        st.markdown('</div>', unsafe_allow_html=True)
+                last_roll = st.session_state.computer_roll_history[-1] if st.session_state.computer_roll_history else None
+                scored = st.session_state.computer_current_roll_score > 0 and last_roll is not None
+                dice_board(board_state(
+                    COMPUTER, st.session_state.computer_dice, st.session_state.rng_position,
+                    last_roll.score if scored else 0, "COMPUTER SCORED" if scored else None,
+                    last_roll.scoring_info if scored else ()
+                ), key='computer_board')
 
             # Show thinking/status
             if st.session_state.computer_turn_in_progress:
@@ -1047,18 +1125,19 @@ with col1:
 
                 col_a, col_b, col_c = st.columns(3)
                 with col_b:
-                    if st.button("🎲 COMPUTER ROLLS", use_container_width=True, type="primary"):
-                        continue_turn = computer_turn_step()
+                    if button("🎲 COMPUTER ROLLS", use_container_width=True, type="primary"):
+                        continue_turn = computer_turn_step(st.session_state, load_policy(), st.session_state.difficulty,
+                                                           st.session_state.session_rng)
                         if not continue_turn:
                             # Computer's turn ended
                             st.session_state.current_player = 'player'
-                            reset_turn()
-                        st.rerun()
+                            reset_turn(st.session_state)
+                        rerun()
             else:
                 # Start computer turn
-                if st.button("🤖 START COMPUTER TURN", use_container_width=True, type="secondary"):
+                if button("🤖 START COMPUTER TURN", use_container_width=True, type="secondary"):
                     st.session_state.computer_turn_in_progress = True
-                    st.rerun()
+                    rerun()
 
             # Show computer roll history
             if st.session_state.computer_roll_history:
@@ -1068,11 +1147,11 @@ with col1:
 
                 for i, roll in enumerate(st.session_state.computer_roll_history, 1):
                     # Create a high contrast card for each roll
-                    with st.expander(f"🎲 ROLL #{i}: {roll['score']} POINTS ({roll['remaining_dice']} dice remaining)",
+                    with st.expander(f"🎲 ROLL #{i}: {roll.score} POINTS ({roll.remaining_dice} dice remaining)",
                                      expanded=False):
                         # Display dice with high contrast
                         dice_html = '<div style="background: #000000; padding: 15px; border-radius: 10px; border: 3px solid #FFD700; margin: 10px 0; text-align: center;">'
-                        for d in roll['dice']:
+                        for d in roll.dice:
                             dice_class = f"dice-{d}"
                             dice_html += f'<span class="dice-character {dice_class}" style="margin: 5px;">{st.session_state.dice_images[d]}</span>'
                         dice_html += '</div>'
@@ -1089,17 +1168,17 @@ with col1:
                             text-align: center;
                         ">
                         <span style="color: #000000; font-weight: bold; font-size: 1.2em;">SCORE:</span>
-                        <span style="color: #FF0000; font-weight: bold; font-size: 1.5em; margin-left: 10px;">{roll['score']} POINTS</span>
+                        <span style="color: #FF0000; font-weight: bold; font-size: 1.5em; margin-left: 10px;">{roll.score} POINTS</span>
                         </div>
                         ''', unsafe_allow_html=True)
 
                         # Display scoring combinations
-                        if roll['scoring_info']:
+                        if roll.scoring_info:
                             st.markdown(
                                 '<h5 style="color: #000000; border-bottom: 2px solid #0000FF; padding-bottom: 5px;">🎯 SCORING COMBINATIONS:</h5>',
                                 unsafe_allow_html=True)
-                            for combo in roll['scoring_info']:
-                                dice_str = " ".join([st.session_state.dice_images[d] for d in combo['dice']])
+                            for combo in roll.scoring_info:
+                                dice_str = " ".join([st.session_state.dice_images[d] for d in combo.dice])
                                 st.markdown(f'''
                                 <div style="
                                     background: #FFFFFF;
@@ -1111,8 +1190,8 @@ with col1:
                                 ">
                                 <div style="color: #000000; font-weight: bold;">🎲 {dice_str}</div>
                                 <div style="display: flex; justify-content: space-between; margin-top: 5px;">
-                                    <span style="color: #000000;">{combo['rule']}</span>
-                                    <span style="color: #FF0000; font-weight: bold;">{combo['points']} pts</span>
+                                    <span style="color: #000000;">{combo.rule}</span>
+                                    <span style="color: #FF0000; font-weight: bold;">{combo.points} pts</span>
                                 </div>
                                 </div>
                                 ''', unsafe_allow_html=True)
@@ -1121,7 +1200,7 @@ with col1:
         st.balloons()
 
         # FIX: Changed from 1000 to 10000 for win condition
-        winner = "PLAYER" if st.session_state.player_score >= 10000 else "COMPUTER"
+        winner = "PLAYER" if st.session_state.player_score >= TARGET_SCORE else "COMPUTER"
         winner_color = "#0000FF" if winner == "PLAYER" else "#FF0000"
 
         st.markdown(f'<h1 style="color: {winner_color}; text-align: center; font-size: 4em;">🏆 {winner} WINS! 🏆</h1>',
@@ -1153,7 +1232,7 @@ with col1:
             for i, roll in enumerate(st.session_state.computer_roll_history, 1):
                 # High contrast dice display
                 dice_html = '<div style="background: #000000; padding: 20px; border-radius: 12px; border: 4px solid #FFD700; margin: 15px 0; text-align: center;">'
-                for d in roll['dice']:
+                for d in roll.dice:
                     dice_class = f"dice-{d}"
                     dice_html += f'<span class="dice-character {dice_class}" style="margin: 8px;">{st.session_state.dice_images[d]}</span>'
                 dice_html += '</div>'
@@ -1173,16 +1252,17 @@ with col1:
                     <strong>🎲 ROLL #{i}</strong>
                 </div>
                 <div style="display: flex; justify-content: space-between; align-items: center; padding: 0 20px;">
-                    <div style="color: #000000; font-size: 1.1em;">Dice: {roll['remaining_dice']} remaining</div>
+                    <div style="color: #000000; font-size: 1.1em;">Dice: {roll.remaining_dice} remaining</div>
                     <div style="color: #FF0000; font-weight: bold; font-size: 1.8em; background: #FFFFFF; padding: 8px 20px; border-radius: 8px; border: 3px solid #FF0000;">
-                        {roll['score']} POINTS
+                        {roll.score} POINTS
                     </div>
                 </div>
                 </div>
                 ''', unsafe_allow_html=True)
 
-        if st.button("🔄 PLAY AGAIN", use_container_width=True, type="primary"):
-            start_new_game()
+        if button("🔄 PLAY AGAIN", use_container_width=True, type="primary"):
+            new_game()
+            rerun()
 
 with col2:
     st.markdown('<h3 style="color: #8B0000;">📜 TURN HISTORY</h3>', unsafe_allow_html=True)
@@ -1223,13 +1303,13 @@ with col2:
         if st.session_state.current_player == 'player':
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
             st.metric("🎯 PLAYER'S TURN", "YOUR MOVE!", delta=None)
-            st.metric("🏆 POINTS NEEDED", 10000 - st.session_state.player_score,
+            st.metric("🏆 POINTS NEEDED", TARGET_SCORE - st.session_state.player_score,
                       delta_color="normal")
             st.markdown('</div>', unsafe_allow_html=True)
         else:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
             st.metric("🤖 COMPUTER'S TURN", "WATCHING...", delta=None)
-            st.metric("🏆 COMPUTER NEEDS", 10000 - st.session_state.computer_score,
+            st.metric("🏆 COMPUTER NEEDS", TARGET_SCORE - st.session_state.computer_score,
                       delta_color="inverse")
             st.markdown('</div>', unsafe_allow_html=True)
 
@@ -1301,7 +1381,19 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# Record the step for replay and keep the URL in sync so the page link always resumes the current game
+if st.session_state.game_state != 'setup':
+    record_step(st.session_state)
+    snapshot_token = encode_snapshot(st.session_state)
+    if st.query_params.get('g') != snapshot_token:
+        st.query_params['g'] = snapshot_token
+
+if st.session_state.trace is not None:
+    save_trace()
+
+time_rerun()
+
 # Auto-refresh during computer turn for animation effect
-if st.session_state.computer_turn_in_progress:
-    time.sleep(0.5)
-    st.rerun()
\ No newline at end of file
+if st.session_state.computer_turn_in_progress and REFRESH_SECONDS > 0:
+    time.sleep(REFRESH_SECONDS)
+    rerun()
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Browser-side dice board: dice, roll animation, roll score and scoring breakdown.
+
+The page is static and loaded once per session; on each rerun the server sends
+only a compact state (dice as digits, breakdown rule ids, points) and the board
+redraws itself in the browser, instead of the server re-rendering styled HTML
+for every die and combination. Dice tumble only when a new roll comes in.
+"""
+import os
+from typing import Iterable, Optional, Union
+
+import streamlit.components.v1 as components
+
+from farkle.scoring import SCORING_RULES, ScoringCombo
+
+# Board styles, in the order of the page's SIDES
+PLAYER, COMPUTER, ROOM = range(3)
+
+# Score line labels, in the order of the page's LABELS
+LABELS = ('AVAILABLE SCORE', 'SELECTED SCORE', 'SELECT SCORING DICE', 'COMPUTER SCORED', 'ON THIS ROLL')
+
+RULE_IDS = {rule: i for i, rule in enumerate(SCORING_RULES)}
+
+_component = components.declare_component(
+    'dice_board', path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend')
+)
+
+
+def board_state(side: int, dice: Iterable[int], roll: Union[int, str], points: int = 0, label: Optional[str] = None,
+                breakdown: Iterable[ScoringCombo] = (), kept_mask: int = 0) -> dict:
+    """
+    Compact board payload. roll identifies the roll (e.g. the RNG position), so
+    the dice only animate when it changes; label is one of LABELS, or None for no score line.
+    """
+    return {
+        's': side,
+        'd': ''.join(map(str, dice)),
+        'n': roll,
+        'p': points,
+        'l': None if label is None else LABELS.index(label),
+        # Of-a-kind combos are named like 'four_of_a_kind (5s)'; the page adds the face back from the dice
+        'b': [[RULE_IDS[combo.rule.split(' (')[0]], ''.join(map(str, combo.dice)), combo.points]
+              for combo in breakdown],
+        'm': kept_mask,
+    }
+
+
+def dice_board(state: dict, key: str):
+    """Draw the board; a stable key keeps the same page across reruns so only the state is sent"""
+    _component(state=state, key=key, default=None)
@@ -0,0 +1,115 @@
+"""
+Streamlit-free Farkle game engine: dice, scoring, the computer player, game state
+and the precomputed tables behind them.
+
+Names are loaded from their submodules on first access, so `import farkle` is
+nearly free and NumPy is only imported by the table-backed parts (policy,
+wintable, hints, analyze, design, distribution).
+"""
+import importlib
+
+_EXPORTS = {
+    # Dice and scoring
+    'DICE_FACES': 'scoring',
+    'DICE_SETS': 'scoring',
+    'SCORING_RULES': 'scoring',
+    'TARGET_SCORE': 'scoring',
+    'NUM_DICE': 'scoring',
+    'ScoringCombo': 'scoring',
+    'RollRecord': 'scoring',
+    'build_keep_index': 'scoring',
+    'calculate_score': 'scoring',
+    'can_score': 'scoring',
+    'legal_keeps': 'scoring',
+    'roll_dice': 'scoring',
+    'roll_outcomes': 'scoring',
+    'roll_multisets': 'scoring',
+    'farkle_probability': 'scoring',
+    'register_dice_set': 'scoring',
+    'designed_dice_sets': 'scoring',
+    # Game state
+    'new_game_state': 'state',
+    'start_new_game': 'state',
+    'reset_turn': 'state',
+    'reset_computer_turn': 'state',
+    'roll_turn_dice': 'state',
+    'player_roll': 'state',
+    'player_keep': 'state',
+    'player_bank': 'state',
+    'player_farkle': 'state',
+    'pack_game_state': 'state',
+    'unpack_game_state': 'state',
+    'encode_snapshot': 'state',
+    'decode_snapshot': 'state',
+    'restore_snapshot': 'state',
+    'load_snapshot': 'state',
+    'record_step': 'state',
+    'Timeline': 'timeline',
+    'open_game_history': 'state',
+    'close_game_history': 'state',
+    # Recorded sessions
+    'new_trace': 'trace',
+    'load_trace': 'trace',
+    'trace_state': 'trace',
+    # Computer player
+    'DIFFICULTY_LEVELS': 'ai',
+    'HeuristicParams': 'ai',
+    'Decision': 'ai',
+    'computer_turn_step': 'ai',
+    'heuristic_should_continue': 'ai',
+    'parse_strategy': 'ai',
+    'endgame_strategy': 'ai',
+    'response_strategy': 'ai',
+    'OpponentModel': 'opponent',
+    'reach_chance': 'endgame',
+    'reach_probability': 'endgame',
+    # Headless simulation
+    'play_game': 'simulate',
+    'play_turn': 'simulate',
+    'RunningStats': 'stats',
+    # Shared multiplayer rooms
+    'Room': 'rooms',
+    'RoomRegistry': 'rooms',
+    # HTTP/JSON engine API
+    'GameRegistry': 'server',
+    # Stored games and leaderboards
+    'GameRecord': 'store',
+    'GameStore': 'store',
+    'DecisionRecord': 'store',
+    'SimulationStats': 'stats',
+    # Session memory
+    'SessionTracker': 'memory',
+    'session_usage': 'memory',
+    'trim_session': 'memory',
+    # Metrics
+    'start_exporter': 'metrics',
+    # Tables (NumPy)
+    'TurnDistribution': 'distribution',
+    'turn_distribution': 'distribution',
+    'PolicyTable': 'policy',
+    'win_chances': 'wintable',
+    'win_probability': 'wintable',
+    'win_table': 'wintable',
+    'roll_table': 'wintable',
+    'recommend': 'hints',
+    'player_hint': 'hints',
+    'decision_loss': 'analyze',
+    'match_win_chance': 'wintable',
+    'response_table': 'wintable',
+    'response_values': 'wintable',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'farkle' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'farkle.{module}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,275 @@
+"""The computer player's turn logic and named strategies for headless play"""
+import json
+import os
+import random
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from farkle import metrics
+from farkle.endgame import ENDGAME_POINTS, best_keep, reach_probability
+from farkle.scoring import TARGET_SCORE, RollRecord, calculate_score, legal_keeps
+from farkle.state import GameState, roll_turn_dice
+
+if TYPE_CHECKING:
+    from farkle.opponent import OpponentModel
+    from farkle.policy import PolicyTable
+
+# Computer difficulty tiers; the trained ones need a policy table
+DIFFICULTY_LEVELS = ('easy', 'normal', 'hard', 'expert', 'adaptive')
+TRAINED_LEVELS = ('hard', 'expert')
+HEURISTIC_LEVELS = ('easy', 'normal')  # Played by heuristic_strategy, calibrated in the levels file
+HARD_HEURISTIC_RATE = 0.2  # Share of Hard rolls decided by the Normal heuristic
+
+# Calibrated heuristic tiers written by `python -m farkle.calibrate`
+LEVELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'difficulty_levels.json')
+
+
+class Decision(NamedTuple):
+    """Which dice to keep from a roll and whether to bank afterwards"""
+    keep: Tuple[int, ...]
+    points: int
+    bank: bool
+    value: float = 0.0
+
+
+# (dice_set, dice, score, opponent_score, turn_score, rng) -> Decision, or None on a farkle
+Strategy = Callable[[str, List[int], int, int, int, Optional[random.Random]], Optional[Decision]]
+
+
+class HeuristicParams(NamedTuple):
+    """Knobs of the rule-of-thumb computer; the defaults are the Normal tier"""
+    bank_at: int = 1000  # Always bank a turn worth this much
+    bank_at_few_dice: int = 750  # ...or this much with few_dice or fewer left to roll
+    few_dice: int = 2
+    catch_up_behind: int = 1000  # Further behind than this, roll on until catch_up_until
+    catch_up_until: int = 1500
+    chase_behind: int = 500  # Further behind than this, roll on with chase_min_dice or more
+    chase_min_dice: int = 3
+    roll_on_chance: float = 0.5  # Otherwise roll on at random this often
+
+
+NORMAL_PARAMS = HeuristicParams()
+
+
+@lru_cache(maxsize=None)
+def heuristic_levels(path: str = LEVELS_PATH) -> Dict[str, HeuristicParams]:
+    """Parameters per heuristic tier: Normal's defaults plus the calibrated levels file, if any"""
+    levels = {'normal': NORMAL_PARAMS}
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return levels
+    for name, level in data['levels'].items():
+        levels[name] = HeuristicParams(**level['params'])
+    return levels
+
+
+def heuristic_should_continue(turn_score: int, remaining_dice: int, behind_by: int,
+                              rng: Optional[random.Random] = None,
+                              params: HeuristicParams = NORMAL_PARAMS) -> bool:
+    """The heuristic computer's rule of thumb for rolling on after a scoring roll"""
+    if turn_score >= params.bank_at:
+        return False
+    elif remaining_dice <= params.few_dice and turn_score >= params.bank_at_few_dice:
+        return False
+    elif behind_by > params.catch_up_behind and turn_score < params.catch_up_until:
+        return True  # Take more risks when far behind
+    elif behind_by > params.chase_behind and remaining_dice >= params.chase_min_dice:
+        return True
+    else:
+        # Random element to make computer more human-like
+        return (rng or random).random() < params.roll_on_chance
+
+
+def _keep_all(dice: List[int]) -> Optional[Tuple[Tuple[int, ...], int, int]]:
+    """(kept dice, points, dice remaining after hot dice) when every scoring die is kept"""
+    points, scoring_info = calculate_score(dice)
+    if points == 0:
+        return None
+    keep = tuple(d for combo in scoring_info for d in combo.dice)
+    return keep, points, len(dice) - len(keep) or 6
+
+
+def heuristic_strategy(dice_set: str, dice: List[int], score: int, opponent_score: int, turn_score: int,
+                       rng: Optional[random.Random] = None,
+                       params: HeuristicParams = NORMAL_PARAMS) -> Optional[Decision]:
+    """Keep every scoring die, then apply heuristic_should_continue; Normal difficulty by default"""
+    kept = _keep_all(dice)
+    if kept is None:
+        return None
+    keep, points, remaining_dice = kept
+    bank = not heuristic_should_continue(turn_score + points, remaining_dice, opponent_score - score, rng, params)
+    return Decision(keep, points, bank)
+
+
+def threshold_strategy(threshold: int) -> Strategy:
+    """Keep every scoring die and bank once the turn is worth at least threshold"""
+    def strategy(dice_set, dice, score, opponent_score, turn_score, rng=None):
+        kept = _keep_all(dice)
+        if kept is None:
+            return None
+        keep, points, _ = kept
+        return Decision(keep, points, turn_score + points >= threshold or score + turn_score + points >= TARGET_SCORE)
+    return strategy
+
+
+def policy_strategy(policy: 'PolicyTable', heuristic_rate: float = 0.0) -> Strategy:
+    """
+    Follow the policy table, deferring to the heuristic on heuristic_rate of rolls
+    and for dice sets the table does not cover.
+    """
+    def strategy(dice_set, dice, score, opponent_score, turn_score, rng=None):
+        if dice_set not in policy.tables or (heuristic_rate and (rng or random).random() < heuristic_rate):
+            return heuristic_strategy(dice_set, dice, score, opponent_score, turn_score, rng)
+        return policy.choose(dice_set, dice, score, opponent_score, turn_score)
+    return strategy
+
+
+def response_strategy(opponent_threshold: int) -> Strategy:
+    """
+    Best response to an opponent who banks once a turn is worth opponent_threshold,
+    read from that opponent's response table: the keep with the best win chance,
+    banked when banking is worth at least as much as rolling on.
+    """
+    def strategy(dice_set, dice, score, opponent_score, turn_score, rng=None):
+        from farkle.wintable import response_values  # NumPy only once a response is played
+        best = None
+        for points, keep in legal_keeps(dice):
+            bank, roll = response_values(score, opponent_score, turn_score + points, len(dice) - len(keep) or 6,
+                                         dice_set, opponent_threshold)
+            if best is None or max(bank, roll) > best.value:
+                best = Decision(keep, points, bank >= roll, max(bank, roll))
+        return best
+    return strategy
+
+
+def adaptive_strategy(model: 'OpponentModel') -> Strategy:
+    """Best response to the precomputed opponent profile nearest the model's current thresholds"""
+    def strategy(dice_set, dice, score, opponent_score, turn_score, rng=None):
+        from farkle.wintable import nearest_profile
+        profile = nearest_profile(model.thresholds(), dice_set)
+        return response_strategy(profile)(dice_set, dice, score, opponent_score, turn_score, rng)
+    return strategy
+
+
+def endgame_strategy(base: Strategy) -> Strategy:
+    """
+    Play for the target outright where that is provably no worse than base: bank
+    a keep that wins, and keep rolling whenever the exact chance of reaching
+    TARGET_SCORE this turn is at least the chance the opponent misses it on their
+    next turn, which is the most banking short of the target can be worth.
+    """
+    def strategy(dice_set, dice, score, opponent_score, turn_score, rng=None):
+        needed = TARGET_SCORE - score - turn_score
+        if needed <= ENDGAME_POINTS:
+            chance, keep, points = best_keep(dice, needed, dice_set)
+            if not keep:
+                return None
+            if chance == 1.0 or (
+                TARGET_SCORE - opponent_score <= ENDGAME_POINTS
+                and chance >= 1 - reach_probability(TARGET_SCORE - opponent_score, 6, 0, dice_set)
+            ):
+                return Decision(keep, points, points >= needed, chance)
+        return base(dice_set, dice, score, opponent_score, turn_score, rng)
+    return strategy
+
+
+def difficulty_strategy(difficulty: str, policy: Optional['PolicyTable'] = None,
+                        model: Optional['OpponentModel'] = None) -> Strategy:
+    """
+    Strategy for a difficulty tier. Heuristic tiers missing from the levels file
+    play as Normal. Trained tiers fall back to Normal without a policy, and play
+    the endgame exactly either way. Adaptive responds to the opponent's model, or
+    to a fresh one's default thresholds.
+    """
+    if difficulty not in DIFFICULTY_LEVELS:
+        raise ValueError(f"Unknown difficulty {difficulty!r}; expected one of {DIFFICULTY_LEVELS}")
+    if difficulty == 'adaptive':
+        from farkle.opponent import OpponentModel
+        return endgame_strategy(adaptive_strategy(model or OpponentModel()))
+    if difficulty not in TRAINED_LEVELS:
+        params = heuristic_levels().get(difficulty, NORMAL_PARAMS)
+        return heuristic_strategy if params == NORMAL_PARAMS else partial(heuristic_strategy, params=params)
+    if policy is None:
+        return endgame_strategy(heuristic_strategy)
+    return endgame_strategy(policy_strategy(policy, HARD_HEURISTIC_RATE if difficulty == 'hard' else 0.0))
+
+
+def parse_strategy(spec: str, policy: Optional['PolicyTable'] = None) -> Strategy:
+    """Strategy from a name: a difficulty level, 'bank-at:<points>' or 'respond-to:<points>'"""
+    for prefix, build in (('bank-at:', threshold_strategy), ('respond-to:', response_strategy)):
+        if spec.startswith(prefix):
+            try:
+                return build(int(spec[len(prefix):]))
+            except ValueError:
+                raise ValueError(f"Invalid threshold in strategy {spec!r}") from None
+    if spec in TRAINED_LEVELS and policy is None:
+        raise ValueError(f"Strategy {spec!r} needs a trained policy table")
+    return difficulty_strategy(spec, policy)
+
+
+def computer_turn_step(state: GameState, policy: Optional['PolicyTable'] = None,
+                       difficulty: str = 'normal', rng: Optional[random.Random] = None) -> bool:
+    """
+    Execute one step of the computer's turn (one roll).
+    Returns True if the computer keeps rolling. Trained difficulties need a policy
+    with a table for the selected dice set and fall back to Normal otherwise.
+    rng drives the computer's own randomness, separate from the game's dice RNG.
+    """
+    if not state['computer_turn_in_progress']:
+        return False
+
+    # Roll dice
+    dice = roll_turn_dice(state, state['remaining_dice'])
+    state['computer_dice'] = dice
+
+    # Pick the keep and the bank/roll choice; None means no scoring dice
+    decision = difficulty_strategy(difficulty, policy, state.get('opponent_model'))(
+        state['selected_dice_set'],
+        dice,
+        state['computer_score'],
+        state['player_score'],
+        state['computer_total_turn_score'],
+        rng
+    )
+    if decision is None:
+        metrics.FARKLES.inc(state['selected_dice_set'], 'computer')
+        state['turn_history'].append(
+            f"🤖 Computer Farkled! Lost {state['computer_total_turn_score']} points."
+        )
+        state['computer_turn_in_progress'] = False
+        return False
+
+    # Calculate score for this roll
+    roll_score, scoring_info = calculate_score(list(decision.keep))
+    state['computer_current_roll_score'] = roll_score
+    state['computer_total_turn_score'] += roll_score
+
+    # Record roll
+    state['computer_roll_history'].append(
+        RollRecord(tuple(dice), roll_score, scoring_info, state['remaining_dice'])
+    )
+
+    # Update remaining dice
+    state['remaining_dice'] -= len(decision.keep)
+    if state['remaining_dice'] == 0:  # Hot dice
+        state['remaining_dice'] = 6
+        metrics.HOT_DICE.inc(state['selected_dice_set'], 'computer')
+
+    if decision.bank:
+        # Computer decides to bank
+        state['computer_score'] += state['computer_total_turn_score']
+        metrics.BANKED_POINTS.observe(state['computer_total_turn_score'], state['selected_dice_set'], 'computer')
+        state['turn_history'].append(
+            f"🤖 Computer banked {state['computer_total_turn_score']} points."
+        )
+        state['computer_turn_in_progress'] = False
+
+        # Check win condition
+        if state['computer_score'] >= TARGET_SCORE:
+            state['game_state'] = 'game_over'
+            state['turn_history'].append("💀 COMPUTER WINS THE GAME!")
+        return False
+
+    return True  # Continue rolling
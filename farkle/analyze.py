@@ -0,0 +1,183 @@
+"""
+Grade logged decisions against the solver tables.
+
+Every logged decision (a keep from a roll, then bank or roll on) is scored as
+the win chance it gave up against the best option for that roll, read from the
+same tables behind the player hints. Logs are the decision rows of
+python -m farkle.simulate --per decision (CSV or Parquet) and the decisions
+table of a game database. Each file is streamed in batches and folded into
+running per player and dice set totals, so memory stays flat however many
+decisions a file holds; files are graded in parallel, one per worker.
+
+    python -m farkle.simulate --games 100000 --strategy normal --strategy hard --per decision --out hard.parquet
+    python -m farkle.analyze hard.parquet farkle.db --workers 4
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from contextlib import nullcontext
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from farkle.hints import options
+from farkle.scoring import DICE_SETS, calculate_score
+from farkle.stats import RunningStats
+from farkle.wintable import WIN_TABLE_STEP
+
+FIELDS = ('player', 'dice_set', 'score', 'opponent_score', 'turn_score', 'dice', 'keep', 'bank')
+BATCH_ROWS = 10000
+BLUNDER = 0.05       # Win chance lost that counts as a blunder
+OPTIMAL_LOSS = 1e-9  # Anything below this is a best option (ties included)
+
+Row = Tuple[str, str, int, int, int, str, str, bool]
+
+
+class DecisionStats:
+    """Win chance lost per decision, for one player and dice set"""
+    __slots__ = ('loss', 'optimal', 'blunders')
+
+    def __init__(self):
+        self.loss = RunningStats()
+        self.optimal = 0
+        self.blunders = 0
+
+    def add(self, loss: float):
+        self.loss.add(loss)
+        self.optimal += loss < OPTIMAL_LOSS
+        self.blunders += loss >= BLUNDER
+
+    def merge(self, other: 'DecisionStats'):
+        self.loss.merge(other.loss)
+        self.optimal += other.optimal
+        self.blunders += other.blunders
+
+
+def decision_loss(dice_set: str, dice: Sequence[int], keep: Sequence[int], bank: bool, score: int,
+                  opponent_score: int, turn_score: int, step: int = WIN_TABLE_STEP) -> Optional[float]:
+    """Win chance the decision gave up against the roll's best option; None if keep is not a legal keep"""
+    if not keep or Counter(keep) - Counter(dice):
+        return None
+    points, scoring_info = calculate_score(list(keep))
+    if sum(len(combo.dice) for combo in scoring_info) != len(keep):
+        return None  # Keeps a die that does not score
+    found = options(list(dice), score, opponent_score, turn_score, dice_set, step)
+    for option in found:
+        # Options with the same points, dice count and action lead to the same state
+        if option.bank == bank and option.points == points and len(option.keep) == len(keep):
+            return max(o.win_chance for o in found) - option.win_chance
+    return None
+
+
+def _read_csv(path: str) -> Iterator[Row]:
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        columns = [header.index(field) for field in FIELDS]
+        for row in reader:
+            player, dice_set, score, opponent_score, turn_score, dice, keep, bank = (row[i] for i in columns)
+            yield (player, dice_set, int(score), int(opponent_score), int(turn_score), dice, keep,
+                   bank in ('True', 'true', '1'))
+
+
+def _read_parquet(path: str) -> Iterator[Row]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading Parquet logs needs pyarrow") from None
+    for batch in pq.ParquetFile(path).iter_batches(BATCH_ROWS, columns=list(FIELDS)):
+        columns = batch.to_pydict()
+        yield from zip(*(columns[field] for field in FIELDS))
+
+
+def _read_database(path: str) -> Iterator[Row]:
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(FIELDS)} FROM decisions")
+        while True:
+            rows = cursor.fetchmany(BATCH_ROWS)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+
+def read_decisions(path: str) -> Iterator[Row]:
+    """Stream (player, dice set, score, opponent score, turn score, dice, keep, bank) rows from a log file"""
+    if path.endswith(('.parquet', '.pq')):
+        return _read_parquet(path)
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        return _read_database(path)
+    return _read_csv(path)
+
+
+def analyze_file(args: Tuple[str, int]) -> Tuple[Dict[Tuple[str, str], DecisionStats], int]:
+    """Worker entry point: per (player, dice set) stats for one file, and the count of rows skipped"""
+    path, step = args
+    totals: Dict[Tuple[str, str], DecisionStats] = {}
+    skipped = 0
+    for player, dice_set, score, opponent_score, turn_score, dice, keep, bank in read_decisions(path):
+        loss = None
+        if dice_set in DICE_SETS:
+            loss = decision_loss(dice_set, [int(d) for d in dice], [int(d) for d in keep], bool(bank),
+                                 score, opponent_score, turn_score, step)
+        if loss is None:
+            skipped += 1
+            continue
+        stats = totals.get((player, dice_set))
+        if stats is None:
+            stats = totals[player, dice_set] = DecisionStats()
+        stats.add(loss)
+    return totals, skipped
+
+
+def analyze(paths: Sequence[str], workers: int = 1, step: int = WIN_TABLE_STEP
+            ) -> Tuple[Dict[Tuple[str, str], DecisionStats], int]:
+    """Grade every decision in paths, one file per worker; returns merged stats and rows skipped"""
+    totals: Dict[Tuple[str, str], DecisionStats] = {}
+    skipped = 0
+    jobs = [(path, step) for path in paths]
+    with Pool(min(workers, len(jobs))) if workers > 1 and len(jobs) > 1 else nullcontext() as pool:
+        results = pool.imap_unordered(analyze_file, jobs) if pool is not None else map(analyze_file, jobs)
+        for file_totals, file_skipped in results:
+            for key, stats in file_totals.items():
+                totals.setdefault(key, DecisionStats()).merge(stats)
+            skipped += file_skipped
+    return totals, skipped
+
+
+def report(totals: Dict[Tuple[str, str], DecisionStats]) -> str:
+    """One line per player and dice set, from the most decisions down"""
+    lines = [f"{'player':24} {'dice set':10} {'decisions':>10} {'optimal':>8} {'mean loss':>10} "
+             f"{'std':>7} {'worst':>7} {'blunders':>9}"]
+    for (player, dice_set), s in sorted(totals.items(), key=lambda item: -item[1].loss.count):
+        n = s.loss.count
+        lines.append(f"{player[:24]:24} {dice_set:10} {n:10} {s.optimal / n:8.1%} {s.loss.mean:10.2%} "
+                     f"{s.loss.std:7.2%} {s.loss.max:7.1%} {s.blunders / n:9.2%}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Grade logged decisions against the solver tables")
+    parser.add_argument('paths', nargs='+', help="Decision logs: .csv or .parquet from farkle.simulate, or a game .db")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--step', type=int, default=WIN_TABLE_STEP, help="Points per table bucket")
+    args = parser.parse_args(argv)
+    for path in args.paths:
+        if not os.path.exists(path):
+            parser.error(f"{path} not found")
+
+    started = time.perf_counter()
+    totals, skipped = analyze(args.paths, args.workers, args.step)
+    graded = sum(s.loss.count for s in totals.values())
+    print(report(totals))
+    print(f"{graded} decisions graded in {time.perf_counter() - started:.1f}s"
+          f"{f', {skipped} skipped' if skipped else ''}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
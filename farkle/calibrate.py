@@ -0,0 +1,186 @@
+"""
+Calibrate the heuristic difficulty tiers to target win rates.
+
+Each tier is a HeuristicParams set. The search races every candidate from
+SEARCH_SPACE against the reference strategies in rounds. Every game's dice come
+from a stream seeded by the game number alone, with random choices drawn from a
+second stream, so all candidates face the same dice until their choices make
+them roll differently (common random numbers). Dice luck then largely cancels
+out between candidates. After each round, any candidate whose win rate is
+confidently further from the target than the current best is dropped. Each
+candidate's bounds are computed as if the games were independent, which is
+conservative when results are positively correlated. A tier
+is done as soon as its best candidate is confidently within --tolerance of the
+target, only one candidate is left, or --max-games is reached. The chosen
+parameters are written to the levels file the game loads at startup.
+
+    python -m farkle.calibrate --level easy:0.35 --reference normal --workers 8
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from contextlib import nullcontext
+from functools import partial
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from farkle.ai import HEURISTIC_LEVELS, LEVELS_PATH, HeuristicParams, heuristic_strategy, parse_strategy
+from farkle.scoring import DICE_SETS, TARGET_SCORE
+from farkle.simulate import play_game
+
+LEVELS_VERSION = 1
+Z = 2.58  # Two-sided 99% confidence
+
+# Candidate values per parameter, or per group of parameters that only make sense together;
+# the rest keep Normal's defaults. Catching up and chasing each come off, as Normal has them, or keener.
+# Nobody is ever TARGET_SCORE behind, so that setting turns a rule off.
+# few_dice stays at two; bank_at_few_dice already tunes that rule.
+SEARCH_SPACE = {
+    'bank_at': (100, 300, 1000, 1500, 2000, 3000),
+    'bank_at_few_dice': (750, 1500, 3000),
+    'roll_on_chance': (0.5, 0.8, 0.95),
+    ('catch_up_behind', 'catch_up_until'): ((TARGET_SCORE, 0), (1000, 1500), (500, 2000)),
+    ('chase_behind', 'chase_min_dice'): ((TARGET_SCORE, 3), (500, 3), (300, 2)),
+}
+
+
+def candidates() -> List[HeuristicParams]:
+    """Every combination in SEARCH_SPACE"""
+    params = []
+    for values in itertools.product(*SEARCH_SPACE.values()):
+        fields = {}
+        for name, value in zip(SEARCH_SPACE, values):
+            fields.update(zip(name, value) if isinstance(name, tuple) else [(name, value)])
+        params.append(HeuristicParams()._replace(**fields))
+    return params
+
+
+class Candidate:
+    """Running record of one parameter set against the target"""
+    __slots__ = ('params', 'wins', 'games')
+
+    def __init__(self, params: HeuristicParams):
+        self.params = params
+        self.wins = 0
+        self.games = 0
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    def distance(self, target: float) -> Tuple[float, float]:
+        """Confidence bounds on how far the true win rate is from target"""
+        p = (self.wins + 1) / (self.games + 2)  # Keeps the error bar open at 0 or 100% wins
+        error = Z * math.sqrt(p * (1 - p) / max(self.games, 1))
+        distance = abs(self.win_rate - target)
+        return max(distance - error, 0.0), distance + error
+
+
+def _play_games(args) -> Tuple[int, int]:
+    """(candidate index, wins) over a block of seeded games against the references in turn"""
+    index, params, references, dice_set, seed, start, count = args
+    strategy = partial(heuristic_strategy, params=params)
+    opponents = [parse_strategy(spec) for spec in references]
+    wins = 0
+    for game in range(start, start + count):
+        # Game n draws its dice from the same stream for every candidate; choices use their own stream
+        dice_rng = random.Random(f'{seed}:{dice_set}:{game}')
+        decision_rng = random.Random(f'{seed}:{dice_set}:{game}:decisions')
+        opponent = opponents[game % len(opponents)]
+        first_player = game // len(opponents) % 2
+        wins += play_game((strategy, opponent), dice_set, dice_rng, first_player,
+                          decision_rng=decision_rng).winner == 0
+    return index, wins
+
+
+def calibrate_level(target: float, references: Sequence[str], pool=None,
+                    dice_set: str = 'standard', seed: int = 0, batch: int = 500,
+                    max_games: int = 8000, tolerance: float = 0.02) -> Tuple[Candidate, int]:
+    """
+    Race the candidates toward target, in a worker pool if given. Returns the
+    winner and the total games played.
+    """
+    alive = [Candidate(params) for params in candidates()]
+    played = 0
+    while True:
+        jobs = [(i, c.params, tuple(references), dice_set, seed, c.games, batch) for i, c in enumerate(alive)]
+        results = pool.imap_unordered(_play_games, jobs) if pool is not None else map(_play_games, jobs)
+        for i, wins in results:
+            alive[i].wins += wins
+            alive[i].games += batch
+        played += batch * len(alive)
+
+        bounds = {id(c): c.distance(target) for c in alive}
+        best = min(alive, key=lambda c: bounds[id(c)][1])
+        alive = [c for c in alive if bounds[id(c)][0] <= bounds[id(best)][1]]
+        if len(alive) == 1 or bounds[id(best)][1] <= tolerance or best.games >= max_games:
+            return best, played
+
+
+def write_levels(path: str, levels: Dict[str, dict], references: Sequence[str], dice_set: str, seed: int):
+    """Merge calibrated levels into the levels file, keeping any others already in it"""
+    merged = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            merged = json.load(f)['levels']
+    merged.update(levels)
+    data = dict(version=LEVELS_VERSION, references=list(references), dice_set=dice_set, seed=seed, levels=merged)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Search heuristic parameters for target win rates")
+    parser.add_argument('--level', action='append', required=True, metavar='NAME:WIN_RATE',
+                        help="Tier and its target win rate against the references, e.g. easy:0.35 (repeatable)")
+    parser.add_argument('--reference', action='append', metavar='NAME',
+                        help="Opponent strategy, played in turn (repeatable; default: normal)")
+    parser.add_argument('--dice-set', default='standard', choices=list(DICE_SETS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch', type=int, default=500, help="Games per candidate per round")
+    parser.add_argument('--max-games', type=int, default=8000, help="Most games any candidate plays")
+    parser.add_argument('--tolerance', type=float, default=0.02, help="Acceptable win rate error")
+    parser.add_argument('--out', default=LEVELS_PATH)
+    args = parser.parse_args(argv)
+
+    targets = {}
+    for spec in args.level:
+        name, _, rate = spec.partition(':')
+        try:
+            targets[name] = float(rate)
+        except ValueError:
+            parser.error(f"Invalid --level {spec!r}; expected NAME:WIN_RATE")
+        if name not in HEURISTIC_LEVELS:
+            parser.error(f"Unknown --level {name!r}; heuristic tiers are {', '.join(HEURISTIC_LEVELS)}")
+    references = args.reference or ['normal']
+    try:
+        for spec in references:
+            parse_strategy(spec)
+    except ValueError as e:
+        parser.error(str(e))
+
+    levels = {}
+    with Pool(args.workers) if args.workers > 1 else nullcontext() as pool:
+        for name, target in targets.items():
+            started = time.perf_counter()
+            best, played = calibrate_level(target, references, pool, args.dice_set, args.seed,
+                                           args.batch, args.max_games, args.tolerance)
+            print(f"{name:8} target {target:.1%}: {best.win_rate:.1%} over {best.games} games "
+                  f"({played} played in {time.perf_counter() - started:.1f}s) {best.params}")
+            levels[name] = {
+                'target': target,
+                'win_rate': round(best.win_rate, 4),
+                'games': best.games,
+                'params': best.params._asdict(),
+            }
+    write_levels(args.out, levels, references, args.dice_set, args.seed)
+
+
+if __name__ == '__main__':
+    main()
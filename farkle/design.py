@@ -0,0 +1,214 @@
+"""
+Design dice sets for target statistics.
+
+Every layout of six faces from 1 to 6 (462 of them, which covers every face
+weighting in sixths) is scored exactly. The farkle rate and expected points of a
+six-dice roll come from the roll distributions, and the win chance against a
+player on standard dice comes from solver tables for a game where the two
+players roll different dice. Roll statistics are cheap and the win chance is
+solved on a coarse grid, so every layout gets both. The few closest to each
+target are then solved at full resolution. Layouts are spread over worker
+processes. The chosen sets are validated and written to the designed dice sets
+file the game loads at import, and their hint tables are built.
+
+    python -m farkle.design --target gentle:farkle=0.01,win=0.6 --target harsh:points=250 --workers 4
+"""
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+from farkle.scoring import (
+    DESIGNED_DICE_SETS_PATH,
+    DICE_SETS,
+    MAX_DICE_SET_NAME,
+    NUM_DICE,
+    DiceSet,
+    check_faces,
+    designed_dice_sets,
+    farkle_probability,
+    roll_outcomes,
+)
+from farkle.wintable import WIN_TABLE_STEP, match_win_chance
+
+DICE_SETS_VERSION = 1
+REFERENCE = 'standard'
+COARSE_STEP = 500  # Table resolution when screening every layout; ranks close to the full resolution
+FINALISTS = 8
+
+# What one unit of error is for each statistic; a layout's error is its worst statistic's
+TARGET_SCALES = {
+    'farkle': 0.01,  # Chance a six-dice roll scores nothing
+    'points': 25.0,  # Expected points of a six-dice roll, farkles counted as 0
+    'win': 0.02,     # Win chance against standard dice, both playing optimally
+}
+
+Layout = Tuple[int, ...]
+Stats = Dict[str, float]
+
+
+def layouts() -> List[Layout]:
+    """Every six-faced die, faces sorted"""
+    return list(itertools.combinations_with_replacement(range(1, 7), 6))
+
+
+def expected_points(dice_set: DiceSet, num_dice: int = NUM_DICE) -> float:
+    """Mean points of a roll, farkles included"""
+    return sum(points * p for (points, _), p in roll_outcomes(num_dice, dice_set).items())
+
+
+def layout_stats(args: Tuple[Layout, Optional[int]]) -> Tuple[Layout, Stats]:
+    """
+    Worker entry point: roll statistics of a layout, and its win chance when given a
+    table step. The layout is passed as its faces, so it is never added to DICE_SETS.
+    """
+    faces, step = args
+    stats = {'farkle': farkle_probability(NUM_DICE, faces), 'points': expected_points(faces)}
+    if step:
+        stats['win'] = match_win_chance(faces, REFERENCE, step)
+    return faces, stats
+
+
+def error(stats: Stats, target: Stats) -> float:
+    """Distance from the target, in units of TARGET_SCALES, of the furthest statistic"""
+    return max(abs(stats[key] - value) / TARGET_SCALES[key] for key, value in target.items())
+
+
+def design(targets: Dict[str, Stats], pool=None, step: int = WIN_TABLE_STEP,
+           finalists: int = FINALISTS) -> Dict[str, Tuple[Layout, Stats]]:
+    """
+    Closest layout to each target, in a worker pool if given. Layouts of existing
+    sets (other than those being redesigned) are left out, and each target gets a different one.
+    """
+    run = pool.imap_unordered if pool is not None else map
+    taken = {tuple(sorted(faces)) for name, faces in DICE_SETS.items() if name not in targets}
+    screen_step = max(COARSE_STEP, step) if any('win' in target for target in targets.values()) else None
+    screened = dict(run(layout_stats, [(faces, screen_step) for faces in layouts() if faces not in taken]))
+
+    chosen = {}
+    for name, target in targets.items():
+        ranked = sorted(screened, key=lambda faces: error(screened[faces], target))[:finalists]
+        final = dict(run(layout_stats, [(faces, step) for faces in ranked]))
+        best = min(ranked, key=lambda faces: (error(final[faces], target), faces))
+        chosen[name] = best, final[best]
+        del screened[best]
+    return chosen
+
+
+def describe(stats: Stats) -> str:
+    """Sidebar description of a designed set"""
+    return (f"🧪 {stats['farkle']:.1%} farkles on six dice, {stats['points']:.0f} points a roll, "
+            f"wins {stats['win']:.0%} against standard dice")
+
+
+def write_dice_sets(path: str, dice_sets: Dict[str, dict]):
+    """
+    Merge designed sets into the file, keeping any others already in it. The file
+    is replaced in one step, since every process reads it at import.
+    """
+    merged = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            merged = json.load(f)['dice_sets']
+    merged.update(dice_sets)
+    data = dict(version=DICE_SETS_VERSION, reference=REFERENCE, dice_sets=merged)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def validate_dice_sets(path: str, builtin: List[str]):
+    """Check a designed sets file as the game will load it; raises ValueError"""
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != DICE_SETS_VERSION:
+        raise ValueError(f"Unsupported dice sets version {data.get('version')} in {path}")
+    for name, entry in data['dice_sets'].items():
+        if name in builtin:
+            raise ValueError(f"Designed set {name!r} in {path} would replace a built-in set")
+        check_faces(entry['faces'])
+        if len(name.encode()) > MAX_DICE_SET_NAME:
+            raise ValueError(f"Designed set name {name!r} in {path} is over {MAX_DICE_SET_NAME} bytes")
+        if not entry.get('description'):
+            raise ValueError(f"Designed set {name!r} in {path} has no description")
+
+
+def parse_target(spec: str) -> Tuple[str, Stats]:
+    """'name:farkle=0.02,points=350,win=0.55' -> (name, {statistic: value})"""
+    name, _, settings = spec.partition(':')
+    target = {}
+    for setting in filter(None, settings.split(',')):
+        key, _, value = setting.partition('=')
+        if key not in TARGET_SCALES:
+            raise ValueError(f"Unknown statistic {key!r} in {spec!r}; expected one of {list(TARGET_SCALES)}")
+        target[key] = float(value)
+    if not name or not target:
+        raise ValueError(f"Invalid target {spec!r}; expected NAME:STAT=VALUE[,STAT=VALUE...]")
+    if len(name.encode()) > MAX_DICE_SET_NAME:
+        raise ValueError(f"Dice set name {name!r} is over {MAX_DICE_SET_NAME} bytes")
+    return name, target
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Search dice face layouts for target statistics")
+    parser.add_argument('--target', action='append', required=True, metavar='NAME:STAT=VALUE,...',
+                        help=f"Set to design and its targets, from {', '.join(TARGET_SCALES)} "
+                             f"(repeatable), e.g. gentle:farkle=0.01,win=0.6")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--step', type=int, default=WIN_TABLE_STEP, help="Points per table bucket")
+    parser.add_argument('--finalists', type=int, default=FINALISTS,
+                        help="Layouts per target solved at full resolution")
+    parser.add_argument('--no-tables', action='store_true', help="Skip building the hint tables")
+    parser.add_argument('--out', default=DESIGNED_DICE_SETS_PATH)
+    args = parser.parse_args(argv)
+
+    builtin = [name for name in DICE_SETS if name not in designed_dice_sets()]
+    targets = {}
+    for spec in args.target:
+        try:
+            name, target = parse_target(spec)
+        except ValueError as e:
+            parser.error(str(e))
+        if name in builtin:
+            parser.error(f"{name!r} is a built-in dice set")
+        targets[name] = target
+
+    started = time.perf_counter()
+    with Pool(args.workers) if args.workers > 1 else nullcontext() as pool:
+        chosen = design(targets, pool, args.step, args.finalists)
+    print(f"{len(layouts())} layouts searched in {time.perf_counter() - started:.1f}s")
+
+    designed = {}
+    for name, (faces, stats) in chosen.items():
+        target = targets[name]
+        print(f"{name:10} {''.join(map(str, faces))}  " + '  '.join(
+            f"{key} {stats[key]:.4g}" + (f" (target {target[key]:.4g})" if key in target else '') for key in stats
+        ) + f"  error {error(stats, target):.2f}")
+        designed[name] = {
+            'faces': list(faces),
+            'description': describe(stats),
+            'target': target,
+            'stats': {key: round(value, 4) for key, value in stats.items()},
+        }
+    write_dice_sets(args.out, designed)
+    validate_dice_sets(args.out, builtin)
+
+    if not args.no_tables:
+        from farkle.hints import load_tables
+        for name, (faces, _) in chosen.items():
+            # Nothing in this process has cached results under the designed name
+            DICE_SETS[name] = list(faces)
+            started = time.perf_counter()
+            load_tables((name,), args.step)
+            print(f"{name:10} tables ready in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Exact distribution of a turn's banked points under threshold-style banking.
+
+A threshold policy keeps every scoring die and banks as soon as the points at
+stake reach the threshold for the number of dice it would roll next, the rule
+threshold_strategy plays with a single threshold. Points always come in
+multiples of 50 and only ever grow within a turn, so a single forward pass over
+turn-score buckets carries the probability mass of every (turn score, dice to
+roll) state to its bank or farkle outcome exactly, with one small matrix
+product per distinct roll score. Results are cached per policy and dice set.
+Variants with more than six dice work the same way (--dice).
+
+    python -m farkle.distribution --threshold 300 --threshold 350 --dice-set lucky
+"""
+import argparse
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from farkle.scoring import DICE_SETS, NUM_DICE, roll_outcomes
+
+BUCKET = 50  # Every score is a multiple of this
+DISTRIBUTION_CACHE_SIZE = 4096
+
+# A single bank threshold, or one per dice count to roll next (1 up to a full roll)
+Thresholds = Union[int, Sequence[int]]
+
+
+class TurnDistribution(NamedTuple):
+    """probabilities[i] is the chance the turn banks i * BUCKET points; [0] is the farkle mass"""
+    probabilities: np.ndarray
+
+    @property
+    def farkle(self) -> float:
+        return float(self.probabilities[0])
+
+    @property
+    def points(self) -> np.ndarray:
+        return np.arange(len(self.probabilities)) * BUCKET
+
+    @property
+    def mean(self) -> float:
+        return float(self.probabilities @ self.points)
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.probabilities @ (self.points - self.mean) ** 2))
+
+    def at_least(self, points: int) -> float:
+        """Chance of banking at least points"""
+        return float(self.probabilities[-(-points // BUCKET):].sum())
+
+    def quantile(self, q: float) -> int:
+        """Smallest banked score with at least q of the mass at or below it"""
+        return int(np.searchsorted(np.cumsum(self.probabilities), q - 1e-12) * BUCKET)
+
+
+@lru_cache(maxsize=None)
+def _transitions(dice_set: str, total_dice: int) -> Tuple[np.ndarray, Dict[int, np.ndarray]]:
+    """Farkle chance per dice count, and per roll score (in buckets) the [dice, next dice] probabilities"""
+    farkle = np.zeros(total_dice + 1)
+    moves: Dict[int, np.ndarray] = {}
+    for num_dice in range(1, total_dice + 1):
+        for (points, used), p in roll_outcomes(num_dice, dice_set).items():
+            if points == 0:
+                farkle[num_dice] += p
+                continue
+            matrix = moves.setdefault(points // BUCKET, np.zeros((total_dice + 1, total_dice + 1)))
+            matrix[num_dice, num_dice - used or total_dice] += p  # Hot dice
+    return farkle, moves
+
+
+def _normalize(thresholds: Thresholds, total_dice: int) -> Tuple[int, ...]:
+    """Bank threshold per next dice count, indexed 0 to total_dice (0 unused)"""
+    if isinstance(thresholds, int):
+        return (0,) + (thresholds,) * total_dice
+    thresholds = tuple(int(t) for t in thresholds)
+    if len(thresholds) != total_dice:
+        raise ValueError(f"Expected one threshold per dice count 1-{total_dice}, got {len(thresholds)}")
+    return (0,) + thresholds
+
+
+def turn_distribution(thresholds: Thresholds, dice_set: str = 'standard',
+                      total_dice: int = NUM_DICE) -> TurnDistribution:
+    """Exact banked-points distribution for one turn under a threshold policy, with total_dice in a full roll"""
+    if dice_set not in DICE_SETS:
+        raise ValueError(f"Unknown dice set {dice_set!r}")
+    return _turn_distribution(_normalize(thresholds, total_dice), dice_set)
+
+
+@lru_cache(maxsize=DISTRIBUTION_CACHE_SIZE)
+def _turn_distribution(thresholds: Tuple[int, ...], dice_set: str) -> TurnDistribution:
+    total_dice = len(thresholds) - 1
+    farkle_p, moves = _transitions(dice_set, total_dice)
+    # Buckets at or past these bank; below them the policy rolls on
+    bank_from = np.array([max(-(-t // BUCKET), 1) for t in thresholds])
+    bank_from[0] = 0  # No state ever has zero dice to roll
+    n_buckets = int(bank_from[1:].max()) + max(moves) + 1
+
+    mass = np.zeros((n_buckets, total_dice + 1))  # mass[t, d]: reached t buckets with d dice to roll, not yet banked
+    mass[0, total_dice] = 1.0
+    banked = np.zeros(n_buckets)
+    dice = np.arange(total_dice + 1)
+    for t in range(n_buckets):
+        row = mass[t]
+        if not row.any():
+            continue
+        if t:
+            bank = t >= bank_from[dice]
+            banked[t] = row[bank].sum()
+            if bank.all():
+                continue
+            row = np.where(bank, 0.0, row)
+        banked[0] += row @ farkle_p
+        for points, matrix in moves.items():
+            mass[t + points] += row @ matrix
+    banked.flags.writeable = False
+    return TurnDistribution(banked)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Exact banked-points distribution of one turn per threshold")
+    parser.add_argument('--threshold', type=int, action='append', required=True,
+                        help="Bank once a turn is worth this many points (repeatable)")
+    parser.add_argument('--dice-set', default='standard', choices=list(DICE_SETS))
+    parser.add_argument('--dice', type=int, default=NUM_DICE, help="Dice in a full roll")
+    args = parser.parse_args(argv)
+
+    print(f"{'threshold':>9} {'mean':>8} {'std':>8} {'farkle':>7} {'p50':>6} {'p90':>6} {'p99':>6}")
+    for threshold in args.threshold:
+        dist = turn_distribution(threshold, args.dice_set, args.dice)
+        print(f"{threshold:9} {dist.mean:8.1f} {dist.std:8.1f} {dist.farkle:7.2%} "
+              f"{dist.quantile(0.5):6} {dist.quantile(0.9):6} {dist.quantile(0.99):6}")
+
+
+if __name__ == '__main__':
+    main()
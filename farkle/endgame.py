@@ -0,0 +1,92 @@
+"""
+Exact chance of reaching the target score within the current turn.
+
+Near the end of a game the only thing that matters on a turn is reaching
+TARGET_SCORE before farkling. reach_probability() solves that exactly by
+recursion over every roll of the remaining dice and every legal keep of each
+roll, memoized per (points needed, dice, dice set, dice in a full roll) in a
+bounded LRU cache. Points always come in multiples of 50, so within
+ENDGAME_POINTS of the target there are only a few hundred states per dice set,
+and a cached lookup takes microseconds. Variants with more dice pass total_dice,
+the number of dice hot dice brings back.
+"""
+from functools import lru_cache
+from typing import Any, List, Mapping, Optional, Tuple
+
+from farkle.scoring import NUM_DICE, TARGET_SCORE, legal_keeps, roll_multisets
+
+ENDGAME_POINTS = 4000  # Distance from the target within which turns are played to reach it
+ENDGAME_CACHE_SIZE = 1 << 16
+TIE_TOLERANCE = 1e-12  # Chances this close are equal; only the order of summation tells them apart
+
+# (probability, ((points, dice to roll next), ...)) per distinct set of keeps
+RollKeeps = Tuple[Tuple[float, Tuple[Tuple[int, int], ...]], ...]
+
+
+@lru_cache(maxsize=None)
+def _roll_keeps(num_dice: int, dice_set: str, total_dice: int = NUM_DICE) -> RollKeeps:
+    """
+    Every scoring roll of num_dice from a dice set, grouped by the keeps it allows;
+    farkles are left out. Hot dice bring back total_dice.
+    """
+    grouped = {}
+    for dice, p in roll_multisets(num_dice, dice_set).items():
+        keeps = frozenset(
+            (points, num_dice - len(kept) or total_dice)  # Hot dice
+            for points, kept in legal_keeps(dice)
+        )
+        if keeps:
+            grouped[keeps] = grouped.get(keeps, 0.0) + p
+    return tuple((p, tuple(sorted(keeps, reverse=True))) for keeps, p in grouped.items())
+
+
+@lru_cache(maxsize=ENDGAME_CACHE_SIZE)
+def _reach(needed: int, num_dice: int, dice_set: str, total_dice: int = NUM_DICE) -> float:
+    total = 0.0
+    for p, keeps in _roll_keeps(num_dice, dice_set, total_dice):
+        best = 0.0
+        for points, next_dice in keeps:
+            if points >= needed:
+                best = 1.0
+                break
+            best = max(best, _reach(needed - points, next_dice, dice_set, total_dice))
+        total += p * best
+    return total
+
+
+def reach_probability(needed: int, dice_remaining: int, turn_score: int, dice_set: str,
+                      total_dice: int = NUM_DICE) -> float:
+    """
+    Chance of banking at least needed points this turn, with turn_score already at
+    stake and dice_remaining dice to roll, when every roll is kept to that end
+    """
+    needed -= turn_score
+    if needed <= 0:
+        return 1.0
+    return _reach(needed, dice_remaining, dice_set, total_dice)
+
+
+def best_keep(dice: List[int], needed: int, dice_set: str,
+              total_dice: int = NUM_DICE) -> Tuple[float, Tuple[int, ...], int]:
+    """
+    The keep from a roll that gives the best chance of gaining needed more points
+    this turn: (chance, kept dice, points). (0.0, (), 0) on a farkle.
+    """
+    best = (0.0, (), 0)
+    for points, kept in legal_keeps(dice):
+        if points >= needed:
+            return 1.0, kept, points
+        chance = _reach(needed - points, len(dice) - len(kept) or total_dice, dice_set, total_dice)
+        if chance > best[0] + TIE_TOLERANCE or not best[1]:  # Ties go to the first keep, keeping the most dice
+            best = (chance, kept, points)
+    return best
+
+
+def reach_chance(state: Mapping[str, Any]) -> Optional[float]:
+    """The player's chance of reaching TARGET_SCORE on their current turn; None outside the endgame"""
+    needed = TARGET_SCORE - state['player_score'] - state['turn_score']
+    if state['current_player'] != 'player' or needed > ENDGAME_POINTS:
+        return None
+    if state['dice']:
+        return best_keep(state['dice'], needed, state['selected_dice_set'])[0]
+    return reach_probability(needed, state['remaining_dice'], 0, state['selected_dice_set'])
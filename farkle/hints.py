@@ -0,0 +1,114 @@
+"""
+Recommended play for the human player, read from precomputed solver tables.
+
+Each option for a roll (a legal keep, then bank or roll on) is scored as a win
+probability: banking by the opponent's win_table entry for starting their turn,
+rolling on by roll_table. Both tables are solved once per dice set and memory-
+mapped from the table cache, so a hint is a couple of lookups per legal keep,
+well under a millisecond. Build every table ahead of time, along with the
+response tables the Adaptive computer plays from, with
+
+    python -m farkle.hints
+"""
+import argparse
+import time
+from typing import Any, List, Mapping, NamedTuple, Optional, Tuple
+
+from farkle.scoring import DICE_SETS, TARGET_SCORE, legal_keeps
+from farkle.wintable import (
+    RESPONSE_PROFILES,
+    WIN_TABLE_STEP,
+    response_roll_table,
+    response_table,
+    roll_table,
+    win_probability,
+    win_table,
+)
+
+
+class Option(NamedTuple):
+    """One way to play a roll: a keep, then bank or roll on"""
+    win_chance: float
+    bank: bool
+    points: int
+    keep: Tuple[int, ...]
+
+
+class Hint(NamedTuple):
+    """The best option for a roll and how much it beats the other action by"""
+    keep: Tuple[int, ...]
+    points: int
+    bank: bool
+    win_chance: float
+    margin: float  # Win chance over the best option that makes the other bank/roll choice
+
+
+def load_tables(dice_sets=tuple(DICE_SETS), step: int = WIN_TABLE_STEP):
+    """Solve or load the tables hints read, so no hint ever waits on a solve"""
+    for dice_set in dice_sets:
+        win_table(dice_set, step)
+        roll_table(dice_set, step)
+
+
+def load_response_tables(dice_sets=tuple(DICE_SETS), step: int = WIN_TABLE_STEP):
+    """Solve or load the Adaptive computer's tables, one pair per opponent profile"""
+    for dice_set in dice_sets:
+        for threshold in RESPONSE_PROFILES:
+            response_table(dice_set, threshold, step)
+            response_roll_table(dice_set, threshold, step)
+
+
+def options(dice: List[int], score: int, opponent_score: int, turn_score: int, dice_set: str,
+            step: int = WIN_TABLE_STEP) -> List[Option]:
+    """Every option for a roll, two per legal keep (bank, then roll on); empty on a farkle"""
+    n_scores = TARGET_SCORE // step
+    half = step // 2
+    rolls = roll_table(dice_set, step)
+    score_idx = min((score + half) // step, n_scores - 1)
+    opponent_idx = min((opponent_score + half) // step, n_scores - 1)
+
+    found = []
+    for points, keep in legal_keeps(dice):
+        at_stake = turn_score + points
+        bank = 1 - win_probability(opponent_score, score + at_stake, 0, 6, dice_set)
+        next_dice = len(dice) - len(keep) or 6  # Hot dice
+        roll = float(rolls[next_dice, min((at_stake + half) // step, n_scores), score_idx, opponent_idx])
+        found += [Option(bank, True, points, keep), Option(roll, False, points, keep)]
+    return found
+
+
+def recommend(dice: List[int], score: int, opponent_score: int, turn_score: int, dice_set: str,
+              step: int = WIN_TABLE_STEP) -> Optional[Hint]:
+    """Best keep from a roll and whether to bank after it; None on a farkle"""
+    found = options(dice, score, opponent_score, turn_score, dice_set, step)
+    if not found:
+        return None
+
+    best = max(found)
+    margin = best.win_chance - max(option.win_chance for option in found if option.bank != best.bank)
+    return Hint(best.keep, best.points, best.bank, best.win_chance, margin)
+
+
+def player_hint(state: Mapping[str, Any]) -> Optional[Hint]:
+    """Hint for the dice on the table on the player's turn; None when there is nothing to decide"""
+    if state['current_player'] != 'player' or not state['dice']:
+        return None
+    return recommend(state['dice'], state['player_score'], state['computer_score'], state['turn_score'],
+                     state['selected_dice_set'])
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build the solver tables behind the player hints")
+    parser.add_argument('--dice-set', action='append', choices=list(DICE_SETS),
+                        help="Dice set to build (repeatable; default: all)")
+    parser.add_argument('--step', type=int, default=WIN_TABLE_STEP, help="Points per table bucket")
+    args = parser.parse_args(argv)
+    for dice_set in args.dice_set or list(DICE_SETS):
+        started = time.perf_counter()
+        load_tables((dice_set,), args.step)
+        load_response_tables((dice_set,), args.step)
+        print(f"{dice_set:10} ready in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
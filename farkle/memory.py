@@ -0,0 +1,237 @@
+"""
+Approximate per-session memory accounting, budget trimming and idle eviction.
+
+Sizes are deep sys.getsizeof totals per state key. Objects shared by the whole
+process (the dice faces and interned scoring breakdowns, plus anything the
+caller passes as shared) are not charged to any session, and an object
+reachable from several keys is charged to the first one only. History beyond what the UI shows is the
+only thing ever dropped: finished games are already in the game store, and the
+replay timeline keeps its most recent steps. Measuring walks the whole state, so
+metered_trim only does it every few runs.
+"""
+import random
+import sys
+import threading
+import time
+import types
+from typing import Any, Callable, Dict, Iterable, List, MutableMapping, NamedTuple, Optional, Set
+
+from farkle.scoring import DICE_FACES, _COMBO_CACHE, _SCORE_CACHE
+from farkle.timeline import KEYFRAME_INTERVAL
+
+HISTORY_SHOWN = 12  # Turn history entries the UI displays
+TIMELINE_KEPT = 4 * KEYFRAME_INTERVAL  # Replay steps kept once a session is over budget
+MEASURE_EVERY = 8  # Runs between full measurements in metered_trim, unless a game finishes first
+
+_LEAVES = (str, bytes, int, float, complex, bool, type(None), random.Random)
+_SKIPPED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+_shared = (-1, -1, frozenset())  # Sizes of the scoring caches the ids were collected at, and the ids
+
+
+def shared_ids() -> Set[int]:
+    """
+    ids of the process-wide dice faces and interned scoring records, which no session
+    owns. The interning caches only grow, so the ids are collected again only once
+    they have; callers get their own copy to extend.
+    """
+    global _shared
+    combos, scores, ids = _shared
+    if (combos, scores) != (len(_COMBO_CACHE), len(_SCORE_CACHE)):
+        ids = {id(DICE_FACES)}
+        ids.update(id(combo) for combo in list(_COMBO_CACHE.values()))
+        ids.update(id(breakdown) for _, breakdown in list(_SCORE_CACHE.values()))
+        _shared = combos, scores, ids = len(_COMBO_CACHE), len(_SCORE_CACHE), frozenset(ids)
+    return set(ids)
+
+
+def approx_size(obj: Any, seen: Set[int]) -> int:
+    """Bytes reachable from obj, skipping (and extending) the ids in seen"""
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIPPED):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, _LEAVES):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            for cls in type(item).__mro__:
+                stack.extend(getattr(item, name) for name in cls.__dict__.get('__slots__', ())
+                             if hasattr(item, name))
+            if hasattr(item, '__dict__'):
+                stack.append(item.__dict__)
+    return total
+
+
+def session_usage(state: MutableMapping[str, Any], shared: Iterable[Any] = ()) -> Dict[str, int]:
+    """Approximate bytes held by each key of a session's state, largest first"""
+    seen = shared_ids()
+    for obj in shared:
+        approx_size(obj, seen)
+    usage = {key: approx_size(state[key], seen) for key in list(state.keys())}
+    return dict(sorted(usage.items(), key=lambda item: -item[1]))
+
+
+def _trim_turn_history(state: MutableMapping[str, Any]):
+    if len(state['turn_history']) > HISTORY_SHOWN:
+        state['turn_history'] = state['turn_history'][-HISTORY_SHOWN:]
+
+
+def _trim_game_history(state: MutableMapping[str, Any]):
+    # Only the current game's entry is still needed; finished ones are in the game store
+    if len(state['game_history']) > 1:
+        state['game_history'] = state['game_history'][-1:]
+
+
+def _trim_timeline(state: MutableMapping[str, Any]):
+    if len(state['timeline']) > TIMELINE_KEPT:
+        state['timeline'] = state['timeline'].tail(TIMELINE_KEPT)
+
+
+# Cheapest loss first
+_TRIMS: List[Callable[[MutableMapping[str, Any]], None]] = [_trim_turn_history, _trim_game_history, _trim_timeline]
+
+
+def trim_session(state: MutableMapping[str, Any], budget: int, shared: Iterable[Any] = ()) -> Dict[str, int]:
+    """Drop old history until the session fits in budget bytes (or nothing is left to drop); returns the usage"""
+    shared = tuple(shared)
+    usage = session_usage(state, shared)
+    for trim in _TRIMS:
+        if sum(usage.values()) <= budget:
+            break
+        trim(state)
+        usage = session_usage(state, shared)
+    return usage
+
+
+def metered_trim(state: MutableMapping[str, Any], budget: int, shared: Iterable[Any] = ()) -> Dict[str, int]:
+    """
+    trim_session on every MEASURE_EVERY-th run, or as soon as a game is added to the
+    history; in between, the last usage. The count is kept in state['memory_usage'].
+    """
+    runs, games, usage = state.get('memory_usage', (MEASURE_EVERY, -1, {}))
+    if runs + 1 < MEASURE_EVERY and games == len(state['game_history']):
+        state['memory_usage'] = (runs + 1, games, usage)
+        return usage
+    usage = trim_session(state, budget, shared)
+    state['memory_usage'] = (0, len(state['game_history']), usage)
+    return usage
+
+
+def evict_session(state: MutableMapping[str, Any]) -> int:
+    """
+    Drop all the history an idle session can do without; its game itself is
+    untouched. Returns roughly how many bytes that freed.
+    """
+    keys = ('turn_history', 'game_history', 'timeline')
+    before = sum(approx_size(state[key], shared_ids()) for key in keys)
+    for trim in _TRIMS:
+        trim(state)
+    if len(state['timeline']) > 1:
+        state['timeline'] = state['timeline'].tail(1)
+    return before - sum(approx_size(state[key], shared_ids()) for key in keys)
+
+
+def script_session_state(session_state: MutableMapping[str, Any]) -> MutableMapping[str, Any]:
+    """
+    The state a Streamlit session keeps across runs, from the script run context's
+    session_state, which wraps it for one run only
+    """
+    return getattr(session_state, '_state', session_state)
+
+
+class SessionInfo(NamedTuple):
+    session_id: str
+    idle_seconds: float
+    nbytes: int  # As of the session's last run
+    evicted: bool
+
+
+class SessionTracker:
+    """
+    Every live session in the process. Sessions report in on each run. A sweep, at
+    most once per sweep_interval, marks sessions idle for longer than idle_seconds,
+    and forgets those is_alive(session_id) says have closed. A marked session gets
+    evict_session() applied to its state in its own next run, so no other thread
+    ever changes a session's state. on_evict(session_id) is told about every session
+    marked idle or forgotten as closed, outside the tracker's lock, so shared resources
+    such as room seats can be released right away. Eviction only needs item access, so Streamlit's
+    per-session state object (see script_session_state) can be passed in directly.
+    """
+
+    def __init__(self, idle_seconds: float = 1800, sweep_interval: float = 60,
+                 is_alive: Optional[Callable[[str], bool]] = None, on_evict: Optional[Callable[[str], Any]] = None):
+        self.idle_seconds = idle_seconds
+        self.sweep_interval = sweep_interval
+        self.is_alive = is_alive
+        self.on_evict = on_evict
+        self._sessions: Dict[str, list] = {}  # session id -> [last seen, bytes, evicted, marked idle]
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def touch(self, session_id: str, state: MutableMapping[str, Any], nbytes: int):
+        """Record a session's run and its current size, from the session's own run; evicts it if marked idle"""
+        now = time.monotonic()
+        with self._lock:
+            marked = self._sessions.get(session_id, [0, 0, False, False])[3]
+        if marked:
+            nbytes -= evict_session(state)
+        released: List[str] = []
+        with self._lock:
+            self._sessions[session_id] = [now, nbytes, marked, False]
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.sweep_interval
+                released = self._sweep(now)
+        self._release(released)
+
+    def remove(self, session_id: str):
+        """Forget a session that has shut down"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        self._release([session_id])
+
+    def sweep(self) -> int:
+        """Mark idle sessions for eviction now; returns how many were marked"""
+        with self._lock:
+            released = self._sweep(time.monotonic())
+            marked = sum(session_id in self._sessions for session_id in released)
+        self._release(released)
+        return marked
+
+    def _sweep(self, now: float) -> List[str]:
+        """Mark idle sessions and forget closed ones; returns both, for _release"""
+        released = []
+        for session_id, record in list(self._sessions.items()):
+            if self.is_alive is not None and not self.is_alive(session_id):
+                del self._sessions[session_id]
+                released.append(session_id)
+            elif not record[2] and not record[3] and now - record[0] > self.idle_seconds:
+                record[3] = True
+                released.append(session_id)
+        return released
+
+    def _release(self, session_ids: List[str]):
+        if self.on_evict is not None:
+            for session_id in session_ids:
+                self.on_evict(session_id)
+
+    def sessions(self) -> List[SessionInfo]:
+        """Live sessions, largest first"""
+        now = time.monotonic()
+        with self._lock:
+            infos = [SessionInfo(session_id, now - seen, nbytes, evicted)
+                     for session_id, (seen, nbytes, evicted, _) in self._sessions.items()
+                     if self.is_alive is None or self.is_alive(session_id)]
+        return sorted(infos, key=lambda info: -info.nbytes)
+
+    def total_bytes(self) -> int:
+        return sum(info.nbytes for info in self.sessions())
@@ -0,0 +1,264 @@
+"""
+Prometheus text-format metrics for gameplay and the server.
+
+Counters and histograms accumulate in per-thread shards: a thread only ever
+writes its own plain dict, so recording is one dict update with no lock and no
+contention. The hottest call sites (scoring) use a Tally instead, whose inc() is a
+single itertools.count step: atomic under the GIL and cheaper than even a
+thread-local lookup. Exporting sums the shards. Streamlit runs each rerun on a fresh
+thread, so shards of finished threads are folded into a single retired shard
+whenever a new thread registers, which keeps memory bounded. Metrics are exposed
+as a file for node_exporter's textfile collector, from a small localhost HTTP
+endpoint, or both.
+"""
+import bisect
+import itertools
+import os
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+Values = Dict[Tuple[str, tuple], object]  # (metric name, label values) -> count, or histogram bucket list
+
+_local = threading.local()
+_registry_lock = threading.Lock()
+_shards: List[Tuple[threading.Thread, Values]] = []
+_retired: Values = {}
+_metrics: Dict[str, '_Metric'] = {}
+
+
+def _merge(into: Values, values: Values):
+    for key, value in list(values.items()):
+        if isinstance(value, list):
+            total = into.get(key)
+            if total is None:
+                into[key] = list(value)
+            else:
+                for i, count in enumerate(value):
+                    total[i] += count
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _register() -> Values:
+    """Give the calling thread its shard, folding in the shards of finished threads"""
+    values: Values = {}
+    with _registry_lock:
+        live = []
+        for thread, shard in _shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _merge(_retired, shard)
+        live.append((threading.current_thread(), values))
+        _shards[:] = live
+    _local.values = values
+    return values
+
+
+def _totals() -> Values:
+    with _registry_lock:
+        shards = [_retired] + [shard for _, shard in _shards]
+    totals: Values = {}
+    for shard in shards:
+        _merge(totals, shard)
+    return totals
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: tuple) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        _metrics[name] = self
+
+    def render(self, totals: Values) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for (name, labels), value in sorted(totals.items(), key=lambda item: item[0]):
+            if name == self.name:
+                lines += self._samples(labels, value)
+        return lines
+
+    def _samples(self, labels: tuple, value) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    """Monotonic count, one series per combination of label values"""
+    kind = 'counter'
+
+    def inc(self, *labels, value: float = 1):
+        try:
+            values = _local.values
+        except AttributeError:
+            values = _register()
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + value
+
+
+class Tally(_Metric):
+    """Unlabeled counter for hot paths; bind inc once and each call is one C-level step"""
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._count = itertools.count()
+        self.inc = self._count.__next__
+        self._reads = 0  # Each read draws from the count too, so reads are subtracted back out
+        self._read_lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        with self._read_lock:
+            value = next(self._count) - self._reads
+            self._reads += 1
+        return value
+
+    def render(self, totals: Values) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}', f'{self.name} {self.value}']
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets, with their sum"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        try:
+            values = _local.values
+        except AttributeError:
+            values = _register()
+        key = (self.name, labels)
+        counts = values.get(key)
+        if counts is None:
+            counts = values[key] = [0] * (len(self.buckets) + 2)  # Per bucket, then +Inf, then the sum
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _samples(self, labels: tuple, counts: list) -> List[str]:
+        lines = []
+        bucket_labels = self.labels + ('le',)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _format_value(bound)
+            lines.append(f'{self.name}_bucket{_format_labels(bucket_labels, labels + (le,))} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(counts[-1])}')
+        lines.append(f'{self.name}_count{_format_labels(self.labels, labels)} {cumulative}')
+        return lines
+
+
+class Gauge(_Metric):
+    """Current value, read from a callback at export time"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str, read: Optional[Callable[[], float]] = None):
+        super().__init__(name, help)
+        self.read = read
+
+    def render(self, totals: Values) -> List[str]:
+        if self.read is None:
+            return []
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}',
+                f'{self.name} {_format_value(self.read())}']
+
+
+# Gameplay
+GAMES_STARTED = Counter('farkle_games_started_total', 'Games started', ('dice_set',))
+GAMES_FINISHED = Counter('farkle_games_finished_total', 'Games finished', ('dice_set', 'winner'))
+FARKLES = Counter('farkle_farkles_total', 'Rolls that scored nothing', ('dice_set', 'player'))
+HOT_DICE = Counter('farkle_hot_dice_total', 'Turns that scored with every die', ('dice_set', 'player'))
+BANKED_POINTS = Histogram('farkle_banked_points', 'Points per banked turn',
+                          (100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000), ('dice_set', 'player'))
+
+# Server
+RERUN_SECONDS = Histogram('farkle_rerun_seconds', 'Duration of complete app reruns',
+                          (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+SCORE_CALLS = Tally('farkle_score_calls_total', 'calculate_score calls')
+SESSIONS = Gauge('farkle_sessions', 'Live browser sessions')
+
+
+def render() -> str:
+    """Every metric in Prometheus text exposition format"""
+    totals = _totals()
+    lines = []
+    for metric in list(_metrics.values()):
+        lines += metric.render(totals)
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(path: str):
+    """Write the metrics to path atomically, for node_exporter's textfile collector"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.prom.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+def _handler():
+    """Request handler class for /metrics, defined on first use to keep http.server out of imports"""
+    from http.server import BaseHTTPRequestHandler
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return _Handler
+
+
+def start_exporter(path: Optional[str] = None, port: Optional[int] = None, host: str = '127.0.0.1',
+                   interval: float = 15.0) -> Optional['ThreadingHTTPServer']:
+    """
+    Export in the background: rewrite path every interval seconds and/or serve
+    /metrics on host:port. Returns the HTTP server, if one was started.
+    """
+    if path:
+        def write_loop():
+            while True:
+                try:
+                    write_textfile(path)
+                except OSError:
+                    pass
+                time.sleep(interval)
+
+        threading.Thread(target=write_loop, name='farkle-metrics-file', daemon=True).start()
+    server = None
+    if port is not None:
+        from http.server import ThreadingHTTPServer  # Costs tens of milliseconds, so only when serving
+        server = ThreadingHTTPServer((host, port), _handler())
+        threading.Thread(target=server.serve_forever, name='farkle-metrics-http', daemon=True).start()
+    return server
@@ -0,0 +1,48 @@
+"""
+Running model of a human player's banking habits, for the Adaptive computer.
+
+For each number of dice the next roll would use, the model keeps log-likelihood
+scores for a ladder of candidate bank thresholds. Every bank or roll-on decision
+adds to the candidates that would have made the same choice and takes from
+the rest, after decaying older evidence, so the model follows a player whose
+style changes. An update is one pass over the ladder, whatever the length of
+the game, and the whole model is one float array of a few hundred bytes.
+"""
+import math
+from array import array
+from typing import Tuple
+
+from farkle.scoring import NUM_DICE
+
+THRESHOLDS = (200, 250, 300, 350, 400, 500, 600, 750, 1000, 1500, 2000)
+DEFAULT_THRESHOLD = 350  # Believed until decisions say otherwise, and the tie-breaker
+DECAY = 0.9   # Weight left on earlier decisions at each new one with the same dice count
+SLIP = 0.15   # Chance a player goes against their own threshold
+_AGREE = math.log(1 - SLIP)
+_DISAGREE = math.log(SLIP)
+
+
+class OpponentModel:
+    """Decayed log-likelihood of each candidate bank threshold, per dice count to roll next"""
+    __slots__ = ('scores', 'decisions')
+
+    def __init__(self):
+        self.scores = array('f', bytes(4 * NUM_DICE * len(THRESHOLDS)))
+        self.decisions = 0
+
+    def observe(self, dice_next: int, turn_score: int, banked: bool):
+        """Record banking (or rolling on) with turn_score at stake and dice_next dice to roll otherwise"""
+        row = (min(dice_next, NUM_DICE) - 1) * len(THRESHOLDS)
+        scores = self.scores
+        for k, threshold in enumerate(THRESHOLDS):
+            scores[row + k] = scores[row + k] * DECAY + (_AGREE if (turn_score >= threshold) == banked else _DISAGREE)
+        self.decisions += 1
+
+    def thresholds(self) -> Tuple[int, ...]:
+        """Most likely bank threshold per dice count 1-6; ties go to the one nearest DEFAULT_THRESHOLD"""
+        best = []
+        for row in range(0, len(self.scores), len(THRESHOLDS)):
+            scores = self.scores[row:row + len(THRESHOLDS)]
+            k = max(range(len(THRESHOLDS)), key=lambda k: (scores[k], -abs(THRESHOLDS[k] - DEFAULT_THRESHOLD)))
+            best.append(THRESHOLDS[k])
+        return tuple(best)
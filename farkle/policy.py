@@ -0,0 +1,94 @@
+"""Compact value tables that drive the computer's bank/roll/keep decisions"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from farkle.ai import Decision
+from farkle.scoring import TARGET_SCORE, legal_keeps
+
+POLICY_VERSION = 1
+
+
+class PolicyTable:
+    """
+    Per dice set table of the chance to win when rolling on from a turn state.
+    Indexed [dice_remaining, turn_score, score, opponent_score] in step-point buckets,
+    stored as float32 while training and quantized to uint8 for shipping. Training
+    checkpoints also record how many self-play games each table has been trained on.
+    """
+
+    def __init__(self, tables: Dict[str, np.ndarray], step: int, episodes: Optional[Dict[str, int]] = None):
+        if step % 50 or TARGET_SCORE % step:
+            raise ValueError(f"Policy step must be a multiple of 50 dividing {TARGET_SCORE}, got {step}")
+        self.tables = tables
+        self.step = step
+        self.episodes = episodes or {}
+        self.n_scores = TARGET_SCORE // step
+
+    @classmethod
+    def load(cls, path: str) -> 'PolicyTable':
+        """Load a table written by save(); raises ValueError for an unknown format"""
+        with np.load(path) as data:
+            if int(data['version']) != POLICY_VERSION:
+                raise ValueError(f"Unsupported policy version {int(data['version'])} in {path}")
+            step = int(data['step'])
+            tables = {name[len('table_'):]: data[name] for name in data.files if name.startswith('table_')}
+            episodes = {name[len('episodes_'):]: int(data[name]) for name in data.files
+                        if name.startswith('episodes_')}
+        return cls(tables, step, episodes)
+
+    def save(self, path: str):
+        """Write all tables to a compressed .npz file"""
+        np.savez_compressed(
+            path,
+            version=np.int32(POLICY_VERSION),
+            step=np.int32(self.step),
+            **{f'table_{dice_set}': table for dice_set, table in self.tables.items()},
+            **{f'episodes_{dice_set}': np.int64(count) for dice_set, count in self.episodes.items()}
+        )
+
+    def quantized(self) -> 'PolicyTable':
+        """Copy with every table rounded to uint8 (1/255 resolution)"""
+        return PolicyTable({
+            dice_set: table if table.dtype == np.uint8 else np.round(table * 255).astype(np.uint8)
+            for dice_set, table in self.tables.items()
+        }, self.step)
+
+    def index(self, score: int, opponent_score: int, turn_score: int, dice_remaining: int) -> Tuple[int, int, int, int]:
+        """Table index for a turn state; scores are rounded to the nearest bucket"""
+        half = self.step // 2
+        return (
+            dice_remaining,
+            min((turn_score + half) // self.step, self.n_scores),
+            min((score + half) // self.step, self.n_scores - 1),
+            min((opponent_score + half) // self.step, self.n_scores - 1),
+        )
+
+    def roll_value(self, dice_set: str, score: int, opponent_score: int, turn_score: int,
+                   dice_remaining: int) -> float:
+        """Chance to win when rolling dice_remaining dice with turn_score at stake"""
+        if opponent_score >= TARGET_SCORE:
+            return 0.0
+        table = self.tables[dice_set]
+        value = float(table[self.index(score, opponent_score, turn_score, dice_remaining)])
+        return value / 255 if table.dtype == np.uint8 else value
+
+    def bank_value(self, dice_set: str, score: int, opponent_score: int, turn_score: int) -> float:
+        """Chance to win after banking turn_score"""
+        if score + turn_score >= TARGET_SCORE:
+            return 1.0
+        return 1 - self.roll_value(dice_set, opponent_score, score + turn_score, 0, 6)
+
+    def choose(self, dice_set: str, dice: List[int], score: int, opponent_score: int,
+               turn_score: int) -> Optional[Decision]:
+        """Best keep and bank/roll choice for a roll, or None when the roll farkled"""
+        best = None
+        for points, keep in legal_keeps(dice):
+            new_turn_score = turn_score + points
+            dice_remaining = len(dice) - len(keep) or 6  # Hot dice
+            bank = self.bank_value(dice_set, score, opponent_score, new_turn_score)
+            roll = self.roll_value(dice_set, score, opponent_score, new_turn_score, dice_remaining)
+            decision = Decision(keep, points, bank >= roll, max(bank, roll))
+            if best is None or decision.value > best.value:
+                best = decision
+        return best
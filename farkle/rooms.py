@@ -0,0 +1,256 @@
+"""
+Shared human-vs-human rooms.
+
+A room holds one game for up to MAX_ROOM_PLAYERS seated players plus any number of
+spectators, all in the same process. Seats belong to the session that took them,
+by its session id; player names are only shown. A session that leaves before the
+game starts gives its seat up; once the game is under way its seat stays, vacated,
+and turns skip it until the next game. Every change bumps the room's
+version and wakes everyone blocked in wait(). Pages compare the version, which
+is a single read, and only redraw once it has moved. Rendering reads view(),
+which is built once per version and shared by every session watching the room.
+"""
+import random
+import string
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from farkle.scoring import DICE_SETS, TARGET_SCORE, calculate_score, roll_dice
+
+MAX_ROOM_PLAYERS = 4
+ROOM_CODE_LENGTH = 4
+ROOM_IDLE_SECONDS = 3600  # Rooms untouched this long are dropped
+ROOM_HISTORY_LENGTH = 50
+
+
+class RoomView(NamedTuple):
+    """Immutable snapshot of a room at one version"""
+    code: str
+    version: int
+    dice_set: str
+    players: Tuple[str, ...]
+    seated: Tuple[bool, ...]  # False for players who left the game in progress
+    scores: Tuple[int, ...]
+    started: bool
+    current: int
+    turn_score: int
+    dice: Tuple[int, ...]
+    roll_points: int
+    remaining_dice: int
+    winner: Optional[int]
+    history: Tuple[str, ...]
+
+
+class Room:
+    """One shared game; actions raise ValueError when it is not the caller's move"""
+
+    def __init__(self, code: str, dice_set: str = 'standard', seed: Optional[int] = None):
+        if dice_set not in DICE_SETS:
+            raise ValueError(f"Unknown dice set {dice_set!r}")
+        self.code = code
+        self.dice_set = dice_set
+        self.version = 0
+        self.last_active = time.monotonic()
+        self.seats: List[Optional[str]] = []  # Session id holding each seat, None once vacated
+        self.players: List[str] = []  # Display name for each seat
+        self.scores: List[int] = []
+        self.started = False
+        self.current = 0
+        self.turn_score = 0
+        self.dice: List[int] = []
+        self.remaining_dice = 6
+        self.winner: Optional[int] = None
+        self.history: List[str] = []
+        self._rng = random.Random(seed)
+        self._changed = threading.Condition()
+        self._view: Optional[RoomView] = None
+
+    def _commit(self, *entries: str):
+        """Record a change; the caller holds the lock"""
+        self.history.extend(entries)
+        del self.history[:-ROOM_HISTORY_LENGTH]
+        self.version += 1
+        self.last_active = time.monotonic()
+        self._view = None
+        self._changed.notify_all()
+
+    def view(self) -> RoomView:
+        """Snapshot for rendering, shared by every caller until the next change"""
+        with self._changed:
+            if self._view is None:
+                self._view = RoomView(
+                    self.code, self.version, self.dice_set, tuple(self.players),
+                    tuple(seat is not None for seat in self.seats), tuple(self.scores),
+                    self.started, self.current, self.turn_score, tuple(self.dice),
+                    calculate_score(self.dice)[0], self.remaining_dice, self.winner, tuple(self.history)
+                )
+            return self._view
+
+    def wait(self, version: int, timeout: Optional[float] = None) -> bool:
+        """Block until the room moves past version; False on timeout"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version != version, timeout)
+
+    def close(self):
+        """Wake everyone watching; the registry has already dropped the room"""
+        with self._changed:
+            self._commit("🚪 Room closed")
+
+    def seat(self, session_id: str) -> Optional[int]:
+        """The seat a session holds, or None when it is spectating"""
+        with self._changed:
+            return self.seats.index(session_id) if session_id in self.seats else None
+
+    def join(self, session_id: str, name: str) -> Optional[int]:
+        """Seat a session under a display name, or return its existing seat; None means spectating"""
+        with self._changed:
+            if session_id in self.seats:
+                return self.seats.index(session_id)
+            if self.started or len(self.seats) >= MAX_ROOM_PLAYERS:
+                return None
+            self.seats.append(session_id)
+            self.players.append(name)
+            self.scores.append(0)
+            self._commit(f"👋 {name} joined")
+            return len(self.players) - 1
+
+    def leave(self, session_id: str) -> bool:
+        """Give up a session's seat; False if it held none"""
+        with self._changed:
+            if session_id not in self.seats:
+                return False
+            seat = self.seats.index(session_id)
+            name = self.players[seat]
+            if not self.started:
+                del self.seats[seat], self.players[seat], self.scores[seat]
+                self._commit(f"🚪 {name} left")
+                return True
+            self.seats[seat] = None
+            entry = f"🚪 {name} left the game"
+            remaining = [i for i, held in enumerate(self.seats) if held is not None]
+            if self.winner is None and len(remaining) == 1:
+                self.winner = remaining[0]
+                self._reset_turn()
+                self._commit(entry, f"🎉 {self.players[self.winner]} WINS THE GAME! 🎉")
+            elif self.winner is None and remaining and seat == self.current:
+                self._pass_turn(entry)
+            else:
+                self._commit(entry)
+            return True
+
+    def start(self):
+        """Start (or restart) the game with everyone seated"""
+        with self._changed:
+            if sum(held is not None for held in self.seats) < 2:
+                raise ValueError("A room needs at least two players")
+            kept = [i for i, held in enumerate(self.seats) if held is not None]
+            self.seats = [self.seats[i] for i in kept]
+            self.players = [self.players[i] for i in kept]
+            self.started = True
+            self.scores = [0] * len(self.players)
+            self.current = 0
+            self.winner = None
+            self._reset_turn()
+            self.history.clear()
+            self._commit(f"🎮 New game! {self.players[0]} rolls first")
+
+    def _reset_turn(self):
+        self.turn_score = 0
+        self.dice = []
+        self.remaining_dice = 6
+
+    def _check_turn(self, seat: int):
+        if not self.started or self.winner is not None:
+            raise ValueError("The game is not in progress")
+        if seat != self.current:
+            raise ValueError(f"It is {self.players[self.current]}'s turn")
+
+    def _pass_turn(self, *entries: str):
+        self._reset_turn()
+        self.current = next(i % len(self.seats) for i in range(self.current + 1, self.current + 1 + len(self.seats))
+                            if self.seats[i % len(self.seats)] is not None)
+        self._commit(*entries)
+
+    def roll(self, seat: int):
+        """Roll the remaining dice; a farkle passes the turn"""
+        with self._changed:
+            self._check_turn(seat)
+            if self.dice:
+                raise ValueError("Keep or bank the current roll first")
+            self.dice = roll_dice(self.remaining_dice, self.dice_set, self._rng)
+            name = self.players[seat]
+            if calculate_score(self.dice)[0] == 0:
+                self._pass_turn(f"🎯 {name} FARKLED {self.dice}! Lost {self.turn_score} points.")
+            else:
+                self._commit(f"🎲 {name} rolled {self.dice}")
+
+    def _keep_scoring_dice(self):
+        points, scoring_info = calculate_score(self.dice)
+        self.turn_score += points
+        self.remaining_dice -= sum(len(combo.dice) for combo in scoring_info)
+        self.dice = []
+        if self.remaining_dice == 0:  # Hot dice
+            self.remaining_dice = 6
+            return "🔥 HOT DICE! Roll all 6 again!"
+        return None
+
+    def keep(self, seat: int):
+        """Set the scoring dice aside and get ready to roll again"""
+        with self._changed:
+            self._check_turn(seat)
+            if not self.dice:
+                raise ValueError("Roll first")
+            hot_dice = self._keep_scoring_dice()
+            self._commit(*filter(None, (f"✋ {self.players[seat]} kept dice, {self.turn_score} at stake", hot_dice)))
+
+    def bank(self, seat: int):
+        """Bank the turn, including the current roll's scoring dice"""
+        with self._changed:
+            self._check_turn(seat)
+            if self.dice:
+                self._keep_scoring_dice()
+            if self.turn_score == 0:
+                raise ValueError("Nothing to bank yet")
+            name = self.players[seat]
+            self.scores[seat] += self.turn_score
+            entry = f"🏦 {name} BANKED {self.turn_score} POINTS"
+            if self.scores[seat] >= TARGET_SCORE:
+                self.winner = seat
+                self._reset_turn()
+                self._commit(entry, f"🎉 {name} WINS THE GAME! 🎉")
+            else:
+                self._pass_turn(entry)
+
+
+class RoomRegistry:
+    """Every open room in the process, by code"""
+
+    def __init__(self):
+        self._rooms: Dict[str, Room] = {}
+        self._lock = threading.Lock()
+
+    def create(self, dice_set: str = 'standard') -> Room:
+        with self._lock:
+            self._prune()
+            while True:
+                code = ''.join(random.choices(string.ascii_uppercase, k=ROOM_CODE_LENGTH))
+                if code not in self._rooms:
+                    break
+            room = self._rooms[code] = Room(code, dice_set)
+            return room
+
+    def get(self, code: str) -> Optional[Room]:
+        with self._lock:
+            return self._rooms.get(code.strip().upper())
+
+    def leave(self, session_id: str) -> int:
+        """Free every seat a session holds, e.g. once it has closed; returns how many"""
+        with self._lock:
+            rooms = list(self._rooms.values())
+        return sum(room.leave(session_id) for room in rooms)
+
+    def _prune(self):
+        cutoff = time.monotonic() - ROOM_IDLE_SECONDS
+        for code in [code for code, room in self._rooms.items() if room.last_active < cutoff]:
+            self._rooms.pop(code).close()
@@ -0,0 +1,298 @@
+"""Dice sets, scoring rules and roll probabilities"""
+import itertools
+import json
+import math
+import os
+import random
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from farkle import metrics
+
+# Dice sets
+DICE_SETS = {
+    'standard': [1, 2, 3, 4, 5, 6],
+    'lucky': [1, 1, 5, 5, 3, 6],  # More 1s and 5s
+    'odd': [3, 3, 4, 4, 1, 6],  # More 3s and 4s
+    'heavenly': [1, 5, 6, 1, 5, 6],  # Only 1s, 5s, 6s
+    'loaded': [6, 6, 5, 5, 1, 2],  # High numbers favored
+}
+BUILTIN_DICE_SETS = tuple(DICE_SETS)  # Snapshots store these by position, so only ever append
+MAX_DICE_SET_NAME = 64  # UTF-8 bytes; snapshots store other sets by name
+# Sets found by python -m farkle.design, added to DICE_SETS at import
+DESIGNED_DICE_SETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dice_sets.json')
+
+# Face characters for display, one dict shared by every session
+DICE_FACES = {
+    1: "⚀",
+    2: "⚁",
+    3: "⚂",
+    4: "⚃",
+    5: "⚄",
+    6: "⚅"
+}
+
+# Scoring rules
+SCORING_RULES = {
+    'single_1': 100,
+    'single_5': 50,
+    'three_1s': 1000,
+    'three_2s': 200,
+    'three_3s': 300,
+    'three_4s': 400,
+    'three_5s': 500,
+    'three_6s': 600,
+    'straight': 1000,
+    'three_pairs': 500,
+    'four_of_a_kind': 1000,
+    'five_of_a_kind': 2000,
+    'six_of_a_kind': 3000,
+}
+
+TARGET_SCORE = 10000
+NUM_DICE = 6  # Dice in a full roll; hot dice brings them all back. Engine tables also take other counts
+
+# A DICE_SETS name, or for the probability engine alone an unregistered set's faces
+DiceSet = Union[str, Tuple[int, ...]]
+
+
+def roll_dice(num_dice: int, dice_set: str, rng: Optional[random.Random] = None) -> List[int]:
+    """Roll specified number of dice from the selected dice set"""
+    if num_dice <= 0:
+        return []
+
+    dice_faces = DICE_SETS[dice_set]
+    choice = rng.choice if rng is not None else random.choice
+    return [choice(dice_faces) for _ in range(num_dice)]
+
+
+class ScoringCombo(NamedTuple):
+    """One scoring combination in a roll's breakdown"""
+    dice: Tuple[int, ...]
+    rule: str
+    points: int
+
+
+class RollRecord(NamedTuple):
+    """One computer roll kept in the roll history"""
+    dice: Tuple[int, ...]
+    score: int
+    scoring_info: Tuple[ScoringCombo, ...]
+    remaining_dice: int
+
+
+ScoreResult = Tuple[int, Tuple[ScoringCombo, ...]]
+
+
+# Process-wide intern tables shared by every session
+_COMBO_CACHE: Dict[ScoringCombo, ScoringCombo] = {}
+_SCORE_CACHE: Dict[Tuple[int, ...], ScoreResult] = {}
+_count_score_call = metrics.SCORE_CALLS.inc  # Bound once, so counting is a single C call
+
+
+def _combo(dice: Tuple[int, ...], rule: str, points: int) -> ScoringCombo:
+    """Return the shared ScoringCombo for these values"""
+    combo = ScoringCombo(dice, rule, points)
+    return _COMBO_CACHE.setdefault(combo, combo)
+
+
+def calculate_score(dice: List[int]) -> ScoreResult:
+    """
+    Calculate score for given dice and return possible scoring combinations.
+    Returns: (score, scoring_dice_info)
+
+    Results are interned per dice multiset, so identical rolls share the
+    same breakdown tuple and ScoringCombo records. The breakdown therefore lists
+    dice in sorted order, not as rolled: a straight always reads 1-6, and single
+    1s come before single 5s.
+    """
+    _count_score_call()
+    return _score_key(tuple(sorted(dice)))
+
+
+def _score_key(key: Tuple[int, ...]) -> ScoreResult:
+    """Interned score of a sorted dice tuple; the engine's own scoring goes here, uncounted"""
+    result = _SCORE_CACHE.get(key)
+    if result is None:
+        result = _SCORE_CACHE.setdefault(key, _score_sorted(key))
+    return result
+
+
+def _score_sorted(dice: Tuple[int, ...]) -> ScoreResult:
+    """Score a sorted dice tuple (uncached)"""
+    if not dice:
+        return 0, ()
+
+    dice_counts = {i: dice.count(i) for i in range(1, 7)}
+
+    # Check for straight (1-6)
+    if all(count == 1 for count in dice_counts.values()) and len(dice) == 6:
+        return SCORING_RULES['straight'], (
+            _combo(dice, 'straight', SCORING_RULES['straight']),
+        )
+
+    # Check for three pairs
+    pairs = [count for count in dice_counts.values() if count == 2]
+    if len(pairs) == 3 and len(dice) == 6:
+        return SCORING_RULES['three_pairs'], (
+            _combo(dice, 'three_pairs', SCORING_RULES['three_pairs']),
+        )
+
+    # Check for six of a kind; with more than six dice, extra matching dice score on their own
+    for value, count in dice_counts.items():
+        if count >= 6:
+            combo = _combo((value,) * 6, f'six_of_a_kind ({value}s)', SCORING_RULES['six_of_a_kind'])
+            rest_score, rest_info = _score_key(dice[:dice.index(value)] + dice[dice.index(value) + 6:])
+            return SCORING_RULES['six_of_a_kind'] + rest_score, (combo,) + rest_info
+
+    # Check for five, four and three of a kind, then score the remaining dice
+    for size, rule in ((5, 'five_of_a_kind'), (4, 'four_of_a_kind'), (3, None)):
+        for value, count in dice_counts.items():
+            if count == size:
+                if rule is None:
+                    rule_name = f'three_{value}s'
+                    points = SCORING_RULES[rule_name]
+                else:
+                    rule_name = f'{rule} ({value}s)'
+                    points = SCORING_RULES[rule]
+                combo = _combo((value,) * size, rule_name, points)
+
+                remaining_dice = tuple(v for v in dice if v != value)
+                single_score, single_info = _score_key(remaining_dice)
+                return points + single_score, (combo,) + single_info
+
+    # Check for single 1s and 5s
+    score = 0
+    scoring_info = []
+    for die in dice:
+        if die == 1:
+            score += SCORING_RULES['single_1']
+            scoring_info.append(_combo((1,), 'single_1', SCORING_RULES['single_1']))
+        elif die == 5:
+            score += SCORING_RULES['single_5']
+            scoring_info.append(_combo((5,), 'single_5', SCORING_RULES['single_5']))
+
+    return score, tuple(scoring_info)
+
+
+def can_score(dice: List[int]) -> bool:
+    """Check if any scoring combination exists in the dice"""
+    score, _ = calculate_score(dice)
+    return score > 0
+
+
+@lru_cache(maxsize=None)
+def _keep_table(max_dice: int = NUM_DICE) -> Dict[Tuple[int, ...], int]:
+    """Points for every sorted dice multiset of up to max_dice that is a legal keep (every die scores)"""
+    table = {}
+    for size in range(1, max_dice + 1):
+        for keep in itertools.combinations_with_replacement(range(1, 7), size):
+            score, scoring_info = _score_key(tuple(sorted(keep)))
+            if score > 0 and sum(len(combo.dice) for combo in scoring_info) == size:
+                table[keep] = score
+    return table
+
+
+def build_keep_index(dice: List[int]) -> Tuple[int, ...]:
+    """
+    Index a roll by selected-subset mask (bit i = die i kept).
+    Returns the points for each mask, 0 where the selection is not a legal keep.
+    """
+    table = _keep_table(max(len(dice), NUM_DICE))
+    return tuple(
+        table.get(tuple(sorted(d for i, d in enumerate(dice) if mask >> i & 1)), 0)
+        for mask in range(1 << len(dice))
+    )
+
+
+def legal_keeps(dice: List[int]) -> Tuple[Tuple[int, Tuple[int, ...]], ...]:
+    """Distinct legal keeps of a roll as (points, kept dice), one per points and dice count"""
+    return _legal_keeps(tuple(sorted(dice)))
+
+
+@lru_cache(maxsize=None)
+def _legal_keeps(dice: Tuple[int, ...]) -> Tuple[Tuple[int, Tuple[int, ...]], ...]:
+    table = _keep_table(max(len(dice), NUM_DICE))
+    keeps = {}
+    for size in range(len(dice), 0, -1):
+        for kept in itertools.combinations(dice, size):
+            points = table.get(kept)
+            if points:
+                keeps.setdefault((points, size), kept)
+    return tuple((points, kept) for (points, _), kept in keeps.items())
+
+
+def dice_set_faces(dice_set: DiceSet) -> List[int]:
+    """Faces of a dice set given by name or as a tuple of faces"""
+    return list(dice_set) if isinstance(dice_set, tuple) else DICE_SETS[dice_set]
+
+
+def roll_multisets(num_dice: int, dice_set: DiceSet) -> Dict[Tuple[int, ...], float]:
+    """
+    Exact distribution of the sorted dice a roll can show, for any number of dice.
+    Enumerates face-count vectors over the set's distinct faces with multinomial
+    weights: C(n + k - 1, k - 1) outcomes for k distinct faces (3,003 for ten
+    standard dice) instead of 6^n ordered rolls.
+    """
+    faces = dice_set_faces(dice_set)
+    values = sorted(set(faces))
+    multiplicity = [faces.count(value) for value in values]
+    outcomes = {}
+    for value_idx in itertools.combinations_with_replacement(range(len(values)), num_dice):
+        ways = math.factorial(num_dice)
+        for idx in set(value_idx):
+            count = value_idx.count(idx)
+            ways = ways * multiplicity[idx] ** count // math.factorial(count)
+        outcomes[tuple(values[i] for i in value_idx)] = ways / len(faces) ** num_dice
+    return outcomes
+
+
+@lru_cache(maxsize=None)
+def roll_outcomes(num_dice: int, dice_set: DiceSet) -> Dict[Tuple[int, int], float]:
+    """
+    Exact outcome distribution for rolling num_dice from a dice set.
+    Returns: {(points, scoring_dice_count): probability}; (0, 0) is the farkle mass
+    """
+    outcomes = {}
+    for dice, p in roll_multisets(num_dice, dice_set).items():
+        score, scoring_info = _score_key(dice)
+        key = (score, sum(len(combo.dice) for combo in scoring_info))
+        outcomes[key] = outcomes.get(key, 0.0) + p
+    return outcomes
+
+
+def farkle_probability(num_dice: int, dice_set: DiceSet) -> float:
+    """Chance that a roll of num_dice scores nothing"""
+    return roll_outcomes(num_dice, dice_set).get((0, 0), 0.0)
+
+
+def check_faces(faces) -> List[int]:
+    """A dice set's faces, validated: six die values from 1 to 6 (replays assume six-faced dice)"""
+    faces = list(faces)
+    if len(faces) != 6 or any(type(face) is not int or face not in DICE_FACES for face in faces):
+        raise ValueError(f"A dice set needs six faces from 1 to 6, got {faces}")
+    return faces
+
+
+def register_dice_set(name: str, faces) -> None:
+    """Add a dice set; results are cached by name, so a name's faces can never change"""
+    faces = check_faces(faces)
+    if not name or len(name.encode()) > MAX_DICE_SET_NAME:
+        raise ValueError(f"A dice set name needs 1 to {MAX_DICE_SET_NAME} bytes, got {name!r}")
+    if DICE_SETS.get(name, faces) != faces:
+        raise ValueError(f"Dice set {name!r} already has faces {DICE_SETS[name]}")
+    DICE_SETS[name] = faces
+
+
+@lru_cache(maxsize=None)
+def designed_dice_sets(path: str = DESIGNED_DICE_SETS_PATH) -> Dict[str, dict]:
+    """Designed set entries (faces, description, statistics) by name; empty without the file"""
+    try:
+        with open(path) as f:
+            return json.load(f)['dice_sets']
+    except FileNotFoundError:
+        return {}
+
+
+for _name, _entry in designed_dice_sets().items():
+    register_dice_set(_name, _entry['faces'])
@@ -0,0 +1,314 @@
+"""
+HTTP/JSON game engine API for bots and load generators.
+
+Each game is a player-vs-computer game on the same state transitions the app
+uses, kept in memory in a dict keyed by game id, so every request is an O(1)
+lookup and a few microseconds of engine work. The server is a single asyncio
+loop over a minimal HTTP/1.1 parser (keep-alive, JSON bodies), stdlib only.
+When the player's turn ends the computer plays its whole turn before the
+response is sent, so every response is the player's move or the final result.
+Every table a computer turn reads is solved or loaded before the server starts
+listening, so no request stalls the event loop on a solve.
+
+    POST   /games               {"dice_set": "standard", "difficulty": "normal", "seed": 1}
+    GET    /games/<id>
+    POST   /games/<id>/roll
+    POST   /games/<id>/keep     {"dice": [1, 5]}   (default: every scoring die)
+    POST   /games/<id>/bank     {"dice": [1, 5]}   (default: every scoring die)
+    DELETE /games/<id>
+    GET    /metrics             (Prometheus text)
+
+    python -m farkle.server --port 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+
+from farkle import metrics
+from farkle.ai import DIFFICULTY_LEVELS, computer_turn_step
+from farkle.endgame import ENDGAME_POINTS, reach_probability
+from farkle.scoring import DICE_SETS, calculate_score, legal_keeps
+from farkle.state import (
+    GameState,
+    close_game_history,
+    new_game_state,
+    player_bank,
+    player_keep,
+    player_roll,
+    reset_turn,
+    start_new_game,
+)
+
+MAX_GAMES = 10000
+GAME_IDLE_SECONDS = 3600  # Games untouched this long make room for new ones
+HISTORY_KEPT = 20         # Turn history entries kept per game
+MAX_BODY_BYTES = 64 * 1024
+
+Response = Tuple[int, Any]
+
+
+class GameRegistry:
+    """Every game in the server, least recently used first"""
+
+    def __init__(self, policy=None, max_games: int = MAX_GAMES, idle_seconds: float = GAME_IDLE_SECONDS):
+        self.policy = policy
+        self.max_games = max_games
+        self.idle_seconds = idle_seconds
+        self._games: 'OrderedDict[str, GameState]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def create(self, dice_set: str = 'standard', difficulty: str = 'normal',
+               seed: Optional[int] = None) -> Tuple[str, GameState]:
+        if dice_set not in DICE_SETS:
+            raise ValueError(f"Unknown dice set {dice_set!r}")
+        if difficulty not in DIFFICULTY_LEVELS:
+            raise ValueError(f"Unknown difficulty {difficulty!r}")
+        self._evict()
+        if len(self._games) >= self.max_games:
+            raise OverflowError("Too many games in progress")
+        state = new_game_state()
+        state['selected_dice_set'] = dice_set
+        state['difficulty'] = difficulty
+        state['last_computer_turn'] = []
+        start_new_game(state, seed)
+        game_id = secrets.token_hex(6)
+        state['last_active'] = time.monotonic()
+        self._games[game_id] = state
+        return game_id, state
+
+    def get(self, game_id: str) -> Optional[GameState]:
+        state = self._games.get(game_id)
+        if state is None:
+            return None
+        self._games.move_to_end(game_id)
+        state['last_active'] = time.monotonic()
+        return state
+
+    def delete(self, game_id: str):
+        del self._games[game_id]
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._games:
+            game_id, state = next(iter(self._games.items()))
+            if state['last_active'] >= cutoff:
+                break
+            del self._games[game_id]
+
+    def roll(self, state: GameState):
+        _check_move(state)
+        if state['dice']:
+            raise ValueError("Keep or bank the current roll first")
+        if not player_roll(state):
+            self._computer_turn(state)
+
+    def keep(self, state: GameState, dice: Optional[List[int]] = None):
+        _check_move(state)
+        keep, points = _select(state, dice)
+        player_keep(state, keep, points)
+
+    def bank(self, state: GameState, dice: Optional[List[int]] = None):
+        _check_move(state)
+        keep, points = _select(state, dice) if state['dice'] else ([], 0)
+        if state['turn_score'] + points == 0:
+            raise ValueError("Nothing to bank yet")
+        player_bank(state, keep, points)
+        if state['game_state'] != 'game_over':
+            self._computer_turn(state)
+        close_game_history(state)
+
+    def _computer_turn(self, state: GameState):
+        """Play the computer's whole turn, as the app does one roll per rerun"""
+        state['computer_turn_in_progress'] = True  # The app's START COMPUTER TURN
+        while computer_turn_step(state, self.policy, state['difficulty']):
+            pass
+        state['last_computer_turn'] = [{'dice': list(roll.dice), 'points': roll.score}
+                                       for roll in state['computer_roll_history']]
+        state['current_player'] = 'player'
+        reset_turn(state)
+        del state['turn_history'][:-HISTORY_KEPT]
+        close_game_history(state)
+
+
+def _check_move(state: GameState):
+    if state['game_state'] != 'playing':
+        raise ValueError("The game is over")
+
+
+def _select(state: GameState, dice: Optional[List[int]]) -> Tuple[List[int], int]:
+    """Kept dice and their points from the current roll; every scoring die by default"""
+    if not state['dice']:
+        raise ValueError("Roll first")
+    if dice is None:
+        points, scoring_info = calculate_score(state['dice'])
+        return [d for combo in scoring_info for d in combo.dice], points
+    mask, unused = 0, list(enumerate(state['dice']))
+    for die in dice:
+        index = next((i for i, d in unused if d == die), None)
+        if index is None:
+            raise ValueError(f"{dice} are not all in the roll {state['dice']}")
+        unused.remove((index, die))
+        mask |= 1 << index
+    points = state['keep_index'][mask]
+    if not points:
+        raise ValueError(f"Every kept die must score; {dice} do not")
+    return list(dice), points
+
+
+def game_view(game_id: str, state: GameState) -> Dict[str, Any]:
+    """JSON body describing a game from the player's side"""
+    over = state['game_state'] == 'game_over'
+    return {
+        'id': game_id,
+        'dice_set': state['selected_dice_set'],
+        'difficulty': state['difficulty'],
+        'over': over,
+        'winner': state['game_history'][-1].get('winner') if over else None,
+        'player_score': state['player_score'],
+        'computer_score': state['computer_score'],
+        'turn_score': state['turn_score'],
+        'dice': state['dice'],
+        'remaining_dice': state['remaining_dice'],
+        'keeps': [{'dice': list(keep), 'points': points} for points, keep in legal_keeps(state['dice'])],
+        'last_computer_turn': state['last_computer_turn'],
+        'history': state['turn_history'][-5:],
+    }
+
+
+class GameServer:
+    """Routes requests to a GameRegistry"""
+
+    def __init__(self, registry: GameRegistry):
+        self.registry = registry
+
+    def dispatch(self, method: str, path: str, body: bytes) -> Response:
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        if parts == ['metrics'] and method == 'GET':
+            return 200, metrics.render()
+        if not parts or parts[0] != 'games' or len(parts) > 3:
+            return 404, {'error': 'Not found'}
+        try:
+            args = json.loads(body) if body else {}
+            if not isinstance(args, dict):
+                raise ValueError("Expected a JSON object")
+            if len(parts) == 1:
+                if method != 'POST':
+                    return 405, {'error': 'Use POST to create a game'}
+                game_id, state = self.registry.create(
+                    args.get('dice_set', 'standard'), args.get('difficulty', 'normal'), args.get('seed')
+                )
+                return 201, game_view(game_id, state)
+
+            game_id = parts[1]
+            state = self.registry.get(game_id)
+            if state is None:
+                return 404, {'error': 'No such game'}
+            action = parts[2] if len(parts) == 3 else None
+            if action is None and method == 'GET':
+                return 200, game_view(game_id, state)
+            if action is None and method == 'DELETE':
+                self.registry.delete(game_id)
+                return 200, {'id': game_id, 'deleted': True}
+            if action == 'roll' and method == 'POST':
+                self.registry.roll(state)
+            elif action in ('keep', 'bank') and method == 'POST':
+                getattr(self.registry, action)(state, args.get('dice'))
+            elif action in (None, 'roll', 'keep', 'bank'):
+                return 405, {'error': f"{method} not allowed here"}
+            else:
+                return 404, {'error': 'Not found'}
+            return 200, game_view(game_id, state)
+        except OverflowError as e:
+            return 503, {'error': str(e)}
+        except (ValueError, TypeError) as e:
+            return 400, {'error': str(e)}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one connection, request after request while the client keeps it alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'Body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                status, payload = self.dispatch(method, target, body)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # Malformed request or the client went away
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        if isinstance(payload, str):
+            data, content_type = payload.encode(), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            data, content_type = json.dumps(payload, separators=(',', ':')).encode(), 'application/json'
+        connection = '' if keep_alive else 'Connection: close\r\n'
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n{connection}\r\n")
+        writer.write(head.encode() + data)
+        await writer.drain()
+
+
+def load_engine_tables():
+    """Solve or load the Adaptive computer's response tables and warm the endgame cache, for every dice set"""
+    from farkle.hints import load_response_tables  # NumPy only once the server starts
+    load_response_tables()
+    for dice_set in DICE_SETS:
+        reach_probability(ENDGAME_POINTS, 6, 0, dice_set)
+
+
+async def serve(host: str, port: int, registry: GameRegistry):
+    server = GameServer(registry)
+    async with await asyncio.start_server(server.handle, host, port, backlog=1024) as listener:
+        print(f"Serving the Farkle engine on http://{host}:{port}", flush=True)
+        await listener.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve the game engine as an HTTP/JSON API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-games', type=int, default=MAX_GAMES)
+    parser.add_argument('--policy', default=os.environ.get('FARKLE_POLICY', 'farkle_policy.npz'),
+                        help="Policy table for the hard and expert computers (they play Normal without one)")
+    args = parser.parse_args(argv)
+
+    policy = None
+    if os.path.exists(args.policy):
+        from farkle.policy import PolicyTable
+        policy = PolicyTable.load(args.policy)
+    print("Loading the computer's tables...", flush=True)
+    load_engine_tables()
+    try:
+        asyncio.run(serve(args.host, args.port, GameRegistry(policy, args.max_games)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+Headless batch simulator: plays computer-vs-computer games without the UI,
+aggregates them into constant-memory stats and optionally streams one row per
+game, per turn or per decision to CSV or Parquet. Decision logs are what
+python -m farkle.analyze grades against the solver tables.
+
+Games are split into fixed-size chunks, each seeded from --seed and its first game
+number, so results do not depend on the worker count. Finished chunks are written
+and merged as they arrive, so memory stays flat however many games are played.
+
+    python -m farkle.simulate --games 100000 --strategy normal --strategy bank-at:350 \\
+        --workers 4 --seed 1 --per turn --out results.parquet
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from farkle.ai import TRAINED_LEVELS, Strategy, parse_strategy
+from farkle.scoring import DICE_SETS, TARGET_SCORE, roll_dice
+from farkle.stats import DiceSetStats, SimulationStats
+
+# Output columns and their types, per row kind
+TURN_COLUMNS = (
+    ('game', 'int'), ('dice_set', 'str'), ('turn', 'int'), ('player', 'int'), ('strategy', 'str'),
+    ('score', 'int'), ('opponent_score', 'int'), ('points', 'int'), ('rolls', 'int'),
+    ('farkled', 'bool'), ('hot_dice', 'int'),
+)
+GAME_COLUMNS = (
+    ('game', 'int'), ('dice_set', 'str'), ('strategy_0', 'str'), ('strategy_1', 'str'),
+    ('first_player', 'int'), ('winner', 'int'), ('score_0', 'int'), ('score_1', 'int'), ('turns', 'int'),
+)
+# Dice and keep are digit strings, e.g. '113456' and '115'
+DECISION_COLUMNS = (
+    ('game', 'int'), ('dice_set', 'str'), ('player', 'str'), ('score', 'int'), ('opponent_score', 'int'),
+    ('turn_score', 'int'), ('dice', 'str'), ('keep', 'str'), ('bank', 'bool'),
+)
+COLUMNS = {'game': GAME_COLUMNS, 'turn': TURN_COLUMNS, 'decision': DECISION_COLUMNS}
+
+
+class TurnRecord(NamedTuple):
+    """One turn: points is the turn total reached, banked unless farkled"""
+    turn: int
+    player: int
+    score: int
+    opponent_score: int
+    points: int
+    rolls: int
+    farkled: bool
+    hot_dice: int
+
+
+class GameResult(NamedTuple):
+    winner: int
+    scores: Tuple[int, int]
+    turns: List[TurnRecord]
+
+
+def play_turn(strategy: Strategy, dice_set: str, score: int, opponent_score: int,
+              rng: random.Random, stats: Optional[DiceSetStats] = None,
+              decisions: Optional[list] = None,
+              decision_rng: Optional[random.Random] = None) -> Tuple[int, int, bool, int]:
+    """
+    Play one turn: (turn points, rolls, farkled, hot dice count). Dice come from
+    rng, and the strategy's own random choices from decision_rng (rng if None).
+    Appends (turn score, dice, decision) for every scoring roll to decisions if given.
+    """
+    turn_score, dice_remaining, rolls, hot_dice = 0, 6, 0, 0
+    while True:
+        dice = roll_dice(dice_remaining, dice_set, rng)
+        rolls += 1
+        decision = strategy(dice_set, dice, score, opponent_score, turn_score, decision_rng or rng)
+        if stats is not None:
+            hot = decision is not None and len(decision.keep) == dice_remaining
+            stats.add_roll(dice_remaining, decision is None, hot)
+        if decision is None:
+            return turn_score, rolls, True, hot_dice
+        if decisions is not None:
+            decisions.append((turn_score, dice, decision))
+
+        turn_score += decision.points
+        dice_remaining -= len(decision.keep)
+        if dice_remaining == 0:  # Hot dice
+            dice_remaining = 6
+            hot_dice += 1
+        if decision.bank:
+            return turn_score, rolls, False, hot_dice
+
+
+def play_game(strategies: Sequence[Strategy], dice_set: str, rng: random.Random,
+              first_player: int = 0, stats: Optional[DiceSetStats] = None,
+              decisions: Optional[list] = None,
+              decision_rng: Optional[random.Random] = None) -> GameResult:
+    """
+    Play strategies[0] against strategies[1] until one reaches TARGET_SCORE.
+    Dice come from rng and the strategies' random choices from decision_rng (rng if None).
+    Appends (player, score, opponent score, turn score, dice, decision) per decision to decisions if given.
+    """
+    scores = [0, 0]
+    turns = []
+    player = first_player
+    while True:
+        score, opponent_score = scores[player], scores[1 - player]
+        turn_decisions = [] if decisions is not None else None
+        points, rolls, farkled, hot_dice = play_turn(
+            strategies[player], dice_set, score, opponent_score, rng, stats, turn_decisions, decision_rng
+        )
+        if turn_decisions:
+            decisions.extend((player, score, opponent_score) + d for d in turn_decisions)
+        turns.append(TurnRecord(len(turns), player, score, opponent_score, points, rolls, farkled, hot_dice))
+        if stats is not None:
+            stats.add_turn(points, rolls, farkled)
+        if not farkled:
+            scores[player] += points
+            if scores[player] >= TARGET_SCORE:
+                if stats is not None:
+                    stats.add_game(player, len(turns))
+                return GameResult(player, (scores[0], scores[1]), turns)
+        player = 1 - player
+
+
+_STRATEGIES: List[Strategy] = []
+
+
+def _init_worker(specs: Sequence[str], policy_path: Optional[str]):
+    """Build the strategies once per process; policy tables are too big to send per chunk"""
+    policy = None
+    if policy_path:
+        from farkle.policy import PolicyTable
+        policy = PolicyTable.load(policy_path)
+    _STRATEGIES[:] = [parse_strategy(spec, policy) for spec in specs]
+
+
+def _simulate_chunk(args: Tuple[int, int, str, Tuple[str, str], int, Optional[str]]
+                    ) -> Tuple[List[tuple], SimulationStats]:
+    """Worker entry point: play a chunk of games, returning its rows (per 'game', 'turn' or 'decision') and stats"""
+    start, count, dice_set, specs, seed, per = args
+    rng = random.Random(f'{seed}:{dice_set}:{start}')
+    rows = []
+    stats = SimulationStats()
+    dice_set_stats = stats.get(dice_set)
+    for game in range(start, start + count):
+        first_player = game % 2  # Alternate who opens
+        decisions = [] if per == 'decision' else None
+        result = play_game(_STRATEGIES, dice_set, rng, first_player, dice_set_stats, decisions)
+        if per is None:
+            continue
+        elif per == 'decision':
+            rows.extend(
+                (game, dice_set, specs[player], score, opponent_score, turn_score,
+                 ''.join(map(str, dice)), ''.join(map(str, decision.keep)), decision.bank)
+                for player, score, opponent_score, turn_score, dice, decision in decisions
+            )
+        elif per == 'turn':
+            rows.extend(
+                (game, dice_set, t.turn, t.player, specs[t.player], t.score, t.opponent_score,
+                 t.points, t.rolls, t.farkled, t.hot_dice)
+                for t in result.turns
+            )
+        else:
+            rows.append((game, dice_set, specs[0], specs[1], first_player, result.winner,
+                         result.scores[0], result.scores[1], len(result.turns)))
+    return rows, stats
+
+
+class CsvSink:
+    """Appends row chunks to a CSV file ('-' for stdout)"""
+
+    def __init__(self, path: str, columns: Sequence[Tuple[str, str]]):
+        self.file = sys.stdout if path == '-' else open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(name for name, _ in columns)
+
+    def write(self, rows: List[tuple]):
+        self.writer.writerows(rows)
+
+    def close(self):
+        if self.file is sys.stdout:
+            self.file.flush()
+        else:
+            self.file.close()
+
+
+class ParquetSink:
+    """Appends each row chunk to a Parquet file as a row group"""
+
+    def __init__(self, path: str, columns: Sequence[Tuple[str, str]]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow; write a .csv file instead") from None
+        types = {'int': pa.int64(), 'str': pa.dictionary(pa.int32(), pa.string()), 'bool': pa.bool_()}
+        self.pa = pa
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows: List[tuple]):
+        if rows:
+            arrays = [
+                self.pa.array(column).cast(field.type) for column, field in zip(zip(*rows), self.schema)
+            ]
+            self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_sink(path: str, columns: Sequence[Tuple[str, str]], output_format: Optional[str] = None):
+    """CSV or Parquet sink, chosen by output_format or the file extension"""
+    if output_format is None:
+        output_format = 'parquet' if path.endswith(('.parquet', '.pq')) else 'csv'
+    return (ParquetSink if output_format == 'parquet' else CsvSink)(path, columns)
+
+
+def simulate(games: int, dice_set: str, specs: Tuple[str, str], out: Optional[str] = None,
+             per: str = 'game', workers: int = 1, seed: int = 0, chunk_games: int = 1000,
+             policy_path: Optional[str] = None, output_format: Optional[str] = None,
+             progress: Optional[Callable[[SimulationStats], None]] = None) -> SimulationStats:
+    """
+    Play games, streaming rows to out when given, and return the merged stats.
+    progress is called with the running totals after every chunk.
+    """
+    jobs = [
+        (start, min(chunk_games, games - start), dice_set, specs, seed, per if out else None)
+        for start in range(0, games, chunk_games)
+    ]
+    sink = open_sink(out, COLUMNS[per], output_format) if out else None
+    stats = SimulationStats()
+
+    def collect(rows: List[tuple], chunk_stats: SimulationStats):
+        if sink is not None:
+            sink.write(rows)
+        stats.merge(chunk_stats)
+        if progress is not None:
+            progress(stats)
+
+    try:
+        if workers > 1:
+            with Pool(workers, _init_worker, (specs, policy_path)) as pool:
+                for result in pool.imap(_simulate_chunk, jobs):
+                    collect(*result)
+        else:
+            _init_worker(specs, policy_path)
+            for job in jobs:
+                collect(*_simulate_chunk(job))
+    finally:
+        if sink is not None:
+            sink.close()
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Simulate computer-vs-computer Farkle games without the UI")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--dice-set', default='standard', choices=list(DICE_SETS))
+    parser.add_argument('--strategy', action='append', metavar='NAME',
+                        help="easy, normal, hard, expert, adaptive, bank-at:<points> or respond-to:<points>; "
+                             "give once for a mirror match or twice for player 0 vs player 1 (default: normal)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--per', choices=list(COLUMNS), default='game',
+                        help="One output row per game, per turn or per decision")
+    parser.add_argument('--chunk', type=int, default=1000, help="Games per worker task and per write")
+    parser.add_argument('--format', choices=('csv', 'parquet'), help="Output format (default: from --out)")
+    parser.add_argument('--policy', default=os.environ.get('FARKLE_POLICY', 'farkle_policy.npz'),
+                        help="Policy table for the hard and expert strategies")
+    parser.add_argument('--out', help="Row output file, or - for CSV on stdout (default: stats only)")
+    parser.add_argument('--report-every', type=float, default=30.0, metavar='SECONDS',
+                        help="Print the running stats this often during long runs")
+    args = parser.parse_args(argv)
+
+    specs = args.strategy or ['normal']
+    if len(specs) > 2:
+        parser.error("--strategy takes at most two strategies")
+    specs = (specs[0], specs[-1])
+    if args.games < 1 or args.chunk < 1:
+        parser.error("--games and --chunk must be positive")
+
+    policy_path = None
+    if any(spec in TRAINED_LEVELS for spec in specs):
+        if not os.path.exists(args.policy):
+            parser.error(f"{args.policy} not found; train one with python -m farkle.train")
+        policy_path = args.policy
+    try:
+        _init_worker(specs, policy_path)  # Validate the strategies before starting workers
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    next_report = started + args.report_every
+
+    def progress(stats: SimulationStats):
+        nonlocal next_report
+        now = time.perf_counter()
+        if now >= next_report:
+            next_report = now + args.report_every
+            print(f"[{now - started:.0f}s]\n{stats.report(list(specs))}", file=sys.stderr)
+
+    stats = simulate(args.games, args.dice_set, specs, args.out, args.per, args.workers,
+                     args.seed, args.chunk, policy_path, args.format, progress)
+    elapsed = time.perf_counter() - started
+    print(f"{args.games} games in {elapsed:.1f}s ({args.games / elapsed:.0f} games/s)\n"
+          f"{stats.report(list(specs))}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
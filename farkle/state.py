@@ -0,0 +1,349 @@
+"""Game state transitions and compact binary snapshots"""
+import base64
+import random
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, MutableMapping, Optional
+
+from farkle import metrics
+from farkle.opponent import OpponentModel
+from farkle.scoring import (
+    BUILTIN_DICE_SETS,
+    DICE_SETS,
+    NUM_DICE,
+    TARGET_SCORE,
+    build_keep_index,
+    can_score,
+    roll_dice,
+)
+from farkle.timeline import Timeline
+
+# Game state is any mutable mapping with the keys of new_game_state(), e.g. a dict
+# or Streamlit's session state
+GameState = MutableMapping[str, Any]
+
+SNAPSHOT_VERSION = 1
+GAME_STATES = ('setup', 'playing', 'game_over')
+_SNAPSHOT_HEADER = struct.Struct('<BBBBIIIIIIB')
+_FLAG_COMPUTER = 1
+_FLAG_COMPUTER_ROLLING = 2
+MAX_RNG_POSITION = 100000  # Dice a snapshot may have rolled; a real game rolls a few thousand at most
+_NAMED_DICE_SET = 255  # Dice set id of a set outside BUILTIN_DICE_SETS, stored by name after the dice
+
+
+def new_game_state(seed: Optional[int] = None) -> Dict[str, Any]:
+    """State before the first game starts"""
+    state = {
+        'game_state': 'setup',
+        'player_score': 0,
+        'computer_score': 0,
+        'turn_score': 0,
+        'dice': [1, 2, 3, 4, 5, 6],
+        'kept_dice': [],
+        'remaining_dice': 6,
+        'current_player': 'player',
+        'turn_history': [],
+        'game_history': [],
+        'selected_dice_set': 'standard',
+        'computer_dice': [],
+        'computer_turn_in_progress': False,
+        'computer_roll_history': [],
+        'computer_current_roll_score': 0,
+        'computer_total_turn_score': 0,
+        'keep_index': (),
+        'keep_mask': 0,
+        'timeline': Timeline(),
+        'opponent_model': OpponentModel(),  # The player's banking habits, kept across games
+    }
+    seed_rng(state, seed)
+    return state
+
+
+def seed_rng(state: GameState, seed: Optional[int] = None):
+    """Give the game a fresh seeded dice RNG"""
+    state['rng_seed'] = random.getrandbits(32) if seed is None else seed
+    state['rng_position'] = 0
+    state['rng'] = random.Random(state['rng_seed'])
+
+
+def roll_turn_dice(state: GameState, num_dice: int) -> List[int]:
+    """Roll from the game's seeded RNG and advance its recorded position"""
+    dice = roll_dice(num_dice, state['selected_dice_set'], state['rng'])
+    state['rng_position'] += len(dice)
+    return dice
+
+
+def reset_computer_turn(state: GameState):
+    """Reset computer turn state"""
+    state['computer_dice'] = []
+    state['computer_roll_history'] = []
+    state['computer_current_roll_score'] = 0
+    state['computer_total_turn_score'] = 0
+    state['computer_turn_in_progress'] = True
+
+
+def reset_turn(state: GameState):
+    """Reset for a new turn"""
+    state['turn_score'] = 0
+    state['dice'] = []
+    state['kept_dice'] = []
+    state['remaining_dice'] = 6
+    state['computer_dice'] = []
+    state['computer_roll_history'] = []
+    state['computer_current_roll_score'] = 0
+    state['computer_total_turn_score'] = 0
+    state['computer_turn_in_progress'] = False
+
+
+def player_roll(state: GameState) -> bool:
+    """Roll the player's remaining dice; a farkle passes the turn. Returns whether the roll scores"""
+    state['dice'] = roll_turn_dice(state, state['remaining_dice'])
+    state['keep_index'] = build_keep_index(state['dice'])
+    state['keep_mask'] = 0
+    if not can_score(state['dice']):
+        player_farkle(state)
+        return False
+    return True
+
+
+def player_farkle(state: GameState):
+    """End the player's turn with nothing banked and hand over to the computer"""
+    metrics.FARKLES.inc(state['selected_dice_set'], 'player')
+    state['turn_history'].append(f"🎯 PLAYER FARKLED! Lost {state['turn_score']} points.")
+    state['turn_score'] = 0
+    state['remaining_dice'] = 6  # The computer starts with all six, not the player's leftovers
+    state['current_player'] = 'computer'
+    reset_computer_turn(state)
+
+
+def player_keep(state: GameState, keep: List[int], points: int):
+    """Set kept dice worth points aside and get ready to roll the rest"""
+    state['kept_dice'].extend(keep)
+    state['turn_score'] += points
+    state['remaining_dice'] -= len(keep)
+    if state['remaining_dice'] == 0:  # Hot dice
+        state['remaining_dice'] = 6
+        metrics.HOT_DICE.inc(state['selected_dice_set'], 'player')
+        state['turn_history'].append("🔥 🔥 HOT DICE! Roll all 6 again! 🔥")
+    state['dice'] = []
+    state['opponent_model'].observe(state['remaining_dice'], state['turn_score'], False)
+
+
+def player_bank(state: GameState, keep: List[int], points: int):
+    """Bank the turn plus kept dice worth points; the game ends or the computer plays next"""
+    banked = state['turn_score'] + points
+    state['opponent_model'].observe(state['remaining_dice'] - len(keep) or 6, banked, True)
+    state['player_score'] += banked
+    metrics.BANKED_POINTS.observe(banked, state['selected_dice_set'], 'player')
+    state['turn_history'].append(f"🏦 PLAYER BANKED {banked} POINTS")
+    if state['player_score'] >= TARGET_SCORE:
+        state['game_state'] = 'game_over'
+        state['turn_history'].append("🎉 🎉 PLAYER WINS THE GAME! 🎉 🎉")
+    else:
+        state['current_player'] = 'computer'
+        reset_computer_turn(state)
+    reset_turn(state)
+
+
+def start_new_game(state: GameState, seed: Optional[int] = None):
+    """Initialize a new game, its dice seeded with seed (random if None)"""
+    state['player_score'] = 0
+    state['computer_score'] = 0
+    state['game_state'] = 'playing'
+    state['current_player'] = 'player'
+    state['turn_history'] = []
+    state['turn_score'] = 0
+    state['dice'] = []
+    state['kept_dice'] = []
+    state['remaining_dice'] = 6
+    state['computer_dice'] = []
+    state['computer_roll_history'] = []
+    state['computer_current_roll_score'] = 0
+    state['computer_total_turn_score'] = 0
+    state['computer_turn_in_progress'] = False
+    seed_rng(state, seed)
+    state['timeline'] = Timeline()
+    metrics.GAMES_STARTED.inc(state['selected_dice_set'])
+    open_game_history(state)
+
+
+def open_game_history(state: GameState):
+    """Start the current game's history entry, which close_game_history fills in when it ends"""
+    state['game_history'].append({
+        'start_time': datetime.now().strftime("%H:%M:%S"),
+        'player_score': state['player_score'],
+        'computer_score': state['computer_score']
+    })
+
+
+def close_game_history(state: GameState) -> Optional[Dict[str, Any]]:
+    """
+    Fill in the final scores and winner of the current game's history entry once
+    the game is over. Returns the entry the first time, None otherwise.
+    """
+    if state['game_state'] != 'game_over' or not state['game_history']:
+        return None
+    entry = state['game_history'][-1]
+    if 'winner' in entry:
+        return None
+    entry.update(
+        end_time=datetime.now().strftime("%H:%M:%S"),
+        player_score=state['player_score'],
+        computer_score=state['computer_score'],
+        dice_set=state['selected_dice_set'],
+        winner='player' if state['player_score'] >= TARGET_SCORE else 'computer',
+    )
+    metrics.GAMES_FINISHED.inc(entry['dice_set'], entry['winner'])
+    return entry
+
+
+def pack_game_state(state: Mapping[str, Any]) -> bytes:
+    """
+    Pack the game state into a versioned binary snapshot.
+    Layout: fixed header, then dice, kept_dice and computer_dice as length-prefixed bytes,
+    then for a dice set outside BUILTIN_DICE_SETS its length-prefixed UTF-8 name.
+    """
+    dice_set = state['selected_dice_set']
+    if dice_set in BUILTIN_DICE_SETS:
+        dice_set_id, name = BUILTIN_DICE_SETS.index(dice_set), b''
+    else:
+        dice_set_id, name = _NAMED_DICE_SET, dice_set.encode()  # At most MAX_DICE_SET_NAME bytes
+    flags = 0
+    if state['current_player'] == 'computer':
+        flags |= _FLAG_COMPUTER
+    if state['computer_turn_in_progress']:
+        flags |= _FLAG_COMPUTER_ROLLING
+
+    header = _SNAPSHOT_HEADER.pack(
+        SNAPSHOT_VERSION,
+        flags,
+        GAME_STATES.index(state['game_state']),
+        dice_set_id,
+        state['player_score'],
+        state['computer_score'],
+        state['turn_score'],
+        state['computer_total_turn_score'],
+        state['rng_seed'],
+        state['rng_position'],
+        state['remaining_dice'],
+    )
+    body = b''.join(
+        bytes((len(dice_list),)) + bytes(dice_list)
+        for dice_list in (state['dice'], state['kept_dice'], state['computer_dice'])
+    )
+    return header + body + (bytes((len(name),)) + name if name else b'')
+
+
+def unpack_game_state(data: bytes) -> Dict[str, Any]:
+    """Inverse of pack_game_state; raises ValueError on a malformed or unknown snapshot"""
+    try:
+        (version, flags, game_state, dice_set, player_score, computer_score, turn_score,
+         computer_total_turn_score, rng_seed, rng_position, remaining_dice) = _SNAPSHOT_HEADER.unpack_from(data)
+    except struct.error as e:
+        raise ValueError(f"Truncated game snapshot: {e}") from e
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported game snapshot version {version}")
+
+    dice_lists = []
+    offset = _SNAPSHOT_HEADER.size
+    for _ in range(3):
+        if offset >= len(data):
+            raise ValueError("Truncated game snapshot")
+        count = data[offset]
+        dice_list = list(data[offset + 1:offset + 1 + count])
+        if len(dice_list) != count or not all(1 <= d <= 6 for d in dice_list):
+            raise ValueError("Invalid dice in game snapshot")
+        dice_lists.append(dice_list)
+        offset += 1 + count
+
+    if dice_set == _NAMED_DICE_SET:
+        count = data[offset] if offset < len(data) else 0
+        try:
+            dice_set_name = data[offset + 1:offset + 1 + count].decode()
+        except UnicodeDecodeError:
+            dice_set_name = ''
+        if len(dice_set_name.encode()) != count or dice_set_name not in DICE_SETS:
+            raise ValueError("Unknown dice set in game snapshot")
+    elif dice_set < len(BUILTIN_DICE_SETS):
+        dice_set_name = BUILTIN_DICE_SETS[dice_set]
+    else:
+        raise ValueError("Invalid dice set in game snapshot")
+    if game_state >= len(GAME_STATES) or not 0 <= remaining_dice <= 6:
+        raise ValueError("Invalid field in game snapshot")
+    if rng_position > MAX_RNG_POSITION:  # Loading replays the RNG this far
+        raise ValueError(f"Game snapshot has rolled {rng_position} dice, more than {MAX_RNG_POSITION}")
+    dice, kept_dice, computer_dice = dice_lists
+    if len(dice) > NUM_DICE or len(computer_dice) > NUM_DICE:  # Loading indexes every keep of the roll
+        raise ValueError("Game snapshot rolls more than six dice")
+    # Kept dice pile up across hot dice, so only their count modulo six must match
+    if GAME_STATES[game_state] == 'playing' and not flags & _FLAG_COMPUTER and (
+            dice and len(dice) != remaining_dice or (len(kept_dice) + remaining_dice) % NUM_DICE):
+        raise ValueError("Game snapshot dice do not match its remaining dice")
+
+    return {
+        'game_state': GAME_STATES[game_state],
+        'current_player': 'computer' if flags & _FLAG_COMPUTER else 'player',
+        'computer_turn_in_progress': bool(flags & _FLAG_COMPUTER_ROLLING),
+        'selected_dice_set': dice_set_name,
+        'player_score': player_score,
+        'computer_score': computer_score,
+        'turn_score': turn_score,
+        'computer_total_turn_score': computer_total_turn_score,
+        'rng_seed': rng_seed,
+        'rng_position': rng_position,
+        'remaining_dice': remaining_dice,
+        'dice': dice_lists[0],
+        'kept_dice': dice_lists[1],
+        'computer_dice': dice_lists[2],
+    }
+
+
+def encode_snapshot(state: Mapping[str, Any]) -> str:
+    """Snapshot the game as unpadded base64url, small enough for a query parameter"""
+    return base64.urlsafe_b64encode(pack_game_state(state)).rstrip(b'=').decode('ascii')
+
+
+def decode_snapshot(token: str) -> Dict[str, Any]:
+    """Decode an encode_snapshot token; raises ValueError if it is not a valid snapshot"""
+    try:
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid game snapshot encoding: {e}") from e
+    return unpack_game_state(data)
+
+
+def record_step(state: GameState) -> bool:
+    """Add the current state to the game's timeline; False if nothing changed"""
+    return state['timeline'].append(pack_game_state(state))
+
+
+def restore_snapshot(state: GameState, token: str):
+    """
+    Load an encode_snapshot token into the game state. A game still in progress gets
+    a history entry, so it is recorded once finished; a finished one is not counted again.
+    """
+    load_snapshot(state, decode_snapshot(token))
+    if state['game_state'] == 'playing':
+        open_game_history(state)
+
+
+def load_snapshot(state: GameState, snapshot: Mapping[str, Any]):
+    """
+    Load an unpacked snapshot into the game state and replay the RNG to its recorded
+    position, which unpack_game_state caps at MAX_RNG_POSITION
+    """
+    if not 0 <= snapshot['rng_position'] <= MAX_RNG_POSITION:
+        raise ValueError(f"RNG position {snapshot['rng_position']} is beyond {MAX_RNG_POSITION}")
+    if len(snapshot['dice']) > NUM_DICE:
+        raise ValueError(f"Snapshot rolls {len(snapshot['dice'])} dice, more than {NUM_DICE}")
+    rng = random.Random(snapshot['rng_seed'])
+    for _ in range(snapshot['rng_position']):
+        rng.randrange(6)  # Same draw as choice() on any six-faced set in DICE_SETS
+
+    for key, value in snapshot.items():
+        state[key] = value
+    state['rng'] = rng
+    state['keep_index'] = build_keep_index(snapshot['dice'])
+    state['keep_mask'] = 0
+    state['computer_roll_history'] = []
+    state['computer_current_roll_score'] = 0
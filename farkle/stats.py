@@ -0,0 +1,186 @@
+"""
+Constant-memory aggregates for simulation runs.
+
+Nothing here keeps raw results: means and variances are updated online (Welford),
+turn scores go into fixed-width histograms and everything else is a counter, so
+an aggregate is a few kilobytes however many games it has seen. Aggregates built
+in separate processes merge into the same totals, and report() can be called at
+any point mid-run.
+"""
+import math
+from typing import Dict, List, Optional
+
+from farkle.scoring import DICE_SETS
+
+HISTOGRAM_WIDTH = 50  # Every score is a multiple of 50
+HISTOGRAM_BINS = 60   # Turn scores of 3000+ share the overflow bin
+
+
+class RunningStats:
+    """Count, mean, variance, min and max of a stream (Welford's algorithm)"""
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other: 'RunningStats'):
+        """Fold another stream's stats in (Chan et al. pairwise update)"""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class Histogram:
+    """Fixed-width bins from 0, with the last bin collecting everything beyond"""
+    __slots__ = ('width', 'counts')
+
+    def __init__(self, width: int = HISTOGRAM_WIDTH, bins: int = HISTOGRAM_BINS):
+        self.width = width
+        self.counts = [0] * (bins + 1)
+
+    def add(self, x: int):
+        self.counts[min(x // self.width, len(self.counts) - 1)] += 1
+
+    def merge(self, other: 'Histogram'):
+        if other.width != self.width or len(other.counts) != len(self.counts):
+            raise ValueError("Can only merge histograms with the same bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def quantile(self, q: float) -> int:
+        """Lower edge of the bin holding the q-th quantile"""
+        target = q * sum(self.counts)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return i * self.width
+        return 0
+
+
+class DiceSetStats:
+    """Aggregates for one dice set; roll, farkle and hot dice counters are indexed by dice rolled (1-6)"""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = [0, 0]
+        self.turns = 0
+        self.farkled_turns = 0
+        self.rolls = [0] * 7
+        self.farkles = [0] * 7
+        self.hot_dice = [0] * 7  # Rolls whose keep used every die rolled
+        self.turn_points = RunningStats()  # Points banked per turn, 0 on a farkle
+        self.turn_histogram = Histogram()
+        self.rolls_per_turn = RunningStats()
+        self.game_turns = RunningStats()
+
+    def add_roll(self, dice_rolled: int, farkled: bool, hot_dice: bool = False):
+        self.rolls[dice_rolled] += 1
+        if farkled:
+            self.farkles[dice_rolled] += 1
+        elif hot_dice:
+            self.hot_dice[dice_rolled] += 1
+
+    def add_turn(self, points: int, rolls: int, farkled: bool):
+        banked = 0 if farkled else points
+        self.turns += 1
+        self.farkled_turns += farkled
+        self.turn_points.add(banked)
+        self.turn_histogram.add(banked)
+        self.rolls_per_turn.add(rolls)
+
+    def add_game(self, winner: int, turns: int):
+        self.games += 1
+        self.wins[winner] += 1
+        self.game_turns.add(turns)
+
+    def merge(self, other: 'DiceSetStats'):
+        self.games += other.games
+        self.wins = [a + b for a, b in zip(self.wins, other.wins)]
+        self.turns += other.turns
+        self.farkled_turns += other.farkled_turns
+        self.rolls = [a + b for a, b in zip(self.rolls, other.rolls)]
+        self.farkles = [a + b for a, b in zip(self.farkles, other.farkles)]
+        self.hot_dice = [a + b for a, b in zip(self.hot_dice, other.hot_dice)]
+        self.turn_points.merge(other.turn_points)
+        self.turn_histogram.merge(other.turn_histogram)
+        self.rolls_per_turn.merge(other.rolls_per_turn)
+        self.game_turns.merge(other.game_turns)
+
+    def farkle_rates(self) -> List[Optional[float]]:
+        """Share of rolls that farkled, for 1-6 dice (None before any roll of that size)"""
+        return [self.farkles[n] / self.rolls[n] if self.rolls[n] else None for n in range(1, 7)]
+
+    def hot_dice_rates(self) -> List[Optional[float]]:
+        """Share of rolls that went on to hot dice, for 1-6 dice (None before any roll of that size)"""
+        return [self.hot_dice[n] / self.rolls[n] if self.rolls[n] else None for n in range(1, 7)]
+
+
+class SimulationStats:
+    """Per dice set aggregates for a whole run"""
+
+    def __init__(self):
+        self.by_dice_set: Dict[str, DiceSetStats] = {}
+
+    def get(self, dice_set: str) -> DiceSetStats:
+        if dice_set not in DICE_SETS:
+            raise ValueError(f"Unknown dice set {dice_set!r}")
+        stats = self.by_dice_set.get(dice_set)
+        if stats is None:
+            stats = self.by_dice_set[dice_set] = DiceSetStats()
+        return stats
+
+    def merge(self, other: 'SimulationStats'):
+        for dice_set, stats in other.by_dice_set.items():
+            self.get(dice_set).merge(stats)
+
+    def report(self, strategies: Optional[List[str]] = None) -> str:
+        """Plain-text summary of everything seen so far"""
+        lines = []
+        for dice_set, s in self.by_dice_set.items():
+            lines.append(f"{dice_set}: {s.games} games, {s.turns} turns")
+            if s.games:
+                names = strategies or ['player 0', 'player 1']
+                lines.append(
+                    f"  wins: {names[0]} {s.wins[0] / s.games:.1%}, {names[1]} {s.wins[1] / s.games:.1%}; "
+                    f"turns per game {s.game_turns.mean:.1f} ± {s.game_turns.std:.1f}"
+                )
+            if s.turns:
+                lines.append(
+                    f"  points per turn {s.turn_points.mean:.1f} ± {s.turn_points.std:.1f} "
+                    f"(median {s.turn_histogram.quantile(0.5)}, p90 {s.turn_histogram.quantile(0.9)}, "
+                    f"max {s.turn_points.max:.0f}); farkled turns {s.farkled_turns / s.turns:.1%}; "
+                    f"hot dice per turn {sum(s.hot_dice) / s.turns:.3f}; rolls per turn {s.rolls_per_turn.mean:.2f}"
+                )
+                for label, rates in (('farkle', s.farkle_rates()), ('hot dice', s.hot_dice_rates())):
+                    rates = ', '.join(f"{n}: {rate:.1%}" for n, rate in enumerate(rates, start=1) if rate is not None)
+                    lines.append(f"  {label} rate by dice rolled: {rates}")
+        return '\n'.join(lines)
@@ -0,0 +1,260 @@
+"""
+SQLite store for finished games, per-player stats and leaderboards.
+
+Writes never block the caller: record_game() queues the game and a background
+thread inserts queued games in batches, one transaction per batch. A trigger keeps
+the per player and dice set aggregates in player_stats up to date, so leaderboards
+read a small indexed table instead of scanning every stored game. The player's
+keep and bank decisions are logged the same way, for python -m farkle.analyze.
+The database runs in WAL mode, so reads proceed while a batch is being written.
+A batch that fails to write is logged and retried, then dropped, and records
+that arrive while the queue is full are dropped too, so a broken database costs
+history rather than the app.
+"""
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+ALL_DICE_SETS = '*'  # player_stats key for totals across every dice set
+WRITE_ATTEMPTS = 3  # Tries per batch before it is dropped
+RETRY_SECONDS = 0.5  # Pause before retrying a failed batch, doubled each time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    opponent TEXT NOT NULL,
+    dice_set TEXT NOT NULL,
+    won INTEGER NOT NULL,
+    player_score INTEGER NOT NULL,
+    opponent_score INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_player ON games (player, finished_at);
+
+CREATE TABLE IF NOT EXISTS player_stats (
+    player TEXT NOT NULL,
+    dice_set TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    PRIMARY KEY (player, dice_set)
+);
+CREATE INDEX IF NOT EXISTS player_stats_leaderboard ON player_stats (dice_set, wins DESC, games);
+
+-- One row per player and dice set, plus an ALL_DICE_SETS row per player
+CREATE TRIGGER IF NOT EXISTS games_player_stats AFTER INSERT ON games BEGIN
+    INSERT INTO player_stats
+    SELECT NEW.player, dice_set, 1, NEW.won, NEW.player_score, NEW.player_score
+    FROM (SELECT NEW.dice_set AS dice_set UNION ALL SELECT '*') WHERE true
+    ON CONFLICT (player, dice_set) DO UPDATE SET
+        games = games + 1,
+        wins = wins + NEW.won,
+        points = points + NEW.player_score,
+        best_score = max(best_score, NEW.player_score);
+END;
+
+-- Dice and keep are digit strings, e.g. '113456' and '115'
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    dice_set TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    opponent_score INTEGER NOT NULL,
+    turn_score INTEGER NOT NULL,
+    dice TEXT NOT NULL,
+    keep TEXT NOT NULL,
+    bank INTEGER NOT NULL,
+    decided_at REAL NOT NULL
+);
+"""
+
+
+class GameRecord(NamedTuple):
+    """One finished game from the player's side"""
+    player: str
+    opponent: str
+    dice_set: str
+    won: bool
+    player_score: int
+    opponent_score: int
+    finished_at: float
+
+
+class DecisionRecord(NamedTuple):
+    """One keep and bank/roll choice, with the scores it was made at"""
+    player: str
+    dice_set: str
+    score: int
+    opponent_score: int
+    turn_score: int
+    dice: str
+    keep: str
+    bank: bool
+    decided_at: float
+
+
+INSERT_SQL = {
+    GameRecord: 'INSERT INTO games (player, opponent, dice_set, won, player_score, opponent_score, finished_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+    DecisionRecord: 'INSERT INTO decisions (player, dice_set, score, opponent_score, turn_score, dice, keep, '
+                    'bank, decided_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+}
+
+
+class PlayerStats(NamedTuple):
+    player: str
+    games: int
+    wins: int
+    points: int
+    best_score: int
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a connection in WAL mode"""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')  # Durable at checkpoints; safe from corruption in WAL mode
+    return conn
+
+
+class GameStore:
+    """
+    Shared by every session in a process: one connection for reads and one owned
+    by the writer thread. Queued games are written within flush_interval seconds,
+    or sooner once batch_size have piled up. At most max_queued records wait at
+    once; dropped counts the records lost to a full queue or a failed batch.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0, max_queued: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._read = connect(path)
+        self._read.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(max_queued)
+        self._writer = threading.Thread(target=self._write_loop, name='farkle-store-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def record_game(self, record: GameRecord):
+        """Queue a finished game for the next batch"""
+        self._enqueue(record)
+
+    def record_decision(self, record: DecisionRecord):
+        """Queue a player decision for the next batch"""
+        self._enqueue(record)
+
+    def _enqueue(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Store queue full, dropped %s", type(record).__name__)
+
+    def flush(self):
+        """Block until every game queued so far is written, or given up on"""
+        if not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(1.0):
+            if not self._writer.is_alive():
+                return
+
+    def close(self):
+        """Write out the queue and stop the writer"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        running = True
+        while running:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    running = False
+                    break
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break  # Someone is waiting on this batch
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write_batch(conn, batch)
+            finally:
+                for waiter in waiters:
+                    waiter.set()
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list):
+        """Insert a batch in one transaction, retrying on errors; logs and drops it if every try fails"""
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                with conn:
+                    for kind in INSERT_SQL:
+                        rows = [record for record in batch if type(record) is kind]
+                        if rows:
+                            conn.executemany(INSERT_SQL[kind], rows)
+                return
+            except sqlite3.Error:
+                logger.exception("Writing %d records failed (attempt %d of %d)", len(batch), attempt + 1,
+                                 WRITE_ATTEMPTS)
+                if attempt + 1 < WRITE_ATTEMPTS:
+                    time.sleep(RETRY_SECONDS * 2 ** attempt)
+        self.dropped += len(batch)
+        logger.error("Dropped %d records after %d failed attempts", len(batch), WRITE_ATTEMPTS)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._read_lock:
+            return self._read.execute(sql, params).fetchall()
+
+    def leaderboard(self, dice_set: Optional[str] = None, limit: int = 10) -> List[PlayerStats]:
+        """Players with the most wins, for one dice set or across all of them"""
+        rows = self._query(
+            'SELECT player, games, wins, points, best_score FROM player_stats '
+            'WHERE dice_set = ? ORDER BY wins DESC, games LIMIT ?',
+            (dice_set or ALL_DICE_SETS, limit)
+        )
+        return [PlayerStats(*row) for row in rows]
+
+    def player_stats(self, player: str, dice_set: Optional[str] = None) -> PlayerStats:
+        """A player's totals, for one dice set or across all of them"""
+        rows = self._query(
+            'SELECT player, games, wins, points, best_score FROM player_stats WHERE player = ? AND dice_set = ?',
+            (player, dice_set or ALL_DICE_SETS)
+        )
+        return PlayerStats(*rows[0]) if rows else PlayerStats(player, 0, 0, 0, 0)
+
+    def recent_games(self, player: str, limit: int = 10) -> List[GameRecord]:
+        """A player's latest finished games, newest first"""
+        rows = self._query(
+            'SELECT player, opponent, dice_set, won, player_score, opponent_score, finished_at FROM games '
+            'WHERE player = ? ORDER BY finished_at DESC LIMIT ?',
+            (player, limit)
+        )
+        return [GameRecord(player, opponent, dice_set, bool(won), *rest)
+                for player, opponent, dice_set, won, *rest in rows]
@@ -0,0 +1,34 @@
+"""On-disk cache for precomputed NumPy tables"""
+import os
+import tempfile
+import zlib
+from typing import Callable
+
+import numpy as np
+
+# Tables are memory-mapped from here, so every process on a host shares one copy
+TABLE_DIR = os.environ.get('FARKLE_TABLE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'farkle'))
+
+
+def cached_table(name: str, fingerprint: object, build: Callable[[], np.ndarray]) -> np.ndarray:
+    """
+    Load a table from TABLE_DIR, building and saving it on a miss.
+    fingerprint covers everything the table depends on; changing it starts a new file.
+    Falls back to the in-memory table if the directory is not writable.
+    """
+    path = os.path.join(TABLE_DIR, f"{name}-{zlib.crc32(repr(fingerprint).encode()):08x}.npy")
+    try:
+        return np.load(path, mmap_mode='r')
+    except (OSError, ValueError):
+        pass
+
+    table = build()
+    try:
+        os.makedirs(TABLE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=TABLE_DIR, suffix='.npy')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, table)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return table
@@ -0,0 +1,104 @@
+"""
+Compact per-game timeline of packed game snapshots for stepping back and forth.
+
+Every KEYFRAME_INTERVAL-th step is stored whole; the steps in between are stored
+as byte deltas against the previous step, usually a handful of bytes since most
+actions change only a score, a counter and the dice. Seeking starts from the
+nearest keyframe, so it applies at most KEYFRAME_INTERVAL - 1 deltas. Stored steps
+are immutable bytes, so truncating or copying a timeline shares them.
+"""
+from typing import List, Optional
+
+KEYFRAME_INTERVAL = 16
+_MERGE_GAP = 2  # Unchanged bytes absorbed into a run rather than starting a new one
+
+
+def diff_bytes(old: bytes, new: bytes) -> bytes:
+    """
+    Delta turning old into new: the new length, then (offset, length, data) runs.
+    Snapshots are well under 256 bytes, so every field is one byte.
+    """
+    if len(new) > 255:
+        raise ValueError("diff_bytes only handles inputs under 256 bytes")
+    old = old[:len(new)].ljust(len(new), b'\0')
+    changed = [i for i in range(len(new)) if old[i] != new[i]]
+    runs = [len(new)]
+    i = 0
+    while i < len(changed):
+        start = end = changed[i]
+        i += 1
+        while i < len(changed) and changed[i] - end <= _MERGE_GAP + 1:
+            end = changed[i]
+            i += 1
+        runs += (start, end - start + 1)
+        runs += new[start:end + 1]
+    return bytes(runs)
+
+
+def apply_delta(old: bytes, delta: bytes) -> bytes:
+    """Inverse of diff_bytes"""
+    length = delta[0]
+    data = bytearray(old[:length].ljust(length, b'\0'))
+    i = 1
+    while i < len(delta):
+        offset, count = delta[i], delta[i + 1]
+        data[offset:offset + count] = delta[i + 2:i + 2 + count]
+        i += 2 + count
+    return bytes(data)
+
+
+class Timeline:
+    """Every distinct snapshot of one game, in order"""
+    __slots__ = ('keyframes', 'deltas', '_last')
+
+    def __init__(self):
+        self.keyframes: List[bytes] = []
+        self.deltas: List[bytes] = []  # deltas[i] rebuilds step i from step i - 1; b'' at keyframes
+        self._last: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self.deltas)
+
+    def append(self, snapshot: bytes) -> bool:
+        """Record a step unless nothing changed since the last one"""
+        if snapshot == self._last:
+            return False
+        if len(self.deltas) % KEYFRAME_INTERVAL == 0:
+            self.keyframes.append(snapshot)
+            self.deltas.append(b'')
+        else:
+            self.deltas.append(diff_bytes(self._last, snapshot))
+        self._last = snapshot
+        return True
+
+    def __getitem__(self, step: int) -> bytes:
+        """Snapshot at a step; negative steps count from the end"""
+        if step < 0:
+            step += len(self.deltas)
+        if not 0 <= step < len(self.deltas):
+            raise IndexError(f"Timeline step {step} out of range")
+        first = step - step % KEYFRAME_INTERVAL
+        snapshot = self.keyframes[first // KEYFRAME_INTERVAL]
+        for delta in self.deltas[first + 1:step + 1]:
+            snapshot = apply_delta(snapshot, delta)
+        return snapshot
+
+    def truncate(self, length: int):
+        """Drop every step from length on, e.g. to continue play from an earlier point"""
+        if length <= 0:
+            self.keyframes, self.deltas, self._last = [], [], None
+            return
+        self._last = self[length - 1]
+        del self.deltas[length:]
+        del self.keyframes[(length - 1) // KEYFRAME_INTERVAL + 1:]
+
+    def tail(self, count: int) -> 'Timeline':
+        """A new timeline holding only the last count steps"""
+        tail = Timeline()
+        for step in range(max(len(self) - count, 0), len(self)):
+            tail.append(self[step])
+        return tail
+
+    def nbytes(self) -> int:
+        """Bytes of snapshot data held"""
+        return sum(map(len, self.keyframes)) + sum(map(len, self.deltas))
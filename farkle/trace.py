@@ -0,0 +1,67 @@
+"""
+Recorded app sessions ("traces") for deterministic replay.
+
+A trace is the seed a browser session drew its games from, the query string it
+opened with, and every button press and widget change in order. Dice and the
+computer's own choices come from the session seed, so replaying the same
+actions against the same seed has to end in the same game. The final state is
+stored with the trace to check that against. Traces are written by the app
+when FARKLE_TRACE_DIR is set and replayed by replay_traces.py.
+"""
+import json
+import os
+import tempfile
+from typing import Any, Dict, Mapping, Optional
+
+from farkle.state import encode_snapshot
+
+TRACE_VERSION = 1
+HISTORY_CHECKED = 20  # Trailing turn history entries compared on replay
+
+Trace = Dict[str, Any]
+
+
+def new_trace(seed: int, query: Optional[Mapping[str, str]] = None) -> Trace:
+    """Empty trace for a session seeded with seed"""
+    return {'version': TRACE_VERSION, 'seed': seed, 'query': dict(query or {}), 'actions': [], 'final': None}
+
+
+def button_action(label: str, key: Optional[str] = None) -> Dict[str, str]:
+    """A button press, found again by key or else by label"""
+    return {'button': label, 'key': key} if key else {'button': label}
+
+
+def widget_action(key: str, value: Any) -> Dict[str, Any]:
+    """A keyed widget set to value"""
+    return {'widget': key, 'value': value}
+
+
+def trace_state(state: Mapping[str, Any]) -> Dict[str, Any]:
+    """What a replay must reproduce exactly: the game snapshot, recent history and the opponent model"""
+    model = state['opponent_model']
+    return {
+        'snapshot': encode_snapshot(state) if state['game_state'] != 'setup' else None,
+        'difficulty': state['difficulty'],
+        'turn_history': list(state['turn_history'][-HISTORY_CHECKED:]),
+        'opponent_model': [model.decisions, list(model.thresholds())],
+    }
+
+
+def write_trace(path: str, trace: Trace):
+    """Write a trace in one step, so a reader never sees half of one"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(trace, f, indent=1, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def load_trace(path: str) -> Trace:
+    """Read a trace file; raises ValueError if it is not a complete trace"""
+    with open(path, encoding='utf-8') as f:
+        trace = json.load(f)
+    if trace.get('version') != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version {trace.get('version')} in {path}")
+    if trace.get('final') is None or not isinstance(trace.get('actions'), list):
+        raise ValueError(f"Incomplete trace {path}")
+    return trace
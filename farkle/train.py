@@ -0,0 +1,175 @@
+"""
+Self-play trainer for the computer's policy table.
+
+Both players share one value table and play epsilon-greedy games. After every
+roll, the value of the state the dice were rolled from moves towards the best
+outcome the roll allows (Q-learning on afterstates). Each worker process trains
+its own copy of the table online for a batch of games, and the master averages
+the copies back into one table between batches. Checkpoints record the games
+played per dice set, and every batch is seeded from its position in the run, so
+a resumed run picks up where it stopped and plays the same games it would have.
+
+    python -m farkle.train --dice-set standard --episodes 200000 --workers 4
+"""
+import argparse
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from farkle.policy import PolicyTable
+from farkle.scoring import DICE_SETS, TARGET_SCORE, legal_keeps, roll_dice, roll_outcomes
+
+
+def initial_policy(dice_sets: List[str], step: int) -> PolicyTable:
+    """
+    Starting tables from a one-roll lookahead: the lead after the expected result
+    of the next roll, mapped linearly onto a win chance.
+    """
+    n_scores = TARGET_SCORE // step
+    turn = np.arange(n_scores + 1)[:, None, None] * step
+    lead = (np.arange(n_scores)[:, None] - np.arange(n_scores)[None, :]) * step
+    tables = {}
+    for dice_set in dice_sets:
+        table = np.full((7, n_scores + 1, n_scores, n_scores), 0.5, dtype=np.float32)
+        for dice_remaining in range(1, 7):
+            outcomes = roll_outcomes(dice_remaining, dice_set)
+            keep_p = 1 - outcomes.get((0, 0), 0.0)
+            expected_points = sum(points * p for (points, _), p in outcomes.items())
+            expected_lead = lead + keep_p * turn + expected_points
+            table[dice_remaining] = np.clip(0.5 + 0.5 * expected_lead / TARGET_SCORE, 0, 1)
+        tables[dice_set] = table
+    return PolicyTable(tables, step)
+
+
+def play_episode(policy: PolicyTable, dice_set: str, rng: random.Random, epsilon: float,
+                 learning_rate: float):
+    """Play one self-play game, updating the dice set's table after every roll"""
+    table = policy.tables[dice_set]
+    scores = [0, 0]
+    mover = 0
+    while True:
+        score, opponent_score = scores[mover], scores[1 - mover]
+        turn_score, dice_remaining = 0, 6
+        while True:
+            state = policy.index(score, opponent_score, turn_score, dice_remaining)
+            dice = roll_dice(dice_remaining, dice_set, rng)
+            best = policy.choose(dice_set, dice, score, opponent_score, turn_score)
+            if best is None:
+                # Farkle: the opponent starts their turn with the scores unchanged
+                target = 1 - policy.roll_value(dice_set, opponent_score, score, 0, 6)
+                table[state] += learning_rate * (target - table[state])
+                break
+
+            table[state] += learning_rate * (best.value - table[state])
+
+            points, keep, bank = best.points, best.keep, best.bank
+            if rng.random() < epsilon:
+                points, keep = rng.choice(legal_keeps(dice))
+                bank = rng.random() < 0.5
+
+            turn_score += points
+            dice_remaining = dice_remaining - len(keep) or 6  # Hot dice
+            if bank:
+                scores[mover] += turn_score
+                if scores[mover] >= TARGET_SCORE:
+                    return
+                break
+        mover = 1 - mover
+
+
+def _train_batch(args: Tuple[np.ndarray, int, str, int, int, float, float]) -> np.ndarray:
+    """Worker entry point: train a copy of the table on a batch of games"""
+    table, step, dice_set, episodes, seed, epsilon, learning_rate = args
+    policy = PolicyTable({dice_set: table.copy()}, step)
+    rng = random.Random(seed)
+    for _ in range(episodes):
+        play_episode(policy, dice_set, rng, epsilon, learning_rate)
+    return policy.tables[dice_set]
+
+
+def train(policy: PolicyTable, dice_set: str, episodes: int, workers: int = 1, batch_episodes: int = 500,
+          learning_rate: float = 0.1, epsilon: float = 0.1, seed: int = 0,
+          checkpoint: Optional[str] = None, checkpoint_every: int = 50000) -> PolicyTable:
+    """
+    Train the dice set's table in place until it has seen episodes games in all,
+    counting those recorded in policy.episodes, and return the policy
+    """
+    table = policy.tables[dice_set]
+    played = resumed = policy.episodes.get(dice_set, 0)
+    next_checkpoint = (played // checkpoint_every + 1) * checkpoint_every
+    started = time.perf_counter()
+
+    with Pool(workers) as pool:
+        while played < episodes:
+            sizes = [min(batch_episodes, episodes - played - i * batch_episodes) for i in range(workers)]
+            jobs = [
+                (table, policy.step, dice_set, size,
+                 random.Random(f'{seed}:{dice_set}:{played + i * batch_episodes}').getrandbits(63),
+                 epsilon, learning_rate)
+                for i, size in enumerate(sizes) if size > 0
+            ]
+            table[...] = np.mean(pool.map(_train_batch, jobs), axis=0)
+            played += sum(job[3] for job in jobs)
+            policy.episodes[dice_set] = played
+
+            if checkpoint and played >= next_checkpoint:
+                policy.save(checkpoint)
+                next_checkpoint += checkpoint_every
+                print(f"[{dice_set}] {played}/{episodes} games, "
+                      f"{(played - resumed) / (time.perf_counter() - started):.0f} games/s, "
+                      f"opening value {table[6, 0, 0, 0]:.3f} (checkpoint saved)")
+
+    if checkpoint:
+        policy.save(checkpoint)
+    return policy
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Train the computer's Farkle policy by self-play")
+    parser.add_argument('--dice-set', action='append', choices=list(DICE_SETS),
+                        help="Dice set to train (repeatable; default: all)")
+    parser.add_argument('--episodes', type=int, default=200000, help="Self-play games per dice set")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch', type=int, default=500, help="Games per worker between table merges")
+    parser.add_argument('--lr', type=float, default=0.1, help="Learning rate of each value update")
+    parser.add_argument('--epsilon', type=float, default=0.1, help="Exploration rate")
+    parser.add_argument('--step', type=int, default=250, help="Points per table bucket")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--checkpoint', default='farkle_policy.ckpt.npz',
+                        help="Float checkpoint, resumed from if it exists")
+    parser.add_argument('--checkpoint-every', type=int, default=50000)
+    parser.add_argument('--out', default='farkle_policy.npz', help="Quantized policy file the app loads")
+    args = parser.parse_args(argv)
+
+    dice_sets = args.dice_set or list(DICE_SETS)
+    if os.path.exists(args.checkpoint):
+        policy = PolicyTable.load(args.checkpoint)
+        if policy.step != args.step:
+            parser.error(f"{args.checkpoint} uses step {policy.step}, not {args.step}")
+        print(f"Resuming from {args.checkpoint}: " + ', '.join(
+            f"{dice_set} {policy.episodes.get(dice_set, 0)} games" for dice_set in dice_sets))
+    else:
+        policy = initial_policy(dice_sets, args.step)
+    fresh = initial_policy(dice_sets, args.step)
+    for dice_set in dice_sets:
+        policy.tables.setdefault(dice_set, fresh.tables[dice_set])
+
+    for dice_set in dice_sets:
+        train(policy, dice_set, args.episodes, args.workers, args.batch, args.lr, args.epsilon,
+              args.seed, args.checkpoint, args.checkpoint_every)
+
+    exported = policy.quantized()
+    if os.path.exists(args.out):
+        previous = PolicyTable.load(args.out)
+        if previous.step == exported.step:
+            exported.tables = {**previous.tables, **exported.tables}
+    exported.save(args.out)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
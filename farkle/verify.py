@@ -0,0 +1,324 @@
+"""
+Exhaustive differential check of the scoring engines against the original scorer.
+
+Every ordered roll of 1-6 dice (6^1 ... 6^6) is scored by each registered engine
+and compared with the reference, a frozen copy of the game's original
+calculate_score that nothing else uses: points, number of scoring dice, the breakdown
+(for engines that produce one) and can_score. The reference is computed once per
+dice multiset, and engines that do not depend on dice order are also run once per
+multiset, which keeps a full pass to a few seconds. Each engine's pass is timed,
+so the report doubles as a throughput benchmark.
+
+    python -m farkle.verify [--engine NAME ...] [--repeat 3]
+"""
+import argparse
+import itertools
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from farkle.scoring import DICE_SETS, ScoreResult, _score_sorted, build_keep_index, calculate_score, can_score, \
+    legal_keeps, roll_outcomes
+
+MAX_DICE = 6
+
+# (points, scoring dice count, breakdown as sorted (dice, rule, points) tuples or None)
+Verdict = Tuple[int, int, Optional[Tuple[Tuple[Tuple[int, ...], str, int], ...]]]
+
+
+# The original game's scorer and rules, copied unchanged (but for their names) as a
+# frozen oracle: every engine, the shipped calculate_score included, is checked against it.
+BASELINE_RULES = {
+    'single_1': 100,
+    'single_5': 50,
+    'three_1s': 1000,
+    'three_2s': 200,
+    'three_3s': 300,
+    'three_4s': 400,
+    'three_5s': 500,
+    'three_6s': 600,
+    'straight': 1000,
+    'three_pairs': 500,
+    'four_of_a_kind': 1000,
+    'five_of_a_kind': 2000,
+    'six_of_a_kind': 3000,
+}
+
+
+def baseline_calculate_score(dice: List[int]) -> Tuple[int, List[Dict]]:
+    """
+    Calculate score for given dice and return possible scoring combinations.
+    Returns: (score, scoring_dice_info)
+    """
+    if not dice:
+        return 0, []
+
+    dice_counts = {i: dice.count(i) for i in range(1, 7)}
+    score = 0
+    scoring_info = []
+
+    # Check for straight (1-6)
+    if all(count == 1 for count in dice_counts.values()) and len(dice) == 6:
+        score += BASELINE_RULES['straight']
+        scoring_info.append({
+            'dice': dice.copy(),
+            'rule': 'straight',
+            'points': BASELINE_RULES['straight']
+        })
+        return score, scoring_info
+
+    # Check for three pairs
+    pairs = [count for count in dice_counts.values() if count == 2]
+    if len(pairs) == 3 and len(dice) == 6:
+        score += BASELINE_RULES['three_pairs']
+        scoring_info.append({
+            'dice': dice.copy(),
+            'rule': 'three_pairs',
+            'points': BASELINE_RULES['three_pairs']
+        })
+        return score, scoring_info
+
+    # Check for six of a kind
+    for value, count in dice_counts.items():
+        if count == 6:
+            score += BASELINE_RULES['six_of_a_kind']
+            scoring_info.append({
+                'dice': [value] * 6,
+                'rule': f'six_of_a_kind ({value}s)',
+                'points': BASELINE_RULES['six_of_a_kind']
+            })
+            return score, scoring_info
+
+    # Check for five of a kind
+    for value, count in dice_counts.items():
+        if count == 5:
+            score += BASELINE_RULES['five_of_a_kind']
+            scoring_info.append({
+                'dice': [value] * 5,
+                'rule': f'five_of_a_kind ({value}s)',
+                'points': BASELINE_RULES['five_of_a_kind']
+            })
+            # Check remaining single die
+            remaining_dice = [v for v in dice if v != value]
+            if remaining_dice:
+                single_score, single_info = baseline_calculate_score(remaining_dice)
+                score += single_score
+                scoring_info.extend(single_info)
+            return score, scoring_info
+
+    # Check for four of a kind
+    for value, count in dice_counts.items():
+        if count == 4:
+            score += BASELINE_RULES['four_of_a_kind']
+            scoring_info.append({
+                'dice': [value] * 4,
+                'rule': f'four_of_a_kind ({value}s)',
+                'points': BASELINE_RULES['four_of_a_kind']
+            })
+            # Check remaining two dice
+            remaining_dice = [v for v in dice if v != value]
+            if remaining_dice:
+                single_score, single_info = baseline_calculate_score(remaining_dice)
+                score += single_score
+                scoring_info.extend(single_info)
+            return score, scoring_info
+
+    # Check for three of a kind
+    for value, count in dice_counts.items():
+        if count == 3:
+            if value == 1:
+                score += BASELINE_RULES['three_1s']
+                scoring_info.append({
+                    'dice': [1, 1, 1],
+                    'rule': 'three_1s',
+                    'points': BASELINE_RULES['three_1s']
+                })
+            else:
+                score += BASELINE_RULES[f'three_{value}s']
+                scoring_info.append({
+                    'dice': [value, value, value],
+                    'rule': f'three_{value}s',
+                    'points': BASELINE_RULES[f'three_{value}s']
+                })
+
+            # Check remaining dice
+            remaining_dice = [v for v in dice if v != value]
+            if remaining_dice:
+                single_score, single_info = baseline_calculate_score(remaining_dice)
+                score += single_score
+                scoring_info.extend(single_info)
+            return score, scoring_info
+
+    # Check for single 1s and 5s
+    temp_dice = dice.copy()
+    scoring_dice = []
+
+    for die in temp_dice:
+        if die == 1:
+            score += BASELINE_RULES['single_1']
+            scoring_dice.append(die)
+            scoring_info.append({
+                'dice': [1],
+                'rule': 'single_1',
+                'points': BASELINE_RULES['single_1']
+            })
+        elif die == 5:
+            score += BASELINE_RULES['single_5']
+            scoring_dice.append(die)
+            scoring_info.append({
+                'dice': [5],
+                'rule': 'single_5',
+                'points': BASELINE_RULES['single_5']
+            })
+
+    # Remove scored dice from consideration for combinations
+    for die in scoring_dice:
+        if die in temp_dice:
+            temp_dice.remove(die)
+
+    return score, scoring_info
+
+
+def baseline_verdict(dice: List[int]) -> Verdict:
+    """The oracle's verdict, normalized like verdict()"""
+    points, scoring_info = baseline_calculate_score(dice)
+    return (
+        points,
+        sum(len(combo['dice']) for combo in scoring_info),
+        tuple(sorted((tuple(sorted(combo['dice'])), combo['rule'], combo['points']) for combo in scoring_info)),
+    )
+
+
+class Engine(NamedTuple):
+    """A scoring path under test"""
+    score: Callable[[List[int]], Verdict]
+    ordered: bool = False  # Run on every ordering of a roll, not once per multiset
+    can_score: Optional[Callable[[List[int]], bool]] = None
+
+
+def verdict(result: ScoreResult) -> Verdict:
+    """Normalize a calculate_score-style result"""
+    points, scoring_info = result
+    return (
+        points,
+        sum(len(combo.dice) for combo in scoring_info),
+        tuple(sorted((tuple(sorted(combo.dice)), combo.rule, combo.points) for combo in scoring_info)),
+    )
+
+
+def _keep_index_verdict(dice: List[int]) -> Verdict:
+    """Best keep in the subset-mask index: most points, then most dice"""
+    index = build_keep_index(dice)
+    points, size = max((points, bin(mask).count('1')) for mask, points in enumerate(index))
+    return (points, size, None) if points else (0, 0, None)
+
+
+def _legal_keeps_verdict(dice: List[int]) -> Verdict:
+    """Best keep in the legal keep table: most points, then most dice"""
+    points, size = max(((points, len(kept)) for points, kept in legal_keeps(dice)), default=(0, 0))
+    return points, size, None
+
+
+ENGINES: Dict[str, Engine] = {
+    'calculate_score': Engine(lambda dice: verdict(calculate_score(dice)), ordered=True, can_score=can_score),
+    'score_sorted': Engine(lambda dice: verdict(_score_sorted(tuple(sorted(dice))))),
+    'keep_index': Engine(_keep_index_verdict, ordered=True),
+    'legal_keeps': Engine(_legal_keeps_verdict),
+}
+
+
+class EngineReport(NamedTuple):
+    name: str
+    checked: int
+    seconds: float
+    failed: int
+    mismatches: List[str]  # The first few failures, described
+
+
+def _reference() -> Dict[Tuple[int, ...], Verdict]:
+    """Reference verdict per sorted dice multiset, from the frozen oracle"""
+    return {
+        dice: baseline_verdict(list(dice))
+        for n in range(1, MAX_DICE + 1)
+        for dice in itertools.combinations_with_replacement(range(1, 7), n)
+    }
+
+
+def check_engine(name: str, engine: Engine, reference: Dict[Tuple[int, ...], Verdict],
+                 max_mismatches: int = 10) -> EngineReport:
+    """Run one engine over every roll (or multiset) and compare it with the reference"""
+    if engine.ordered:
+        rolls = (roll for n in range(1, MAX_DICE + 1) for roll in itertools.product(range(1, 7), repeat=n))
+    else:
+        rolls = iter(reference)
+
+    mismatches = []
+    checked = failed = 0
+    started = time.perf_counter()
+    for roll in rolls:
+        dice = list(roll)
+        expected = reference[tuple(sorted(roll))]
+        got = engine.score(dice)
+        checked += 1
+        problem = None
+        if got[0] != expected[0]:
+            problem = f"points {got[0]} != {expected[0]}"
+        elif got[1] != expected[1]:
+            problem = f"scoring dice {got[1]} != {expected[1]}"
+        elif got[2] is not None and got[2] != expected[2]:
+            problem = f"breakdown {got[2]} != {expected[2]}"
+        elif engine.can_score is not None and engine.can_score(dice) != (expected[0] > 0):
+            problem = f"can_score {not expected[0] > 0} with {expected[0]} points"
+        if problem:
+            failed += 1
+            if len(mismatches) < max_mismatches:
+                mismatches.append(f"{name} {roll}: {problem}")
+    return EngineReport(name, checked, time.perf_counter() - started, failed, mismatches)
+
+
+def check_roll_outcomes(reference: Dict[Tuple[int, ...], Verdict]) -> List[str]:
+    """roll_outcomes for every dice set against a count over all ordered rolls"""
+    mismatches = []
+    for dice_set, faces in DICE_SETS.items():
+        for n in range(1, MAX_DICE + 1):
+            counts = {}
+            for roll in itertools.product(faces, repeat=n):
+                points, used, _ = reference[tuple(sorted(roll))]
+                counts[(points, used)] = counts.get((points, used), 0) + 1
+            total = len(faces) ** n
+            outcomes = roll_outcomes(n, dice_set)
+            for key in counts.keys() | outcomes.keys():
+                if abs(counts.get(key, 0) / total - outcomes.get(key, 0.0)) > 1e-12:
+                    mismatches.append(f"roll_outcomes({n}, {dice_set!r}) {key}: "
+                                      f"{outcomes.get(key, 0.0)} != {counts.get(key, 0) / total}")
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Check every scoring engine against the original scorer on all rolls")
+    parser.add_argument('--engine', action='append', choices=list(ENGINES),
+                        help="Engine to check (repeatable; default: all)")
+    parser.add_argument('--repeat', type=int, default=1, help="Timed passes per engine; the fastest is reported")
+    args = parser.parse_args(argv)
+
+    reference = _reference()
+    failures = []
+    for name in args.engine or list(ENGINES):
+        reports = [check_engine(name, ENGINES[name], reference) for _ in range(max(args.repeat, 1))]
+        report = min(reports, key=lambda r: r.seconds)
+        failures.extend(report.mismatches)
+        status = 'ok' if not report.failed else f'MISMATCH x{report.failed}'
+        print(f"{name:16} {status:8} {report.checked:6} rolls in {report.seconds:.3f}s "
+              f"({report.checked / report.seconds:,.0f} rolls/s)")
+
+    outcome_failures = check_roll_outcomes(reference)
+    failures.extend(outcome_failures)
+    print(f"{'roll_outcomes':16} {'ok' if not outcome_failures else 'MISMATCH'}")
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""Optimal-play win probability tables"""
+import os
+from functools import lru_cache
+from typing import Any, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from farkle.distribution import BUCKET, Thresholds, turn_distribution
+from farkle.scoring import DICE_SETS, NUM_DICE, SCORING_RULES, TARGET_SCORE, DiceSet, calculate_score, roll_outcomes
+from farkle.tables import cached_table
+
+# Points per bucket in the win-probability tables; coarser steps use less memory
+WIN_TABLE_STEP = int(os.environ.get('FARKLE_WIN_TABLE_STEP', '250'))
+
+# Opponent bank thresholds with best-response tables, for the Adaptive computer
+RESPONSE_PROFILES = (200, 300, 400, 600, 1000, 2000)
+
+
+def _table_key(kind: str, dice_set: str, step: int, total_dice: int) -> Tuple[str, tuple]:
+    """Cache name and fingerprint; six-dice tables keep their original names"""
+    fingerprint = (DICE_SETS[dice_set], SCORING_RULES, TARGET_SCORE)
+    if total_dice == NUM_DICE:
+        return f'{kind}-{dice_set}-{step}', fingerprint
+    return f'{kind}-{dice_set}-{step}-{total_dice}d', fingerprint + (total_dice,)
+
+
+@lru_cache(maxsize=None)
+def win_table(dice_set: str, step: int = WIN_TABLE_STEP, total_dice: int = NUM_DICE) -> np.ndarray:
+    """
+    Win probability for the player about to decide, under optimal play by both players.
+    Indexed [dice_remaining, turn_score, score, opponent_score], all scores in step-point buckets.
+    total_dice sets the dice in a full roll, for variants with more (or fewer) than six.
+    Solved on first use, then loaded from the table cache.
+    """
+    if step % 50 or TARGET_SCORE % step:
+        raise ValueError(f"Win table step must be a multiple of 50 dividing {TARGET_SCORE}, got {step}")
+    return cached_table(*_table_key('win', dice_set, step, total_dice),
+                        lambda: _solve_win_table(dice_set, step, total_dice))
+
+
+def _transitions(dice_set: DiceSet, step: int, total_dice: int = NUM_DICE):
+    """
+    Per dice count: farkle probability and (probability, next turn bucket, next dice
+    remaining) moves. Points that fall between buckets are split between the
+    neighbouring buckets so expected points are preserved.
+    """
+    n_scores = TARGET_SCORE // step
+    turn_idx = np.arange(n_scores + 1)
+    transitions = {}
+    for num_dice in range(1, total_dice + 1):
+        farkle_p = 0.0
+        moves = {}
+        for (points, used), p in roll_outcomes(num_dice, dice_set).items():
+            if points == 0:
+                farkle_p += p
+                continue
+            next_dice = num_dice - used or total_dice  # Hot dice
+            buckets, rest = divmod(points, step)
+            moves[buckets, next_dice] = moves.get((buckets, next_dice), 0.0) + p * (1 - rest / step)
+            if rest:
+                moves[buckets + 1, next_dice] = moves.get((buckets + 1, next_dice), 0.0) + p * rest / step
+        transitions[num_dice] = farkle_p, [
+            (np.float32(p), np.minimum(turn_idx + buckets, n_scores), next_dice)
+            for (buckets, next_dice), p in moves.items()
+        ]
+    return transitions
+
+
+def _roll_values(table: np.ndarray, num_dice: int, farkle_p: float, moves,
+                 farkle: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Win probability when rolling num_dice on from every turn state, given the table
+    of what follows; farkle is the win chance per [score, opponent score] once the
+    turn is lost, by default the opponent's turn from the same table.
+    """
+    if farkle is None:
+        farkle = 1 - table[-1, 0].T  # The opponent starts with every die
+    roll = np.broadcast_to(np.float32(farkle_p) * farkle, table.shape[1:]).copy()
+    for p, next_turn, next_dice in moves:
+        roll += p * table[next_dice][next_turn]
+    return roll
+
+
+def _solve_win_table(dice_set: str, step: int, total_dice: int = NUM_DICE) -> np.ndarray:
+    """Value iteration over every game position"""
+    return _solve_win_tables((dice_set,), step, total_dice)[0]
+
+
+def _solve_win_tables(dice_sets: Tuple[DiceSet, ...], step: int, total_dice: int = NUM_DICE) -> List[np.ndarray]:
+    """
+    Value iteration over every game position, for one dice set shared by both
+    players or two, one per player. Returns a table per dice set, for the player
+    about to decide rolling that set.
+    """
+    n_scores = TARGET_SCORE // step
+    tables = [np.zeros((total_dice + 1, n_scores + 1, n_scores, n_scores), dtype=np.float32) for _ in dice_sets]
+    turn_idx = np.arange(n_scores + 1)
+    transitions = [_transitions(dice_set, step, total_dice) for dice_set in dice_sets]
+
+    # bank_idx[t, i, 0] is the banked score bucket; the opponent then starts a turn
+    bank_idx = turn_idx[:, None, None] + np.arange(n_scores)[None, :, None]
+    opp_rows = np.arange(n_scores)[None, None, :]
+    opp_start = np.zeros((n_scores, 2 * n_scores + 1), dtype=np.float32)
+
+    for _ in range(10000):
+        new_tables = []
+        for side, table in enumerate(tables):
+            opponent = tables[-1 - side]  # The same table when both players roll one set
+            opp_start[:, :n_scores] = opponent[total_dice, 0]  # Banking to TARGET_SCORE or more leaves the opponent 0
+            bank = 1 - opp_start[opp_rows, bank_idx]
+
+            new_table = np.zeros_like(table)
+            for num_dice, (farkle_p, moves) in transitions[side].items():
+                roll = _roll_values(table, num_dice, farkle_p, moves, 1 - opponent[-1, 0].T)
+                new_table[num_dice] = np.maximum(roll, bank)
+                new_table[num_dice, 0] = roll[0]  # Nothing to bank before the first roll
+            new_tables.append(new_table)
+
+        delta = max(np.abs(new - old).max() for new, old in zip(new_tables, tables))
+        tables = new_tables
+        if delta < 1e-5:
+            break
+    return tables
+
+
+def match_win_chance(dice_set: DiceSet, opponent_dice_set: DiceSet, step: int = WIN_TABLE_STEP) -> float:
+    """
+    Chance that a player rolling dice_set beats one rolling opponent_dice_set, both
+    playing optimally, averaged over who starts. Solved on each call, not cached, so
+    either set may be given as a tuple of faces without registering it.
+    """
+    if dice_set == opponent_dice_set:
+        return 0.5
+    table, opponent = _solve_win_tables((dice_set, opponent_dice_set), step)
+    return float(table[NUM_DICE, 0, 0, 0] + 1 - opponent[NUM_DICE, 0, 0, 0]) / 2
+
+
+@lru_cache(maxsize=None)
+def roll_table(dice_set: str, step: int = WIN_TABLE_STEP, total_dice: int = NUM_DICE) -> np.ndarray:
+    """
+    Win probability when rolling on rather than banking, under optimal play
+    afterwards; indexed like win_table. Derived from win_table and cached beside it.
+    """
+    def build():
+        table = np.asarray(win_table(dice_set, step, total_dice))
+        roll = np.zeros_like(table)
+        for num_dice, (farkle_p, moves) in _transitions(dice_set, step, total_dice).items():
+            roll[num_dice] = _roll_values(table, num_dice, farkle_p, moves)
+        return roll
+
+    return cached_table(*_table_key('roll', dice_set, step, total_dice), build)
+
+
+@lru_cache(maxsize=None)
+def opponent_turn(dice_set: str, threshold: Thresholds, step: int = WIN_TABLE_STEP) -> np.ndarray:
+    """
+    Banked points of one turn by an opponent banking at threshold, in step-point
+    buckets ([0] holds farkles). Points that fall between buckets are split between
+    the neighbouring buckets, as in the win tables.
+    """
+    probabilities = turn_distribution(threshold, dice_set).probabilities
+    buckets = np.zeros(len(probabilities) * BUCKET // step + 2)
+    for i, p in enumerate(probabilities):
+        bucket, rest = divmod(i * BUCKET, step)
+        buckets[bucket] += p * (1 - rest / step)
+        buckets[bucket + 1] += p * rest / step
+    return np.trim_zeros(buckets, 'b')
+
+
+@lru_cache(maxsize=None)
+def response_table(dice_set: str, threshold: int, step: int = WIN_TABLE_STEP) -> np.ndarray:
+    """
+    Win probability for the player about to decide, playing optimally against an
+    opponent who banks once a turn is worth threshold; indexed like win_table.
+    Solved on first use, then loaded from the table cache.
+    """
+    name = f'response-{dice_set}-{threshold}-{step}'
+    fingerprint = (DICE_SETS[dice_set], SCORING_RULES, TARGET_SCORE, threshold)
+    return cached_table(name, fingerprint, lambda: _solve_response_table(dice_set, threshold, step))
+
+
+def _after_turn(table: np.ndarray, opponent: np.ndarray) -> np.ndarray:
+    """
+    Win chance per [score, opponent score] once the turn is over, from a response
+    table and the opponent's turn distribution; an opponent banked to TARGET_SCORE or more has won
+    """
+    n_scores = table.shape[-1]
+    start = np.zeros((n_scores, n_scores + len(opponent)), dtype=np.float32)
+    start[:, :n_scores] = table[-1, 0]
+    return sum(p * start[:, k:k + n_scores] for k, p in enumerate(opponent) if p).astype(np.float32)
+
+
+def _solve_response_table(dice_set: str, threshold: int, step: int) -> np.ndarray:
+    """Value iteration with the opponent's turns drawn from opponent_turn()"""
+    n_scores = TARGET_SCORE // step
+    table = np.zeros((NUM_DICE + 1, n_scores + 1, n_scores, n_scores), dtype=np.float32)
+    turn_idx = np.arange(n_scores + 1)
+    transitions = _transitions(dice_set, step)
+    opponent = opponent_turn(dice_set, threshold, step)
+
+    bank_idx = turn_idx[:, None, None] + np.arange(n_scores)[None, :, None]
+    opp_cols = np.arange(n_scores)[None, None, :]
+    after = np.ones((2 * n_scores + 1, n_scores), dtype=np.float32)  # Banked to TARGET_SCORE or more has won
+
+    for _ in range(10000):
+        after[:n_scores] = _after_turn(table, opponent)
+        bank = after[bank_idx, opp_cols]
+
+        new_table = np.zeros_like(table)
+        for num_dice, (farkle_p, moves) in transitions.items():
+            roll = _roll_values(table, num_dice, farkle_p, moves, after[:n_scores])
+            new_table[num_dice] = np.maximum(roll, bank)
+            new_table[num_dice, 0] = roll[0]  # Nothing to bank before the first roll
+
+        delta = np.abs(new_table - table).max()
+        table = new_table
+        if delta < 1e-5:
+            break
+    return table
+
+
+@lru_cache(maxsize=None)
+def response_roll_table(dice_set: str, threshold: int, step: int = WIN_TABLE_STEP) -> np.ndarray:
+    """
+    Win probability when rolling on rather than banking against an opponent who
+    banks at threshold; indexed like response_table, derived from it and cached beside it.
+    """
+    def build():
+        table = np.asarray(response_table(dice_set, threshold, step))
+        after = _after_turn(table, opponent_turn(dice_set, threshold, step))
+        roll = np.zeros_like(table)
+        for num_dice, (farkle_p, moves) in _transitions(dice_set, step).items():
+            roll[num_dice] = _roll_values(table, num_dice, farkle_p, moves, after)
+        return roll
+
+    name = f'response-roll-{dice_set}-{threshold}-{step}'
+    return cached_table(name, (DICE_SETS[dice_set], SCORING_RULES, TARGET_SCORE, threshold), build)
+
+
+def response_values(score: int, opponent_score: int, turn_score: int, dice_remaining: int,
+                    dice_set: str, threshold: int, step: int = WIN_TABLE_STEP) -> Tuple[float, float]:
+    """
+    Win chances against an opponent banking at threshold, with turn_score at stake
+    and dice_remaining to roll: (banking now, rolling on)
+    """
+    if score + turn_score >= TARGET_SCORE:
+        return 1.0, 0.0
+    n_scores = TARGET_SCORE // step
+    half = step // 2
+    opponent_idx = min((opponent_score + half) // step, n_scores - 1)
+    banked_idx = min((score + turn_score + half) // step, n_scores - 1)
+    start = response_table(dice_set, threshold, step)[NUM_DICE, 0, banked_idx]
+    bank = sum(float(p * start[opponent_idx + k])
+               for k, p in enumerate(opponent_turn(dice_set, threshold, step)) if opponent_idx + k < n_scores)
+    turn_idx = min((turn_score + half) // step, n_scores)
+    score_idx = min((score + half) // step, n_scores - 1)
+    roll = response_roll_table(dice_set, threshold, step)[dice_remaining, turn_idx, score_idx, opponent_idx]
+    return bank, float(roll)
+
+
+@lru_cache(maxsize=4096)
+def nearest_profile(thresholds: Tuple[int, ...], dice_set: str) -> int:
+    """
+    The RESPONSE_PROFILES threshold whose turns bank most like per dice count
+    thresholds, by the area between their cumulative banked-points distributions
+    """
+    modeled = np.cumsum(turn_distribution(thresholds, dice_set).probabilities)
+
+    def distance(profile: int) -> float:
+        other = np.cumsum(turn_distribution(profile, dice_set).probabilities)
+        size = max(len(modeled), len(other))
+        return float(np.abs(np.pad(modeled, (0, size - len(modeled)), constant_values=1.0)
+                            - np.pad(other, (0, size - len(other)), constant_values=1.0)).sum())
+
+    return min(RESPONSE_PROFILES, key=distance)
+
+
+def win_probability(score: int, opponent_score: int, turn_score: int, dice_remaining: int,
+                    dice_set: str) -> float:
+    """Table lookup of the chance that the player about to decide wins the game"""
+    step = WIN_TABLE_STEP
+    n_scores = TARGET_SCORE // step
+    if score + turn_score >= TARGET_SCORE:
+        return 1.0
+    if opponent_score >= TARGET_SCORE:
+        return 0.0
+    table = win_table(dice_set, step)
+    return float(table[
+        dice_remaining,
+        min((turn_score + step // 2) // step, n_scores),
+        min((score + step // 2) // step, n_scores - 1),
+        min((opponent_score + step // 2) // step, n_scores - 1),
+    ])
+
+
+def win_chances(state: Mapping[str, Any]) -> Tuple[float, float]:
+    """(player, computer) win chances for a game state"""
+    dice_set = state['selected_dice_set']
+    if state['current_player'] == 'player':
+        mover, other = state['player_score'], state['computer_score']
+        turn_score, dice_remaining = state['turn_score'], state['remaining_dice']
+        if state['dice']:
+            # Dice on the table: the decision is made with this roll's score in hand
+            score, scoring_info = calculate_score(state['dice'])
+            if score == 0:
+                p_other = win_probability(other, mover, 0, 6, dice_set)
+                return 1 - p_other, p_other
+            turn_score += score
+            dice_remaining = dice_remaining - sum(len(combo.dice) for combo in scoring_info) or 6
+        p_mover = win_probability(mover, other, turn_score, dice_remaining, dice_set)
+        return p_mover, 1 - p_mover
+
+    p_mover = win_probability(
+        state['computer_score'],
+        state['player_score'],
+        state['computer_total_turn_score'],
+        state['remaining_dice'],
+        dice_set
+    )
+    return 1 - p_mover, p_mover
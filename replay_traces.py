@@ -0,0 +1,218 @@
+"""
+Replay recorded sessions through Main.py headlessly, as a latency regression gate.
+
+Traces are recorded by running the app with FARKLE_TRACE_DIR set (see
+farkle.trace). Each one is replayed in Streamlit's AppTest from the session's
+seed, action by action, and must end in exactly the recorded state. Every
+action's rerun is timed, and a separate pass under tracemalloc measures the
+memory each action allocates. A first untimed replay warms the caches and
+tables, as a running server would have them. Alongside, calculate_score and
+roll_dice are timed on their own. With --baseline, any trace whose p95 action
+latency or peak allocation grew beyond --tolerance fails the run:
+
+    python replay_traces.py traces --repeat 5 --save-baseline baseline.json
+    python replay_traces.py traces --repeat 5 --baseline baseline.json
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from farkle.scoring import calculate_score, roll_dice
+from farkle.trace import load_trace, trace_state
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Main.py')
+RUN_TIMEOUT = 120  # Seconds one rerun may take, including any table solves on the warm-up pass
+LATENCY_SLACK_MS = 2.0  # Latency growth always allowed, so fast traces are not failed by timer noise
+MEMORY_SLACK_KB = 64.0
+MICRO_CALLS = 200000
+
+
+class ReplayError(Exception):
+    """A trace could not be replayed, or ended in a different state"""
+
+
+class TraceReport(NamedTuple):
+    """Per-action rerun latency and allocation for one trace"""
+    name: str
+    actions: int
+    latency_ms: List[float]  # Median over the timed passes, per action
+    peak_kb: List[float]     # Most memory allocated at once during each action
+
+    def summary(self) -> Dict[str, float]:
+        latency = sorted(self.latency_ms)
+        return {
+            'p50_ms': statistics.median(latency) if latency else 0.0,
+            'p95_ms': latency[min(len(latency) - 1, int(0.95 * len(latency)))] if latency else 0.0,
+            'max_ms': latency[-1] if latency else 0.0,
+            'peak_kb': max(self.peak_kb, default=0.0),
+        }
+
+
+def _widget(at, key: str):
+    """The keyed widget of any kind the app traces"""
+    for kind in ('selectbox', 'checkbox', 'text_input', 'slider'):
+        try:
+            return getattr(at, kind)(key=key)
+        except KeyError:
+            pass
+    raise ReplayError(f"No widget with key {key!r} on the page")
+
+
+def _apply(at, action: Dict[str, Any]):
+    """Perform one traced action on the page, without running the app"""
+    if 'widget' in action:
+        _widget(at, action['widget']).set_value(action['value'])
+        return
+    if action.get('key'):
+        try:
+            at.button(key=action['key']).click()
+            return
+        except KeyError:
+            pass
+    else:
+        for button in at.button:
+            if button.label == action['button'] and not button.disabled:
+                button.click()
+                return
+    raise ReplayError(f"No button {action['button']!r} on the page")
+
+
+def replay(trace: Dict[str, Any], memory: bool = False) -> Tuple[List[float], List[float]]:
+    """
+    Replay a trace from a fresh session; returns each action's rerun seconds and,
+    with memory, its peak allocation in bytes. Raises ReplayError on a divergence.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(MAIN_PATH, default_timeout=RUN_TIMEOUT)
+    at.session_state['session_seed'] = trace['seed']
+    for name, value in trace['query'].items():
+        at.query_params[name] = value
+    at.run()
+    seconds, peaks = [], []
+    for i, action in enumerate(trace['actions']):
+        _apply(at, action)
+        if memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        at.run()
+        seconds.append(time.perf_counter() - started)
+        if memory:
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        if at.exception:
+            raise ReplayError(f"Action {i} {action} raised {at.exception[0].message}")
+
+    final = json.loads(json.dumps(trace_state(at.session_state)))  # Compare as JSON, as recorded
+    if final != trace['final']:
+        diff = {key: (trace['final'].get(key), value) for key, value in final.items()
+                if trace['final'].get(key) != value}
+        raise ReplayError(f"Final state differs (recorded, replayed): {diff}")
+    return seconds, peaks
+
+
+def replay_report(name: str, trace: Dict[str, Any], repeat: int) -> TraceReport:
+    """Warm-up pass, repeat timed passes, then one pass under tracemalloc"""
+    replay(trace)
+    passes = [replay(trace)[0] for _ in range(max(repeat, 1))]
+    tracemalloc.start()
+    try:
+        _, peaks = replay(trace, memory=True)
+    finally:
+        tracemalloc.stop()
+    return TraceReport(
+        name,
+        len(trace['actions']),
+        [statistics.median(times) * 1000 for times in zip(*passes)],
+        [peak / 1024 for peak in peaks],
+    )
+
+
+def micro_benchmarks(calls: int = MICRO_CALLS) -> Dict[str, float]:
+    """Nanoseconds per call of calculate_score (on varied rolls) and roll_dice"""
+    rng = random.Random(0)
+    rolls = [roll_dice(rng.randint(1, 6), 'standard', rng) for _ in range(1000)]
+    results = {}
+    started = time.perf_counter()
+    for i in range(calls):
+        calculate_score(rolls[i % len(rolls)])
+    results['calculate_score_ns'] = (time.perf_counter() - started) / calls * 1e9
+    started = time.perf_counter()
+    for _ in range(calls):
+        roll_dice(6, 'standard', rng)
+    results['roll_dice_ns'] = (time.perf_counter() - started) / calls * 1e9
+    return results
+
+
+def regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                tolerance: float) -> List[str]:
+    """Statistics that grew beyond tolerance (and the slack) over the baseline"""
+    failures = []
+    for name, stats in results.items():
+        for key, value in stats.items():
+            before = baseline.get(name, {}).get(key)
+            if before is None or key in ('p50_ms', 'max_ms'):
+                continue
+            slack = MEMORY_SLACK_KB if key.endswith('_kb') else LATENCY_SLACK_MS if key.endswith('_ms') else 0.0
+            if value > before * (1 + tolerance) + slack:
+                failures.append(f"{name} {key}: {value:.2f} > baseline {before:.2f} (+{tolerance:.0%})")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay recorded app sessions and gate on their rerun latency")
+    parser.add_argument('paths', nargs='+', help="Trace files, or directories of them")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed passes per trace; each action's median is kept")
+    parser.add_argument('--baseline', help="Results file to compare with; regressions exit non-zero")
+    parser.add_argument('--save-baseline', help="Write this run's results here")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative growth over the baseline")
+    args = parser.parse_args(argv)
+
+    files = []
+    for path in args.paths:
+        files.extend(sorted(glob.glob(os.path.join(path, '*.json'))) if os.path.isdir(path) else [path])
+
+    # Replays must not record, sleep through animations, or write to the real database
+    os.environ.pop('FARKLE_TRACE_DIR', None)
+    os.environ['FARKLE_REFRESH_SECONDS'] = '0'
+    os.environ['FARKLE_DB'] = os.path.join(tempfile.mkdtemp(prefix='farkle-replay-'), 'replay.db')
+
+    results, failures = {}, []
+    for path in files:
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            report = replay_report(name, load_trace(path), args.repeat)
+        except (ReplayError, ValueError) as e:
+            failures.append(f"{name}: {e}")
+            print(f"{name:24} FAILED", flush=True)
+            continue
+        results[name] = report.summary()
+        print(f"{name:24} ok {report.actions:4} actions  " + '  '.join(
+            f"{key} {value:.1f}" for key, value in results[name].items()), flush=True)
+
+    results['micro'] = micro_benchmarks()
+    print(f"{'micro':24} " + '  '.join(f"{key} {value:.0f}" for key, value in results['micro'].items()))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures.extend(regressions(results, json.load(f), args.tolerance))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
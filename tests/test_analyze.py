@@ -0,0 +1,22 @@
+from farkle.analyze import decision_loss
+from farkle.hints import options, recommend
+
+ROLL = [1, 5, 2, 2, 3, 6]
+
+
+def test_best_option_loses_nothing():
+    for turn_score in (0, 300, 1500):
+        hint = recommend(ROLL, 4000, 5000, turn_score, 'standard')
+        assert decision_loss('standard', ROLL, hint.keep, hint.bank, 4000, 5000, turn_score) == 0
+
+
+def test_losses_measure_against_the_best_option():
+    best = max(options(ROLL, 4000, 5000, 0, 'standard'))
+    loss = decision_loss('standard', ROLL, [5], True, 4000, 5000, 0)  # Banking 50 hands the turn over
+    assert 0 < loss <= best.win_chance
+
+
+def test_illegal_keeps_are_not_graded():
+    assert decision_loss('standard', ROLL, [2], False, 0, 0, 0) is None
+    assert decision_loss('standard', ROLL, [1, 1], False, 0, 0, 0) is None
+    assert decision_loss('standard', ROLL, [], False, 0, 0, 0) is None
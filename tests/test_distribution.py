@@ -0,0 +1,37 @@
+import math
+import random
+
+import pytest
+
+from farkle.ai import threshold_strategy
+from farkle.distribution import turn_distribution
+from farkle.simulate import play_turn
+
+TURNS = 20000
+
+
+@pytest.mark.parametrize('thresholds, dice_set, total_dice', [
+    (300, 'standard', 6),
+    (1000, 'lucky', 6),
+    ((2000, 1000, 500, 350, 300, 250), 'heavenly', 6),
+    (400, 'standard', 8),
+])
+def test_probabilities_sum_to_one(thresholds, dice_set, total_dice):
+    dist = turn_distribution(thresholds, dice_set, total_dice)
+    assert dist.probabilities.sum() == pytest.approx(1.0, abs=1e-12)
+    assert (dist.probabilities >= 0).all()
+
+
+@pytest.mark.parametrize('threshold, dice_set', [(300, 'standard'), (800, 'lucky')])
+def test_mean_matches_simulated_turns(threshold, dice_set):
+    dist = turn_distribution(threshold, dice_set)
+    strategy = threshold_strategy(threshold)
+    rng = random.Random(f'distribution:{threshold}:{dice_set}')
+    banked = farkles = 0
+    for _ in range(TURNS):
+        points, _, farkled, _ = play_turn(strategy, dice_set, 0, 0, rng)
+        banked += 0 if farkled else points
+        farkles += farkled
+    error = 4 * dist.std / math.sqrt(TURNS)  # Four standard errors
+    assert abs(banked / TURNS - dist.mean) < error
+    assert abs(farkles / TURNS - dist.farkle) < 4 * math.sqrt(dist.farkle * (1 - dist.farkle) / TURNS)
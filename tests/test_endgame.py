@@ -0,0 +1,54 @@
+import itertools
+from functools import lru_cache
+
+import pytest
+
+from farkle.endgame import best_keep, reach_probability
+from farkle.scoring import DICE_SETS, calculate_score
+
+TOTAL_DICE = 3  # Small enough to enumerate every ordered roll
+
+
+def _keeps(dice):
+    """(points, dice left) for every subset of the roll in which every die scores"""
+    keeps = set()
+    for size in range(1, len(dice) + 1):
+        for kept in itertools.combinations(dice, size):
+            points, scoring_info = calculate_score(list(kept))
+            if points and sum(len(combo.dice) for combo in scoring_info) == size:
+                keeps.add((points, len(dice) - size or TOTAL_DICE))
+    return keeps
+
+
+@lru_cache(maxsize=None)
+def _brute_reach(needed, num_dice, dice_set):
+    faces = DICE_SETS[dice_set]
+    total = 0.0
+    for roll in itertools.product(faces, repeat=num_dice):
+        total += max((1.0 if points >= needed else _brute_reach(needed - points, left, dice_set)
+                      for points, left in _keeps(roll)), default=0.0)
+    return total / len(faces) ** num_dice
+
+
+@pytest.mark.parametrize('dice_set', ['standard', 'lucky'])
+@pytest.mark.parametrize('num_dice', [1, 2, 3])
+def test_reach_probability_matches_brute_force(dice_set, num_dice):
+    for needed in (50, 200, 400):
+        expected = _brute_reach(needed, num_dice, dice_set)
+        assert reach_probability(needed, num_dice, 0, dice_set, TOTAL_DICE) == pytest.approx(expected, abs=1e-12)
+    assert reach_probability(400, num_dice, 400, dice_set, TOTAL_DICE) == 1.0
+
+
+def test_best_keep_matches_brute_force():
+    for roll in itertools.product(range(1, 7), repeat=TOTAL_DICE):
+        expected = max((1.0 if points >= 350 else _brute_reach(350 - points, left, 'standard')
+                        for points, left in _keeps(roll)), default=0.0)
+        chance, kept, points = best_keep(list(roll), 350, 'standard', TOTAL_DICE)
+        assert chance == pytest.approx(expected, abs=1e-12)
+        assert bool(kept) == bool(_keeps(roll))
+
+
+def test_certain_keeps_are_exactly_certain():
+    # Keeping one 1 or both reaches 300 for sure on heavenly dice; a tie goes to the keep with more dice
+    chance, kept, points = best_keep([1, 1, 3, 2, 3, 6], 300, 'heavenly')
+    assert chance == 1.0 and kept == (1, 1)
@@ -0,0 +1,23 @@
+from farkle.hints import player_hint, recommend
+from farkle.state import new_game_state, start_new_game
+
+
+def test_hint_banks_a_roll_that_reaches_the_target():
+    hint = recommend([1, 1, 1, 2, 3, 4], 9500, 9000, 0, 'standard')
+    assert hint.bank and hint.points == 1000 and hint.win_chance == 1.0
+    assert hint.margin > 0
+
+
+def test_player_hint_reads_the_game_state():
+    state = new_game_state(3)
+    start_new_game(state, 3)
+    assert player_hint(state) is None  # Nothing rolled yet
+    state.update(player_score=9800, computer_score=9900, turn_score=150, dice=[5, 2, 3, 4, 6, 6])
+    hint = player_hint(state)
+    assert hint.bank and hint.keep == (5,)
+    state['current_player'] = 'computer'
+    assert player_hint(state) is None
+
+
+def test_hint_farkle_is_none():
+    assert recommend([2, 3, 4, 6, 2, 3], 0, 0, 0, 'standard') is None
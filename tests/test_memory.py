@@ -0,0 +1,83 @@
+import gc
+
+from streamlit.testing.v1 import AppTest
+
+from farkle.memory import MEASURE_EVERY, SessionTracker, metered_trim
+from farkle.rooms import RoomRegistry
+from farkle.state import new_game_state
+
+# Shared with the app script below, which AppTest runs in this process
+TRACKER = SessionTracker(idle_seconds=0, sweep_interval=3600)
+
+
+def _app():
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    from farkle.memory import script_session_state
+    from farkle.state import new_game_state
+    from test_memory import TRACKER
+
+    if 'game_state' not in st.session_state:
+        for key, value in new_game_state().items():
+            st.session_state[key] = value
+        st.session_state.turn_history = [f"turn {i}" for i in range(100)]
+    ctx = get_script_run_ctx()
+    TRACKER.touch(ctx.session_id, script_session_state(ctx.session_state), 1000)
+
+
+def test_idle_session_evicted_on_its_next_run():
+    at = AppTest.from_function(_app)
+    at.run()
+    at.run()
+    assert not at.exception
+    gc.collect()  # Each run's state wrapper is gone by now; the session itself is not
+
+    assert TRACKER.sweep() == 1
+    assert len(at.session_state['turn_history']) == 100  # The sweep only marks the session
+    at.run()
+    (info,) = TRACKER.sessions()
+    assert info.evicted
+    assert len(at.session_state['turn_history']) < 100
+
+
+def test_metered_trim_measures_every_few_runs():
+    state = new_game_state()
+    measured = metered_trim(state, 1 << 30)
+    state['turn_history'].extend(['x' * 1000] * 10)
+    assert metered_trim(state, 1 << 30) is measured  # Between measurements
+    state['game_history'].append({})
+    latest = metered_trim(state, 1 << 30)  # A game was added
+    assert latest['turn_history'] > measured['turn_history']
+    for _ in range(MEASURE_EVERY - 1):
+        assert metered_trim(state, 1 << 30) is latest
+    assert metered_trim(state, 1 << 30) is not latest
+
+
+def test_closed_session_dropped():
+    closed = set()
+    tracker = SessionTracker(idle_seconds=3600, is_alive=lambda session_id: session_id not in closed)
+    tracker.touch('a', {}, 10)
+    tracker.touch('b', {}, 20)
+    closed.add('a')
+    assert [info.session_id for info in tracker.sessions()] == ['b']
+    assert tracker.sweep() == 0
+    tracker.remove('b')
+    assert tracker.sessions() == []
+
+
+def test_idle_and_closed_sessions_give_up_their_seats():
+    rooms = RoomRegistry()
+    room = rooms.create()
+    room.join('idle', 'Player')
+    room.join('closed', 'Player')
+    room.join('active', 'Player')
+    closed = set()
+    tracker = SessionTracker(idle_seconds=0, sweep_interval=3600,
+                             is_alive=lambda session_id: session_id not in closed, on_evict=rooms.leave)
+    tracker.touch('idle', {}, 10)
+    tracker.touch('closed', {}, 10)
+    closed.add('closed')
+    assert tracker.sweep() == 1
+    assert room.seats == ['active']
+    assert room.players == ['Player']
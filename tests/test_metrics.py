@@ -0,0 +1,71 @@
+import os
+import re
+import subprocess
+import sys
+import threading
+import urllib.request
+
+from farkle import metrics
+from farkle.scoring import _SCORE_CACHE, calculate_score
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rerun_count() -> int:
+    match = re.search(r'^farkle_rerun_seconds_count (\d+)$', metrics.render(), re.M)
+    return int(match.group(1)) if match else 0
+
+
+def test_engine_import_skips_http_server():
+    code = "import sys, farkle.state; print('http.server' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == 'False'
+
+
+def test_score_calls_count_public_calls_only():
+    _SCORE_CACHE.clear()
+    before = metrics.SCORE_CALLS.value
+    calculate_score([1, 1, 1, 1, 5, 2])  # Four of a kind, then the rest scored recursively
+    calculate_score([5, 5, 5, 1])
+    assert metrics.SCORE_CALLS.value - before == 2
+
+
+def test_tally_reads_do_not_count():
+    tally = metrics.Tally('test_tally_total', 'test')
+
+    def bump():
+        for _ in range(10000):
+            tally.inc()
+            if not _ % 100:
+                assert tally.value > 0
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tally.value == tally.value == 40000
+    del metrics._metrics[tally.name]
+
+
+def test_exporter_serves_metrics():
+    server = metrics.start_exporter(port=0)
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+            assert b'farkle_score_calls_total' in response.read()
+    finally:
+        server.shutdown()
+
+
+def test_reruns_cut_short_are_timed(tmp_path, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.setenv('FARKLE_DB', str(tmp_path / 'farkle.db'))
+    monkeypatch.setenv('FARKLE_REFRESH_SECONDS', '0')
+    at = AppTest.from_file(os.path.join(ROOT, 'Main.py'), default_timeout=60)
+    before = _rerun_count()
+    at.run()
+    next(b for b in at.button if 'START PLAYING' in b.label).click()
+    at.run()  # The click's run ends in st.rerun(), then the app runs again
+    assert not at.exception
+    assert _rerun_count() - before == 3
@@ -0,0 +1,39 @@
+import random
+
+from farkle.ai import threshold_strategy
+from farkle.opponent import DEFAULT_THRESHOLD, THRESHOLDS, OpponentModel
+from farkle.simulate import play_turn
+
+
+def _feed(model, threshold, turns, rng):
+    """Observe the decisions of a player who banks at threshold, as the app records them"""
+    for _ in range(turns):
+        decisions = []
+        play_turn(threshold_strategy(threshold), 'standard', 0, 0, rng, decisions=decisions)
+        for turn_score, dice, decision in decisions:
+            model.observe(len(dice) - len(decision.keep) or 6, turn_score + decision.points, decision.bank)
+    return model
+
+
+def _likelihood(model, threshold):
+    k = THRESHOLDS.index(threshold)
+    return sum(model.scores[row + k] for row in range(0, len(model.scores), len(THRESHOLDS)))
+
+
+def test_new_model_assumes_the_default():
+    assert set(OpponentModel().thresholds()) == {DEFAULT_THRESHOLD}
+
+
+def test_likelihood_follows_the_profile_that_decided():
+    cautious = _feed(OpponentModel(), 250, 200, random.Random(0))
+    bold = _feed(OpponentModel(), 1000, 200, random.Random(0))
+    assert _likelihood(cautious, 250) > _likelihood(cautious, 1000)
+    assert _likelihood(bold, 1000) > _likelihood(bold, 250)
+    assert 250 in cautious.thresholds() and max(cautious.thresholds()) < 1000
+    assert bold.thresholds() == (1000,) * 6
+
+
+def test_model_follows_a_change_of_style():
+    model = _feed(OpponentModel(), 1000, 200, random.Random(0))
+    _feed(model, 250, 100, random.Random(1))
+    assert _likelihood(model, 250) > _likelihood(model, 1000)
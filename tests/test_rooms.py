@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from farkle.rooms import MAX_ROOM_PLAYERS, Room
+
+
+def test_seats_belong_to_sessions_not_names():
+    room = Room('ABCD', seed=0)
+    assert room.join('session-a', 'Player') == 0
+    assert room.join('session-b', 'Player') == 1  # Same name, different person
+    assert room.join('session-a', 'Renamed') == 0
+    assert room.players == ['Player', 'Player']
+    room.start()
+    room.roll(0)
+    assert room.join('session-c', 'Player') is None  # Started: spectating, however it is named
+
+
+def test_full_room_spectates():
+    room = Room('ABCD')
+    for i in range(MAX_ROOM_PLAYERS):
+        assert room.join(f'session-{i}', 'Player') == i
+    assert room.join('late', 'Player') is None
+    assert len(room.seats) == MAX_ROOM_PLAYERS
+
+
+def test_wait_wakes_on_change():
+    room = Room('ABCD')
+    assert not room.wait(room.version, 0.01)
+    version = room.version
+    threading.Timer(0.01, room.join, ('session-a', 'Player')).start()
+    assert room.wait(version, 10)
+
+
+def test_leaving_before_the_start_frees_the_seat():
+    room = Room('ABCD')
+    room.join('session-a', 'Ann')
+    room.join('session-b', 'Bob')
+    version = room.version
+    assert room.leave('session-a')
+    assert room.version != version
+    assert not room.leave('session-a')
+    assert room.players == ['Bob'] and room.seat('session-b') == 0
+    assert room.join('session-c', 'Cat') == 1
+
+
+def test_leaving_mid_game_skips_the_seat():
+    room = Room('ABCD', seed=0)
+    for name in ('a', 'b', 'c'):
+        room.join(name, name)
+    room.start()
+    assert room.current == 0
+    room.leave('a')  # On turn: the turn passes
+    assert room.current == 1 and room.view().seated == (False, True, True)
+    room.scores[1] = 1
+    room.turn_score = 50
+    room.bank(1)
+    assert room.current == 2
+    room.turn_score = 50
+    room.bank(2)
+    assert room.current == 1  # Seat 0 is skipped
+    room.leave('c')
+    assert room.winner == 1  # Last player seated wins
+    assert room.join('a', 'a') is None
+    with pytest.raises(ValueError):
+        room.start()  # One player left seated
+
+
+def test_play_again_drops_vacated_seats():
+    room = Room('ABCD', seed=0)
+    for name in ('a', 'b', 'c'):
+        room.join(name, name)
+    room.start()
+    room.leave('b')
+    room.start()
+    assert room.seats == ['a', 'c'] and room.players == ['a', 'c'] and room.scores == [0, 0]
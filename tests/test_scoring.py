@@ -0,0 +1,49 @@
+import itertools
+
+from farkle.endgame import _roll_keeps, reach_probability
+from farkle.scoring import build_keep_index, calculate_score, can_score, legal_keeps
+from farkle.verify import ENGINES, Engine, _reference, baseline_calculate_score, baseline_verdict, check_engine, verdict
+
+
+def test_calculate_score_matches_frozen_baseline():
+    for n in range(1, 7):
+        for dice in itertools.product(range(1, 7), repeat=n):
+            assert verdict(calculate_score(list(dice))) == baseline_verdict(list(dice)), dice
+            assert can_score(list(dice)) == (baseline_calculate_score(list(dice))[0] > 0)
+
+
+def test_every_engine_matches_reference():
+    reference = _reference()
+    for name in ('score_sorted', 'legal_keeps'):
+        assert check_engine(name, ENGINES[name], reference).failed == 0
+
+
+def test_verifier_catches_a_regression():
+    def broken(dice):
+        points, used, breakdown = verdict(calculate_score(dice))
+        return (points + 50 if sorted(dice) == [1, 1, 1] else points), used, breakdown
+
+    report = check_engine('broken', Engine(broken), _reference())
+    assert report.failed == 1
+    assert '(1, 1, 1)' in report.mismatches[0]
+
+
+def test_legal_keeps_score_every_kept_die():
+    for points, kept in legal_keeps([1, 5, 5, 2, 3, 4]):
+        assert calculate_score(list(kept))[0] == points
+        assert sum(len(combo.dice) for combo in calculate_score(list(kept))[1]) == len(kept)
+
+
+def test_legal_keeps_and_endgame_beyond_six_dice():
+    assert legal_keeps([1] * 8)[0] == (3200, (1,) * 8)
+    assert max(build_keep_index([5] * 7 + [2])) == calculate_score([5] * 7)[0]
+    # Keeping every die of a roll brings back a full roll of the variant's size
+    assert all(next_dice == 8 for _, keeps in _roll_keeps(1, 'standard', 8) for _, next_dice in keeps)
+    assert reach_probability(2000, 8, 0, 'standard', total_dice=8) > reach_probability(2000, 6, 0, 'standard')
+
+
+def test_breakdowns_are_shared_in_sorted_order():
+    (straight,) = calculate_score([3, 1, 6, 2, 5, 4])[1]
+    assert straight.dice == (1, 2, 3, 4, 5, 6)
+    assert calculate_score([5, 2, 1])[1] is calculate_score([1, 5, 2])[1]
+    assert [combo.rule for combo in calculate_score([5, 2, 1])[1]] == ['single_1', 'single_5']
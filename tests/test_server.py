@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from farkle.server import GameRegistry, GameServer
+
+
+@pytest.fixture
+def server():
+    return GameServer(GameRegistry(max_games=2))
+
+
+def _call(server, method, path, body=None):
+    status, payload = server.dispatch(method, path, json.dumps(body).encode() if body is not None else b'')
+    return status, payload
+
+
+def test_game_lifecycle(server):
+    status, game = _call(server, 'POST', '/games', {'seed': 1})
+    assert status == 201 and game['dice'] == []
+    path = f"/games/{game['id']}"
+    assert _call(server, 'GET', path)[0] == 200
+    assert _call(server, 'POST', path + '/keep') == (400, {'error': 'Roll first'})
+    status, game = _call(server, 'POST', path + '/roll')
+    assert status == 200
+    if game['dice']:  # Not a farkle: the roll must be kept or banked before another
+        assert _call(server, 'POST', path + '/roll')[0] == 400
+        assert _call(server, 'POST', path + '/bank', {'dice': [7]})[0] == 400
+        assert _call(server, 'POST', path + '/bank')[0] == 200
+    assert _call(server, 'DELETE', path) == (200, {'id': game['id'], 'deleted': True})
+    assert _call(server, 'GET', path)[0] == 404
+
+
+@pytest.mark.parametrize('method, path, body, status', [
+    ('POST', '/games', {'dice_set': 'nope'}, 400),
+    ('POST', '/games', {'difficulty': 'nope'}, 400),
+    ('POST', '/games', [1], 400),
+    ('GET', '/games', None, 405),
+    ('GET', '/games/missing', None, 404),
+    ('GET', '/nowhere', None, 404),
+    ('GET', '/games/a/b/c', None, 404),
+])
+def test_rejected_requests(server, method, path, body, status):
+    assert _call(server, method, path, body)[0] == status
+
+
+def test_bad_json_and_methods(server):
+    assert server.dispatch('POST', '/games', b'{not json')[0] == 400
+    game_id = _call(server, 'POST', '/games')[1]['id']
+    assert _call(server, 'GET', f'/games/{game_id}/roll')[0] == 405
+    assert _call(server, 'PUT', f'/games/{game_id}')[0] == 405
+    assert _call(server, 'POST', f'/games/{game_id}/fly')[0] == 404
+
+
+def test_full_registry_is_unavailable(server):
+    for _ in range(2):
+        assert _call(server, 'POST', '/games')[0] == 201
+    assert _call(server, 'POST', '/games')[0] == 503
+
+
+def test_metrics(server):
+    status, text = server.dispatch('GET', '/metrics', b'')
+    assert status == 200 and 'farkle_score_calls_total' in text
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from farkle import calibrate
+from farkle.ai import NORMAL_PARAMS, threshold_strategy
+from farkle.simulate import play_game
+
+
+def _game(strategy, seed):
+    return play_game((strategy, threshold_strategy(350)), 'standard', random.Random(seed),
+                     decision_rng=random.Random(f'{seed}:decisions'))
+
+
+def test_decision_randoms_do_not_change_the_dice():
+    base = threshold_strategy(350)
+
+    def fidgety(dice_set, dice, score, opponent_score, turn_score, rng=None):
+        rng.random()  # Same choices as base, but draws from the decision stream
+        return base(dice_set, dice, score, opponent_score, turn_score, rng)
+
+    for seed in range(20):
+        assert _game(fidgety, seed) == _game(base, seed)
+
+
+@pytest.mark.parametrize('level', ['hard', 'adaptive', 'nightmare'])
+def test_calibrate_rejects_non_heuristic_levels(level, tmp_path):
+    with pytest.raises(SystemExit):
+        calibrate.main(['--level', f'{level}:0.3', '--out', str(tmp_path / 'levels.json'), '--workers', '1'])
+    assert not (tmp_path / 'levels.json').exists()
+
+
+def test_calibration_searches_every_heuristic_knob_but_few_dice():
+    params = calibrate.candidates()
+    assert len(set(params)) == len(params) and NORMAL_PARAMS in params
+    for field in NORMAL_PARAMS._fields:
+        assert len({getattr(p, field) for p in params}) > 1 or field == 'few_dice'
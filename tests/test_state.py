@@ -0,0 +1,103 @@
+import pytest
+
+from farkle.scoring import BUILTIN_DICE_SETS, DICE_SETS, TARGET_SCORE
+from farkle.state import (
+    _SNAPSHOT_HEADER,
+    MAX_RNG_POSITION,
+    close_game_history,
+    decode_snapshot,
+    encode_snapshot,
+    load_snapshot,
+    new_game_state,
+    pack_game_state,
+    player_roll,
+    restore_snapshot,
+    start_new_game,
+    unpack_game_state,
+)
+
+DICE_SET_BYTE = 3  # Version, flags and game state come first
+
+
+def _game(dice_set='standard', seed=7):
+    state = new_game_state(seed)
+    state['selected_dice_set'] = dice_set
+    start_new_game(state, seed)
+    player_roll(state)
+    return state
+
+
+def _fields(state):
+    return {key: state[key] for key in unpack_game_state(pack_game_state(state))}
+
+
+@pytest.mark.parametrize('dice_set', BUILTIN_DICE_SETS)
+def test_round_trip(dice_set):
+    state = _game(dice_set)
+    assert decode_snapshot(encode_snapshot(state)) == _fields(state)
+
+
+def test_designed_set_round_trips_by_name(monkeypatch):
+    monkeypatch.setitem(DICE_SETS, 'test-set', [1, 1, 2, 3, 5, 6])
+    state = _game('test-set')
+    data = pack_game_state(state)
+    assert data[DICE_SET_BYTE] == 255 and data.endswith(b'\x08test-set')
+    assert unpack_game_state(data) == _fields(state)
+
+    monkeypatch.delitem(DICE_SETS, 'test-set')  # A link from a process that had the set
+    with pytest.raises(ValueError, match='Unknown dice set'):
+        unpack_game_state(data)
+
+
+def test_rejects_malformed_snapshots():
+    data = pack_game_state(_game())
+    beyond_builtins = data[:DICE_SET_BYTE] + bytes((len(BUILTIN_DICE_SETS),)) + data[DICE_SET_BYTE + 1:]
+    for bad in (data[:10], data[:_SNAPSHOT_HEADER.size + 1], b'\x09' + data[1:], beyond_builtins):
+        with pytest.raises(ValueError):
+            unpack_game_state(bad)
+    with pytest.raises(ValueError):
+        decode_snapshot('not base64!')
+
+
+def test_restored_game_rolls_on_identically():
+    state = _game(seed=11)
+    restored = new_game_state()
+    restore_snapshot(restored, encode_snapshot(state))
+    assert restored['rng'].getstate() == state['rng'].getstate()
+    assert restored['keep_index'] == state['keep_index']
+
+
+def test_rejects_rng_positions_beyond_the_cap():
+    state = _game()
+    state['rng_position'] = 2 ** 32 - 1  # A crafted link would otherwise replay four billion draws
+    with pytest.raises(ValueError, match='rolled'):
+        restore_snapshot(new_game_state(), encode_snapshot(state))
+    with pytest.raises(ValueError):
+        load_snapshot(new_game_state(), dict(_fields(state), rng_position=MAX_RNG_POSITION + 1))
+
+
+def test_rejects_dice_inconsistent_with_the_turn():
+    state = _game()
+    too_many = dict(_fields(state), dice=[1] * 18, remaining_dice=6)  # Would index 2^18 keeps on load
+    mismatched = dict(_fields(state), remaining_dice=len(state['dice']) - 1)
+    dropped_kept = dict(_fields(state), dice=[], kept_dice=[5], remaining_dice=6)
+    for fields in (too_many, mismatched, dropped_kept):
+        with pytest.raises(ValueError):
+            unpack_game_state(pack_game_state(fields))
+    with pytest.raises(ValueError):
+        load_snapshot(new_game_state(), too_many)
+    hot_dice = dict(_fields(state), dice=[], kept_dice=[1] * 6 + [5], remaining_dice=5)
+    assert unpack_game_state(pack_game_state(hot_dice))['kept_dice'] == hot_dice['kept_dice']
+
+
+def test_resumed_game_is_recorded_once_finished():
+    state = _game()
+    resumed = new_game_state()
+    restore_snapshot(resumed, encode_snapshot(state))
+    assert close_game_history(resumed) is None
+    resumed['player_score'] = TARGET_SCORE
+    resumed['game_state'] = 'game_over'
+    assert close_game_history(resumed)['winner'] == 'player'
+    finished = new_game_state()
+    restore_snapshot(finished, encode_snapshot(resumed))
+    assert finished['game_history'] == [] and close_game_history(finished) is None
@@ -0,0 +1,21 @@
+import random
+
+from farkle.ai import heuristic_strategy
+from farkle.simulate import play_game
+from farkle.stats import SimulationStats
+
+
+def test_hot_dice_by_dice_rolled_matches_turns_and_merges():
+    whole, halves = SimulationStats(), [SimulationStats(), SimulationStats()]
+    turn_hot_dice = 0
+    for game in range(40):
+        result = play_game([heuristic_strategy] * 2, 'standard', random.Random(game), stats=whole.get('standard'))
+        play_game([heuristic_strategy] * 2, 'standard', random.Random(game), stats=halves[game % 2].get('standard'))
+        turn_hot_dice += sum(turn.hot_dice for turn in result.turns)
+
+    stats = whole.get('standard')
+    assert stats.hot_dice[0] == 0 and sum(stats.hot_dice) == turn_hot_dice > 0
+    assert all(hot <= rolls for hot, rolls in zip(stats.hot_dice, stats.rolls))
+    halves[0].merge(halves[1])
+    assert halves[0].get('standard').hot_dice == stats.hot_dice
+    assert 'hot dice rate by dice rolled: 1: ' in whole.report()
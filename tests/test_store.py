@@ -0,0 +1,43 @@
+import sqlite3
+import threading
+
+from farkle import store
+from farkle.store import GameRecord, GameStore
+
+
+def _flush(game_store: GameStore):
+    """flush() in a thread, failing the test instead of hanging it"""
+    flusher = threading.Thread(target=game_store.flush, daemon=True)
+    flusher.start()
+    flusher.join(10)
+    assert not flusher.is_alive(), "flush() never returned"
+
+
+def test_flush_returns_after_failed_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, 'RETRY_SECONDS', 0)
+    path = str(tmp_path / 'farkle.db')
+    game_store = GameStore(path, flush_interval=0.01)
+    conn = sqlite3.connect(path)
+    conn.execute('DROP TABLE games')
+    conn.commit()
+
+    game_store.record_game(GameRecord('Ann', 'Computer', 'standard', True, 10000, 5000, 1.0))
+    _flush(game_store)
+    assert game_store.dropped == 1
+    assert game_store._writer.is_alive()
+
+    conn.executescript(store.SCHEMA)  # Repaired: later batches are written again
+    conn.close()
+    game_store.record_game(GameRecord('Ann', 'Computer', 'standard', False, 9000, 10000, 2.0))
+    _flush(game_store)
+    assert [game.finished_at for game in game_store.recent_games('Ann')] == [2.0]
+    assert game_store.player_stats('Ann').games == 1
+    game_store.close()
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    game_store = GameStore(str(tmp_path / 'farkle.db'), max_queued=1)
+    game_store.close()  # No writer draining the queue
+    for i in range(3):
+        game_store.record_game(GameRecord('Ann', 'Computer', 'standard', True, 10000, 0, float(i)))
+    assert game_store.dropped == 2
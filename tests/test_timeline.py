@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from farkle.timeline import KEYFRAME_INTERVAL, Timeline, apply_delta, diff_bytes
+
+
+def _snapshots(count, seed=0):
+    """Distinct byte strings that drift a few bytes at a time and change length now and then"""
+    rng = random.Random(seed)
+    snapshot = bytes(rng.randrange(256) for _ in range(40))
+    snapshots = []
+    while len(snapshots) < count:
+        data = bytearray(snapshot)
+        for _ in range(rng.randrange(1, 4)):
+            data[rng.randrange(len(data))] = rng.randrange(256)
+        if rng.random() < 0.2:
+            data = data[:rng.randrange(30, 50)].ljust(rng.randrange(30, 50), b'\x07')
+        if bytes(data) != snapshot:
+            snapshot = bytes(data)
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def _timeline(snapshots):
+    timeline = Timeline()
+    for snapshot in snapshots:
+        assert timeline.append(snapshot)
+    return timeline
+
+
+def test_delta_round_trip():
+    snapshots = _snapshots(200, seed=1)
+    for old, new in zip(snapshots, snapshots[1:]):
+        assert apply_delta(old, diff_bytes(old, new)) == new
+
+
+def test_every_step_reads_back_across_keyframes():
+    snapshots = _snapshots(3 * KEYFRAME_INTERVAL + 5)
+    timeline = _timeline(snapshots)
+    assert len(timeline) == len(snapshots)
+    assert len(timeline.keyframes) == 4
+    assert [timeline[step] for step in range(len(timeline))] == snapshots
+    assert timeline[-1] == snapshots[-1]
+    with pytest.raises(IndexError):
+        timeline[len(snapshots)]
+
+
+def test_unchanged_snapshot_is_not_a_step():
+    timeline = _timeline(_snapshots(3))
+    assert not timeline.append(timeline[-1])
+    assert len(timeline) == 3
+
+
+@pytest.mark.parametrize('length', [0, 1, KEYFRAME_INTERVAL - 1, KEYFRAME_INTERVAL, KEYFRAME_INTERVAL + 7])
+def test_truncate_then_continue(length):
+    snapshots = _snapshots(2 * KEYFRAME_INTERVAL + 3)
+    timeline = _timeline(snapshots)
+    timeline.truncate(length)
+    assert len(timeline) == length
+    assert len(timeline.keyframes) == -(-length // KEYFRAME_INTERVAL)
+    branch = _snapshots(KEYFRAME_INTERVAL + 2, seed=2)
+    for snapshot in branch:
+        assert timeline.append(snapshot)
+    assert [timeline[step] for step in range(len(timeline))] == snapshots[:length] + branch
+
+
+def test_tail_keeps_the_last_steps():
+    snapshots = _snapshots(KEYFRAME_INTERVAL * 2 + 9)
+    timeline = _timeline(snapshots)
+    tail = timeline.tail(KEYFRAME_INTERVAL + 3)
+    assert [tail[step] for step in range(len(tail))] == snapshots[-(KEYFRAME_INTERVAL + 3):]
+    assert tail.keyframes[0] == snapshots[-(KEYFRAME_INTERVAL + 3)]
+    assert len(timeline.tail(1000)) == len(timeline)
+    assert len(timeline.tail(0)) == 0
@@ -0,0 +1,20 @@
+import numpy as np
+
+from farkle.policy import PolicyTable
+from farkle.train import initial_policy, train
+
+STEP = 1000  # Small tables, so a few dozen games are quick
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path):
+    whole = train(initial_policy(['standard'], STEP), 'standard', 40, batch_episodes=10)
+
+    checkpoint = str(tmp_path / 'ckpt.npz')
+    train(initial_policy(['standard'], STEP), 'standard', 20, batch_episodes=10, checkpoint=checkpoint)
+    resumed = PolicyTable.load(checkpoint)
+    assert resumed.episodes == {'standard': 20}
+    train(resumed, 'standard', 40, batch_episodes=10, checkpoint=checkpoint)
+
+    final = PolicyTable.load(checkpoint)
+    assert final.episodes == {'standard': 40}
+    np.testing.assert_array_equal(final.tables['standard'], whole.tables['standard'])
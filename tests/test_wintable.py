@@ -0,0 +1,27 @@
+from farkle.scoring import TARGET_SCORE
+from farkle.state import new_game_state, start_new_game
+from farkle.wintable import WIN_TABLE_STEP, win_chances
+
+SCORES = range(0, TARGET_SCORE, WIN_TABLE_STEP)
+
+
+def _chances(player_score, computer_score, current_player='player'):
+    state = new_game_state(0)
+    start_new_game(state, 0)
+    state.update(player_score=player_score, computer_score=computer_score, current_player=current_player)
+    return win_chances(state)
+
+
+def test_win_chance_grows_with_the_lead():
+    for current_player in ('player', 'computer'):
+        for opponent in (0, 5000, 9000):
+            chances = [_chances(score, opponent, current_player)[0] for score in SCORES]
+            assert all(a <= b + 1e-12 for a, b in zip(chances, chances[1:]))
+            assert chances[0] < chances[-1]
+
+
+def test_chances_are_complementary():
+    for scores in ((0, 0), (3000, 8000), (9750, 250)):
+        player, computer = _chances(*scores)
+        assert 0 <= player <= 1 and abs(player + computer - 1) < 1e-12
+    assert _chances(5000, 5000)[0] > 0.5  # Moving first is an edge